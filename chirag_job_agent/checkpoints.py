@@ -0,0 +1,89 @@
+"""
+checkpoints.py — On-disk stage outputs so a crashed run can be resumed
+
+Each pipeline stage writes its output to data/runs/<run_id>/<stage>.json.gz.
+`python main.py --resume <run_id>` reloads the stages that finished and
+carries on from the first one that didn't — a crash while scoring no longer
+throws away 10+ minutes of rate-limited scraping.
+"""
+import gzip
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+
+from config import CHECKPOINT_DIR
+
+
+def new_run_id() -> str:
+    return datetime.now().strftime("%Y%m%d-%H%M%S")
+
+
+def latest_run_id() -> str | None:
+    """Most recent run that still has checkpoints on disk."""
+    if not os.path.isdir(CHECKPOINT_DIR):
+        return None
+    runs = sorted(d for d in os.listdir(CHECKPOINT_DIR)
+                  if os.path.isdir(os.path.join(CHECKPOINT_DIR, d)))
+    return runs[-1] if runs else None
+
+
+def _encode(obj):
+    # Job / ScoreResult records are saved in dict form; stages accept either.
+    return obj.to_dict() if hasattr(obj, "to_dict") else str(obj)
+
+
+def _path(run_id: str, stage: str) -> str:
+    return os.path.join(CHECKPOINT_DIR, run_id, f"{stage}.json.gz")
+
+
+def save(run_id: str, stage: str, data, duration_s: float):
+    path = _path(run_id, stage)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with gzip.open(tmp, "wt", encoding="utf-8") as f:
+        json.dump({"run_id": run_id, "stage": stage, "saved_at": datetime.now().isoformat(),
+                   "duration_s": round(duration_s, 3), "data": data},
+                  f, ensure_ascii=False, separators=(",", ":"), default=_encode)
+    os.replace(tmp, path)   # a half-written checkpoint never looks complete
+
+
+def load(run_id: str, stage: str) -> dict | None:
+    """Return {"data", "duration_s", ...} for a finished stage, or None."""
+    path = _path(run_id, stage)
+    if not os.path.exists(path):
+        return None
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def run_stages(run_id: str, stages: list[tuple], resume: bool = False, log=print,
+               after_stage=None):
+    """
+    Run `stages` = [(name, fn)] in order, each fn taking the previous stage's
+    output. Finished stages are checkpointed; with `resume`, stages that
+    already have a checkpoint are loaded instead of re-run. `after_stage(name)`
+    is called once each stage has run.
+    Returns ({stage: output}, {stage: seconds}).
+    """
+    outputs, timings, data = {}, {}, None
+    for name, fn in stages:
+        done = load(run_id, name) if resume else None
+        if done is not None:
+            log(f"  ⏩ {name}: resumed from checkpoint ({done['duration_s']}s originally)")
+            data, timings[name] = done["data"], done["duration_s"]
+        else:
+            t0 = time.perf_counter()
+            data = fn(data)
+            timings[name] = round(time.perf_counter() - t0, 3)
+            save(run_id, name, data, timings[name])
+            if after_stage:
+                after_stage(name)
+        outputs[name] = data
+    return outputs, timings
+
+
+def discard(run_id: str):
+    """Remove a run's checkpoints once it has completed."""
+    shutil.rmtree(os.path.join(CHECKPOINT_DIR, run_id), ignore_errors=True)
@@ -49,14 +49,69 @@ TARGET_LOCATIONS = ["Delhi", "Noida", "Gurugram", "Gurgaon", "Delhi NCR", "Remot
 
 MIN_FIT_SCORE = 6   # Jobs below this score are discarded
 
+EXPERIENCE_RANGE = (0, 3)   # years of experience you can credibly apply with (min, max)
+
+EXCLUDED_COMPANIES = []     # e.g. ["Acme Staffing"] — dropped by the scrapers' title pre-filter
+
 # ── EMAIL ───────────────────────────────────────────────────────
 EMAIL_SENDER   = "ashu200221@gmail.com"
 EMAIL_TO       = "ashu200221@gmail.com"
 
+# Everyone who gets a digest, each with their own filters:
+#   min_score  — lowest fit score to include
+#   platforms  — e.g. ["LinkedIn", "Naukri"]; omit for all
+#   keywords   — only titles containing one of these; omit for all
+#   alert_min_score — instant alert threshold in `main.py serve` (default ALERT_MIN_SCORE)
+RECIPIENTS = [
+    {"email": EMAIL_TO, "min_score": MIN_FIT_SCORE},
+]
+
+SMTP_HOST    = os.environ.get("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT    = int(os.environ.get("SMTP_PORT", "465"))
+SMTP_USE_SSL = os.environ.get("SMTP_USE_SSL", "true").lower() != "false"
+
+# Failed sends stay queued in the outbox and are retried with exponential
+# backoff (1 min, 2 min, 4 min … capped) by `main.py deliver`
+OUTBOX_MAX_ATTEMPTS = 8
+OUTBOX_MAX_BACKOFF  = 6 * 3600   # seconds
+
+# Gmail clips HTML bodies past ~102 KB; bigger digests are split into parts
+DIGEST_MAX_BYTES = 90_000
+
 # Reads from GitHub Secret — never hardcode your password here!
 EMAIL_PASSWORD = os.environ.get("GMAIL_PASSWORD", "")
 
+# ── DAEMON (main.py serve) ──────────────────────────────────────
+# Each source is polled on its own interval; new jobs are scored and saved
+# straight away, and anything scoring ALERT_MIN_SCORE+ is emailed at once.
+POLL_INTERVALS = {"LinkedIn": 30 * 60, "Indeed": 20 * 60, "Naukri": 45 * 60}   # seconds
+POLL_MAX_JOBS  = 15     # per source, per poll
+ALERT_MIN_SCORE = 9
+DIGEST_HOUR    = 8      # local hour the daily digest goes out in serve mode
+
 # ── PATHS ───────────────────────────────────────────────────────
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_PATH  = os.path.join(BASE_DIR, "data", "jobs.db")
 LOG_PATH = os.path.join(BASE_DIR, "logs", "agent.log")
+LOG_JSONL_PATH = os.path.join(BASE_DIR, "logs", "agent.jsonl")   # rotated JSON lines (logpipe.py)
+METRICS_DIR = os.path.join(BASE_DIR, "logs", "metrics")   # per-run timing JSON + --profile output
+PROFILES_DIR = os.path.join(BASE_DIR, "profiles")   # extra candidates, one JSON file each (profiles.py)
+
+# ── LOGGING ─────────────────────────────────────────────────────
+LOG_MAX_BYTES    = 5 * 1024 * 1024   # rotate logs/agent.jsonl at this size
+LOG_BACKUPS      = 5                 # rotated files kept (agent.jsonl.1 … .5)
+LOG_SAMPLE_FIRST = 20                # per-job lines logged in full per stage …
+LOG_SAMPLE_EVERY = 50                # … then one in this many
+
+# ── STORAGE ─────────────────────────────────────────────────────
+RETENTION_DAYS = 120   # Older jobs move to monthly archive DBs
+ARCHIVE_DIR    = os.path.join(BASE_DIR, "data", "archive")
+EXPORT_DIR     = os.path.join(BASE_DIR, "exports")   # main.py export (not committed)
+CHECKPOINT_DIR = os.path.join(BASE_DIR, "data", "runs")   # per-run stage outputs for --resume
+SHARD_DIR      = os.path.join(BASE_DIR, "data", "shards") # --shard i/N worker output for `main.py merge`
+
+# "sqlite"   → commit data/jobs.db itself (default)
+# "segments" → commit only data/segments/; jobs.db is rebuilt from them on start
+STORAGE_MODE       = os.environ.get("JOB_AGENT_STORAGE", "sqlite")
+SEGMENT_DIR        = os.path.join(BASE_DIR, "data", "segments")
+SEGMENT_COMPACT_AT = 30    # Fold segments into one snapshot once there are this many
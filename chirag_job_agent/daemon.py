@@ -0,0 +1,162 @@
+"""
+daemon.py — Resident mode (`main.py serve`)
+
+Instead of one cold run a day, the process stays up and:
+  - polls each source on its own POLL_INTERVALS schedule through one shared
+    requests.Session, so TCP/TLS connections are reused between polls
+  - scores only jobs it hasn't seen yet (for every profile), with the scorer
+    imported once
+  - saves kept jobs as soon as they're scored
+  - emails anything scoring ALERT_MIN_SCORE+ immediately (via the outbox)
+  - still sends the normal daily digest at DIGEST_HOUR
+
+SIGINT / SIGTERM finish the current poll and exit cleanly.
+"""
+import signal
+import threading
+import time
+from datetime import datetime, timedelta
+
+from config import (POLL_INTERVALS, POLL_MAX_JOBS, DIGEST_HOUR,
+                    ALERT_MIN_SCORE, EMAIL_PASSWORD)
+from database import job_exists, save_scored_jobs, save_rejected, save_title_roles, log_run
+from roles import drain_new
+from metrics import span
+from models import Job
+from profiles import load_profiles, score_matrix, is_kept
+
+SOURCES = {
+    "LinkedIn": ("scrapers.linkedin", "scrape_linkedin"),
+    "Indeed":   ("scrapers.indeed",   "scrape_indeed_rss"),
+    "Naukri":   ("scrapers.naukri",   "scrape_naukri"),
+}
+
+_stop = threading.Event()
+
+
+def _handle_signal(signum, frame):
+    _stop.set()
+
+
+def _load_scrapers(names) -> dict:
+    import importlib
+    return {n: getattr(importlib.import_module(SOURCES[n][0]), SOURCES[n][1]) for n in names}
+
+
+def next_digest_at(now: datetime, hour: int = DIGEST_HOUR) -> datetime:
+    at = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+    return at if at > now else at + timedelta(days=1)
+
+
+def send_alerts(jobs: list[Job], profiles: list[dict], log=print) -> int:
+    """Queue + send instant alerts for `jobs`, per profile. Returns the number of messages sent."""
+    from notifier.delivery import queue_alerts, drain_outbox, filter_jobs
+
+    queued = []
+    for profile in profiles:
+        mine = [j.for_profile(profile["id"]) for j in jobs]
+        if EMAIL_PASSWORD == "YOUR_GMAIL_APP_PASSWORD":
+            for j in filter_jobs(mine, {"min_score": ALERT_MIN_SCORE}):
+                log(f"  🚨 ALERT [{profile['id']}] {j.fit_score}/10  {j.title[:50]} "
+                    f"@ {j.company}  {j.url}")
+            continue
+        queued += queue_alerts(mine, profile["recipients"], profile=profile["id"])
+    return drain_outbox()["sent"] if queued else 0
+
+
+def poll_source(name: str, scrape, score_job, session, seen: set,
+                profiles: list[dict], log=print) -> dict:
+    """One poll of one source: scrape → skip known → score → save → alert."""
+    t0 = time.perf_counter()
+    with span(f"poll.{name.lower()}"):
+        try:
+            raw = scrape(max_jobs=POLL_MAX_JOBS, session=session)
+        except Exception as e:
+            log(f"  {name} poll failed: {e}")
+            raw = []
+
+    fresh = []
+    for job in raw:
+        if not job.url or job.url in seen:
+            continue
+        seen.add(job.url)
+        if not job_exists(job.url):
+            fresh.append(job)
+
+    from scorer.engine import prefilter_report, ruleset_id, remember_rejects
+    from scorer.learn import apply_model
+    scored = []
+    for job in fresh:
+        try:
+            score_matrix(job, profiles, score_job)
+            scored.append(job)
+        except Exception as e:
+            log(f"  Error scoring '{job.title}': {e}")
+    apply_model(scored)
+    kept = [j for j in scored if is_kept(j, profiles)]
+    dropped = [j for j in scored if not is_kept(j, profiles)]
+
+    rejected = prefilter_report().get(name, {})
+
+    ids = save_scored_jobs(kept)
+    save_rejected(dropped, ruleset_id(profiles))
+    remember_rejects(j.key for j in dropped)
+    save_title_roles(drain_new())
+    alerts = send_alerts([j for j in kept if j.id], profiles, log) if ids else 0
+    elapsed = round(time.perf_counter() - t0, 3)
+
+    log_run(len(raw), len(fresh), len(ids), 1 if alerts else 0,
+            run_id=f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{name.lower()}",
+            stage_timings={"poll": elapsed},
+            prefilter_rejects={name: rejected} if rejected else None)
+    log(f"  [{datetime.now().strftime('%H:%M')}] {name}: {len(raw)} seen "
+        f"(+{sum(rejected.values())} pre-filtered), {len(fresh)} new, "
+        f"{len(ids)} kept, {alerts} alert(s) · {elapsed}s")
+    return {"found": len(raw), "rejected": sum(rejected.values()), "new": len(fresh),
+            "kept": len(ids), "alerts": alerts}
+
+
+def serve(daily, sources=None, log=print, on_start=None):
+    """
+    Run until SIGINT/SIGTERM. `daily(profiles)` is called once a day at
+    DIGEST_HOUR (main.py passes the digest + retention step); `on_start(profiles)`
+    once before the first poll (main.py loads the rejected-jobs ledger).
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from scorer.engine import score_job
+
+    sources  = sources or list(POLL_INTERVALS)
+    scrapers = _load_scrapers(sources)
+    session  = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=len(sources), pool_maxsize=4))
+
+    signal.signal(signal.SIGINT,  _handle_signal)
+    signal.signal(signal.SIGTERM, _handle_signal)
+
+    profiles = load_profiles()
+    if on_start:
+        on_start(profiles)
+    seen = set()
+    next_poll = {name: time.time() for name in sources}
+    digest_at = next_digest_at(datetime.now())
+    log(f"🛰  Serving {', '.join(sources)} — next digest {digest_at:%a %H:%M}")
+
+    try:
+        while not _stop.is_set():
+            for name in sources:
+                if _stop.is_set() or time.time() < next_poll[name]:
+                    continue
+                poll_source(name, scrapers[name], score_job, session, seen, profiles, log)
+                next_poll[name] = time.time() + POLL_INTERVALS.get(name, 1800)
+
+            if datetime.now() >= digest_at:
+                daily(profiles)
+                seen.clear()   # the DB and the rejected-jobs ledger remember scored jobs
+                digest_at = next_digest_at(datetime.now())
+
+            wake = min(min(next_poll.values()), digest_at.timestamp())
+            _stop.wait(max(1.0, wake - time.time()))
+    finally:
+        session.close()
+        log("🛰  Daemon stopped.")
@@ -1,59 +1,634 @@
 """
 database.py — SQLite job tracker (zero cost, runs locally)
 """
+import json
 import sqlite3
 import os
-from datetime import datetime
-from config import DB_PATH
+import zlib
+from datetime import datetime, timedelta
+from config import DB_PATH, ARCHIVE_DIR, RETENTION_DAYS
+from metrics import timed
+from locations import resolve_location
+from models import Job, ScoreResult, split_skills
+from roles import classify_title, TAXONOMY_VERSION
+
+
+def _deflate(text) -> bytes:
+    return zlib.compress((text or "").encode("utf-8"), 9)
+
+
+def _inflate(blob) -> str:
+    return zlib.decompress(blob).decode("utf-8") if blob else ""
 
 
 def get_conn():
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
+    # Descriptions are stored zlib-compressed; reads that want the text in SQL
+    # (exports, segments, backfills) decompress through this function. Nothing
+    # in the schema calls it, so the sqlite3 CLI can still write to jobs.db.
+    conn.create_function("inflate", 1, _inflate, deterministic=True)
     return conn
 
 
-def init_db():
-    """Create tables if they don't exist."""
-    with get_conn() as conn:
-        conn.executescript("""
-        CREATE TABLE IF NOT EXISTS jobs (
-            id               INTEGER PRIMARY KEY AUTOINCREMENT,
-            title            TEXT    NOT NULL,
-            company          TEXT,
-            location         TEXT,
-            url              TEXT    UNIQUE,
-            platform         TEXT,
-            employment_type  TEXT,
-            description      TEXT,
-            posted_date      TEXT,
-
-            -- AI scoring fields
-            fit_score        INTEGER DEFAULT 0,
-            role_match       TEXT,
-            matching_skills  TEXT,
-            missing_skills   TEXT,
-            key_requirement  TEXT,
-            ai_summary       TEXT,
-
-            -- Tracking
-            date_found       TEXT,
-            status           TEXT DEFAULT 'Shortlisted',
-            notified         INTEGER DEFAULT 0,
-            notes            TEXT,
-            created_at       TEXT DEFAULT CURRENT_TIMESTAMP
-        );
+def _write_skills(conn, job_id: int, date_found: str, matching, missing):
+    """Replace a job's rows in job_skills with the given matching/missing lists."""
+    conn.execute("DELETE FROM job_skills WHERE job_id = ?", (job_id,))
+    pairs = [("match", s) for s in split_skills(matching)] + \
+            [("missing", s) for s in split_skills(missing)]
+    if not pairs:
+        return
+    conn.executemany("INSERT OR IGNORE INTO skills (name) VALUES (?)",
+                     [(name,) for _, name in pairs])
+    conn.executemany("""
+        INSERT OR IGNORE INTO job_skills (job_id, kind, skill_id, date_found)
+        SELECT ?, ?, id, ? FROM skills WHERE name = ?
+    """, [(job_id, kind, date_found, name) for kind, name in pairs])
 
-        CREATE TABLE IF NOT EXISTS run_log (
-            id           INTEGER PRIMARY KEY AUTOINCREMENT,
-            run_at       TEXT,
-            jobs_found   INTEGER,
-            jobs_scored  INTEGER,
-            jobs_kept    INTEGER,
-            email_sent   INTEGER DEFAULT 0
-        );
-        """)
+
+def _backfill_job_skills(conn):
+    rows = conn.execute("""
+        SELECT id, date_found, matching_skills, missing_skills FROM jobs
+        WHERE COALESCE(matching_skills, '') != '' OR COALESCE(missing_skills, '') != ''
+    """).fetchall()
+    for r in rows:
+        _write_skills(conn, r["id"], r["date_found"], r["matching_skills"], r["missing_skills"])
+
+
+def _compress_descriptions(conn):
+    for r in conn.execute("SELECT id, description FROM jobs").fetchall():
+        _write_description(conn, r["id"], r["description"])
+    conn.execute("UPDATE jobs SET description = NULL")
+
+
+def _backfill_experience(conn):
+    from scorer.engine import extract_experience
+    rows = conn.execute("""
+        SELECT j.id, j.title, inflate(d.body) AS description
+        FROM jobs j LEFT JOIN job_descriptions d ON d.job_id = j.id
+    """).fetchall()
+    conn.executemany("UPDATE jobs SET exp_min = ?, exp_max = ? WHERE id = ?",
+                     [(*extract_experience(r["title"], r["description"]), r["id"])
+                      for r in rows])
+
+
+def _backfill_locations(conn):
+    rows = conn.execute("SELECT id, location FROM jobs").fetchall()
+    conn.executemany("UPDATE jobs SET city = ?, region = ?, work_mode = ? WHERE id = ?",
+                     [(*_place_row(r["location"]), r["id"]) for r in rows])
+
+
+def _backfill_roles(conn):
+    rows = conn.execute("SELECT id, title FROM jobs").fetchall()
+    conn.executemany("UPDATE jobs SET canonical_role = ? WHERE id = ?",
+                     [(classify_title(r["title"] or ""), r["id"]) for r in rows])
+
+
+def _place_row(location: str) -> tuple:
+    p = resolve_location(location or "")
+    return p.city, p.region, p.work_mode
+
+
+# ── SCHEMA MIGRATIONS ───────────────────────────────────────────
+# Each entry upgrades the schema by one version: an SQL script, or a callable
+# taking the connection for data backfills. The current version lives in
+# PRAGMA user_version, so an existing jobs.db is upgraded in place — append new
+# steps to the end of this list, never edit or reorder the ones already shipped.
+MIGRATIONS = [
+    # 1 — base tables
+    """
+    CREATE TABLE IF NOT EXISTS jobs (
+        id               INTEGER PRIMARY KEY AUTOINCREMENT,
+        title            TEXT    NOT NULL,
+        company          TEXT,
+        location         TEXT,
+        url              TEXT    UNIQUE,
+        platform         TEXT,
+        employment_type  TEXT,
+        description      TEXT,
+        posted_date      TEXT,
+
+        -- AI scoring fields
+        fit_score        INTEGER DEFAULT 0,
+        role_match       TEXT,
+        matching_skills  TEXT,
+        missing_skills   TEXT,
+        key_requirement  TEXT,
+        ai_summary       TEXT,
+
+        -- Tracking
+        date_found       TEXT,
+        status           TEXT DEFAULT 'Shortlisted',
+        notified         INTEGER DEFAULT 0,
+        notes            TEXT,
+        created_at       TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE TABLE IF NOT EXISTS run_log (
+        id           INTEGER PRIMARY KEY AUTOINCREMENT,
+        run_at       TEXT,
+        jobs_found   INTEGER,
+        jobs_scored  INTEGER,
+        jobs_kept    INTEGER,
+        email_sent   INTEGER DEFAULT 0
+    );
+    """,
+
+    # 2 — indexes for the hot queries
+    """
+    -- get_todays_shortlist: equality on date_found + notified, range/order on fit_score
+    CREATE INDEX IF NOT EXISTS idx_jobs_shortlist ON jobs (date_found, notified, fit_score);
+
+    -- get_stats: GROUP BY platform and AVG(fit_score) read only these indexes
+    CREATE INDEX IF NOT EXISTS idx_jobs_platform  ON jobs (platform);
+    CREATE INDEX IF NOT EXISTS idx_jobs_fit_score ON jobs (fit_score);
+    """,
+
+    # 3 — normalised skills; date_found is copied in so gap queries stay index-only
+    """
+    CREATE TABLE IF NOT EXISTS skills (
+        id    INTEGER PRIMARY KEY,
+        name  TEXT    NOT NULL UNIQUE
+    );
+
+    CREATE TABLE IF NOT EXISTS job_skills (
+        job_id      INTEGER NOT NULL REFERENCES jobs(id),
+        kind        TEXT    NOT NULL CHECK (kind IN ('match', 'missing')),
+        skill_id    INTEGER NOT NULL REFERENCES skills(id),
+        date_found  TEXT,
+        PRIMARY KEY (job_id, kind, skill_id)
+    ) WITHOUT ROWID;
+
+    CREATE INDEX IF NOT EXISTS idx_job_skills_gap   ON job_skills (kind, date_found, skill_id);
+    CREATE INDEX IF NOT EXISTS idx_job_skills_skill ON job_skills (skill_id, kind, date_found);
+
+    CREATE TRIGGER IF NOT EXISTS trg_jobs_delete_skills AFTER DELETE ON jobs BEGIN
+        DELETE FROM job_skills WHERE job_id = old.id;
+    END;
+    """,
+
+    # 4 — split existing comma-joined skill strings into job_skills
+    _backfill_job_skills,
+
+    # 5 — description side table and the full-text index. jobs_fts keeps its own
+    # plain-text copy of each description, written by _write_description, so
+    # nothing in the schema needs inflate() and any SQLite client can write.
+    """
+    CREATE TABLE IF NOT EXISTS job_descriptions (
+        job_id  INTEGER PRIMARY KEY REFERENCES jobs(id),
+        body    BLOB    NOT NULL
+    );
+
+    CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(
+        title, company, description,
+        tokenize='unicode61 remove_diacritics 2'
+    );
+
+    CREATE TRIGGER IF NOT EXISTS trg_jobs_fts_delete AFTER DELETE ON jobs BEGIN
+        DELETE FROM jobs_fts WHERE rowid = old.id;
+        DELETE FROM job_descriptions WHERE job_id = old.id;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_jobs_fts_update
+    AFTER UPDATE OF title, company ON jobs BEGIN
+        UPDATE jobs_fts SET title = new.title, company = new.company WHERE rowid = new.id;
+    END;
+    """,
+
+    # 6 — move existing description text into job_descriptions (compressed) and the index
+    _compress_descriptions,
+
+    # 7 — stats counters maintained by triggers, so get_stats never scans jobs
+    """
+    CREATE TABLE IF NOT EXISTS stats_daily (
+        day       TEXT    NOT NULL,
+        platform  TEXT    NOT NULL,
+        score     INTEGER NOT NULL,
+        jobs      INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, platform, score)
+    ) WITHOUT ROWID;
+
+    CREATE TABLE IF NOT EXISTS stats_platform (
+        platform   TEXT    PRIMARY KEY,
+        jobs       INTEGER NOT NULL DEFAULT 0,
+        scored     INTEGER NOT NULL DEFAULT 0,   -- jobs with fit_score > 0
+        score_sum  INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID;
+
+    INSERT INTO stats_daily (day, platform, score, jobs)
+        SELECT COALESCE(date_found, ''), COALESCE(platform, ''), COALESCE(fit_score, 0), COUNT(*)
+        FROM jobs GROUP BY 1, 2, 3;
+    INSERT INTO stats_platform (platform, jobs, scored, score_sum)
+        SELECT COALESCE(platform, ''), COUNT(*), SUM(fit_score > 0), SUM(MAX(COALESCE(fit_score, 0), 0))
+        FROM jobs GROUP BY 1;
+
+    CREATE TRIGGER IF NOT EXISTS trg_jobs_stats_insert AFTER INSERT ON jobs BEGIN
+        INSERT INTO stats_daily (day, platform, score, jobs)
+        VALUES (COALESCE(new.date_found, ''), COALESCE(new.platform, ''), COALESCE(new.fit_score, 0), 1)
+        ON CONFLICT (day, platform, score) DO UPDATE SET jobs = jobs + 1;
+        INSERT INTO stats_platform (platform, jobs, scored, score_sum)
+        VALUES (COALESCE(new.platform, ''), 1, COALESCE(new.fit_score, 0) > 0, MAX(COALESCE(new.fit_score, 0), 0))
+        ON CONFLICT (platform) DO UPDATE SET
+            jobs = jobs + 1, scored = scored + excluded.scored, score_sum = score_sum + excluded.score_sum;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_jobs_stats_delete AFTER DELETE ON jobs BEGIN
+        UPDATE stats_daily SET jobs = jobs - 1
+        WHERE day = COALESCE(old.date_found, '') AND platform = COALESCE(old.platform, '')
+          AND score = COALESCE(old.fit_score, 0);
+        UPDATE stats_platform SET
+            jobs = jobs - 1,
+            scored = scored - (COALESCE(old.fit_score, 0) > 0),
+            score_sum = score_sum - MAX(COALESCE(old.fit_score, 0), 0)
+        WHERE platform = COALESCE(old.platform, '');
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_jobs_stats_update
+    AFTER UPDATE OF fit_score, platform, date_found ON jobs BEGIN
+        UPDATE stats_daily SET jobs = jobs - 1
+        WHERE day = COALESCE(old.date_found, '') AND platform = COALESCE(old.platform, '')
+          AND score = COALESCE(old.fit_score, 0);
+        UPDATE stats_platform SET
+            jobs = jobs - 1,
+            scored = scored - (COALESCE(old.fit_score, 0) > 0),
+            score_sum = score_sum - MAX(COALESCE(old.fit_score, 0), 0)
+        WHERE platform = COALESCE(old.platform, '');
+        INSERT INTO stats_daily (day, platform, score, jobs)
+        VALUES (COALESCE(new.date_found, ''), COALESCE(new.platform, ''), COALESCE(new.fit_score, 0), 1)
+        ON CONFLICT (day, platform, score) DO UPDATE SET jobs = jobs + 1;
+        INSERT INTO stats_platform (platform, jobs, scored, score_sum)
+        VALUES (COALESCE(new.platform, ''), 1, COALESCE(new.fit_score, 0) > 0, MAX(COALESCE(new.fit_score, 0), 0))
+        ON CONFLICT (platform) DO UPDATE SET
+            jobs = jobs + 1, scored = scored + excluded.scored, score_sum = score_sum + excluded.score_sum;
+    END;
+
+    -- trend output groups run_log by day
+    CREATE INDEX IF NOT EXISTS idx_run_log_run_at ON run_log (run_at);
+    """,
+
+    # 8 — export watermarks (exporter.py), one per table + format; last_id is
+    # the last run_log.id or (since v27) jobs.row_version exported
+    """
+    CREATE TABLE IF NOT EXISTS export_state (
+        target       TEXT    PRIMARY KEY,
+        last_id      INTEGER NOT NULL,
+        exported_at  TEXT
+    );
+    """,
+
+    # 9 — change tracking for segment storage (segments.py). Triggers only
+    # record while segment_state.tracking = 1, i.e. in STORAGE_MODE "segments".
+    """
+    CREATE TABLE IF NOT EXISTS segment_state (
+        id           INTEGER PRIMARY KEY CHECK (id = 1),
+        tracking     INTEGER NOT NULL DEFAULT 0,
+        run_log_id   INTEGER NOT NULL DEFAULT 0    -- last run_log row written to a segment
+    );
+    INSERT OR IGNORE INTO segment_state (id) VALUES (1);
+
+    CREATE TABLE IF NOT EXISTS segment_changes (
+        job_id   INTEGER PRIMARY KEY,
+        url      TEXT,
+        deleted  INTEGER NOT NULL DEFAULT 0
+    );
+
+    CREATE TABLE IF NOT EXISTS applied_segments (
+        name        TEXT PRIMARY KEY,
+        applied_at  TEXT
+    );
+
+    CREATE TRIGGER IF NOT EXISTS trg_jobs_segment_insert AFTER INSERT ON jobs
+    WHEN (SELECT tracking FROM segment_state) = 1 BEGIN
+        INSERT OR REPLACE INTO segment_changes (job_id, url, deleted) VALUES (new.id, new.url, 0);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_jobs_segment_update AFTER UPDATE ON jobs
+    WHEN (SELECT tracking FROM segment_state) = 1 BEGIN
+        INSERT OR REPLACE INTO segment_changes (job_id, url, deleted) VALUES (new.id, new.url, 0);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_jobs_segment_delete AFTER DELETE ON jobs
+    WHEN (SELECT tracking FROM segment_state) = 1 BEGIN
+        INSERT OR REPLACE INTO segment_changes (job_id, url, deleted) VALUES (old.id, old.url, 1);
+    END;
+    """,
+
+    # 10 — durable email outbox; outbox_jobs links each message to the jobs it covers
+    """
+    CREATE TABLE IF NOT EXISTS outbox (
+        id               INTEGER PRIMARY KEY AUTOINCREMENT,
+        recipient        TEXT    NOT NULL,
+        subject          TEXT,
+        message          BLOB    NOT NULL,      -- RFC 822 text, zlib-compressed
+        status           TEXT    NOT NULL DEFAULT 'pending'
+                                 CHECK (status IN ('pending', 'sent', 'failed')),
+        attempts         INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at  TEXT    NOT NULL,
+        last_error       TEXT,
+        created_at       TEXT    DEFAULT CURRENT_TIMESTAMP,
+        sent_at          TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (status, next_attempt_at);
+
+    CREATE TABLE IF NOT EXISTS outbox_jobs (
+        outbox_id  INTEGER NOT NULL REFERENCES outbox(id),
+        job_id     INTEGER NOT NULL,
+        PRIMARY KEY (outbox_id, job_id)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_outbox_jobs_job ON outbox_jobs (job_id);
+    """,
+
+    # 11 — checkpointed runs: which run wrote the row and how long each stage took
+    """
+    ALTER TABLE run_log ADD COLUMN run_id TEXT;
+    ALTER TABLE run_log ADD COLUMN stage_timings TEXT;   -- JSON {stage: seconds}
+    """,
+
+    # 12 — per-run span aggregates from metrics.py
+    """
+    CREATE TABLE IF NOT EXISTS run_metrics (
+        run_id   TEXT    NOT NULL,
+        name     TEXT    NOT NULL,      -- span name, e.g. linkedin.request
+        count    INTEGER NOT NULL,
+        total_s  REAL    NOT NULL,
+        p50_s    REAL,
+        p95_s    REAL,
+        max_s    REAL,
+        PRIMARY KEY (run_id, name)
+    ) WITHOUT ROWID;
+    """,
+
+    # 13 — multi-profile scoring (profiles.py): one row per job × profile.
+    # jobs keeps the default profile's score; outbox messages remember whose
+    # digest they are so only that profile's rows get marked notified.
+    """
+    CREATE TABLE IF NOT EXISTS job_scores (
+        job_id           INTEGER NOT NULL,
+        profile          TEXT    NOT NULL,
+        fit_score        INTEGER,
+        role_match       TEXT,
+        matching_skills  TEXT,
+        missing_skills   TEXT,
+        ai_summary       TEXT,
+        date_found       TEXT,
+        notified         INTEGER DEFAULT 0,
+        PRIMARY KEY (job_id, profile)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_job_scores_shortlist
+        ON job_scores (profile, date_found, notified, fit_score);
+
+    CREATE TRIGGER IF NOT EXISTS trg_jobs_delete_scores AFTER DELETE ON jobs BEGIN
+        DELETE FROM job_scores WHERE job_id = old.id;
+    END;
+
+    INSERT OR IGNORE INTO job_scores
+        (job_id, profile, fit_score, role_match, matching_skills, missing_skills,
+         ai_summary, date_found, notified)
+    SELECT id, 'default', fit_score, role_match, matching_skills, missing_skills,
+           ai_summary, date_found, notified
+    FROM jobs;
+
+    ALTER TABLE outbox ADD COLUMN profile TEXT;
+    """,
+
+    # 14 — parsed experience range (years) so experience filters use an index
+    """
+    ALTER TABLE jobs ADD COLUMN exp_min INTEGER;
+    ALTER TABLE jobs ADD COLUMN exp_max INTEGER;   -- NULL = open-ended ("5+ years")
+    CREATE INDEX IF NOT EXISTS idx_jobs_experience ON jobs (exp_min, exp_max);
+    """,
+
+    # 15 — parse the range out of jobs stored before v14
+    _backfill_experience,
+
+    # 16 — canonical location (locations.py) for indexed filters and breakdowns
+    """
+    ALTER TABLE jobs ADD COLUMN city TEXT;
+    ALTER TABLE jobs ADD COLUMN region TEXT;
+    ALTER TABLE jobs ADD COLUMN work_mode TEXT;    -- remote | hybrid | onsite | NULL
+    CREATE INDEX IF NOT EXISTS idx_jobs_region ON jobs (region, city);
+    CREATE INDEX IF NOT EXISTS idx_jobs_city   ON jobs (city);
+    """,
+
+    # 17 — resolve locations of jobs stored before v16
+    _backfill_locations,
+
+    # 18 — title pre-filter rejects per run (scorer.engine.prefilter)
+    """
+    ALTER TABLE run_log ADD COLUMN prefilter_rejects TEXT;   -- JSON {source: {reason: n}}
+    """,
+
+    # 19 — rejected-jobs ledger: scored once, skipped until the ruleset changes.
+    # max_score is the best any profile got (or could still get, for pruned
+    # scores), so lowering a threshold promotes rows with one indexed query.
+    """
+    CREATE TABLE IF NOT EXISTS rejected_jobs (
+        job_key     TEXT    PRIMARY KEY,       -- models.Job.key
+        ruleset     TEXT    NOT NULL,          -- scorer.engine.ruleset_id()
+        max_score   INTEGER NOT NULL,
+        scores      TEXT    NOT NULL,          -- JSON {profile: {fit_score, ...breakdown}}
+        job         BLOB    NOT NULL,          -- zlib JSON of the Job, to rescore without scraping
+        first_seen  TEXT    NOT NULL,
+        scored_at   TEXT    NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_rejected_promote ON rejected_jobs (ruleset, max_score);
+    CREATE INDEX IF NOT EXISTS idx_rejected_scored  ON rejected_jobs (scored_at);
+
+    ALTER TABLE segment_state ADD COLUMN rejected_at TEXT NOT NULL DEFAULT '';
+
+    -- promoted or expired rows, replayed as deletes (segments.py)
+    CREATE TABLE IF NOT EXISTS segment_rejected_deletes (
+        job_key  TEXT PRIMARY KEY
+    ) WITHOUT ROWID;
+
+    CREATE TRIGGER IF NOT EXISTS trg_rejected_segment_delete AFTER DELETE ON rejected_jobs
+    WHEN (SELECT tracking FROM segment_state) = 1 BEGIN
+        INSERT OR IGNORE INTO segment_rejected_deletes (job_key) VALUES (old.job_key);
+    END;
+    """,
+
+    # 20 — canonical role per job (roles.py) and the memoized title → role table
+    """
+    ALTER TABLE jobs ADD COLUMN canonical_role TEXT;
+    CREATE INDEX IF NOT EXISTS idx_jobs_role ON jobs (canonical_role, fit_score);
+
+    CREATE TABLE IF NOT EXISTS title_roles (
+        title     TEXT    PRIMARY KEY,     -- roles.normalize_title()
+        role      TEXT    NOT NULL,
+        taxonomy  INTEGER NOT NULL         -- roles.TAXONOMY_VERSION it was classified under
+    ) WITHOUT ROWID;
+    """,
+
+    # 21 — classify jobs stored before v20
+    _backfill_roles,
+
+    # 22 — outcome labels (main.py label) and the weights learned from them (scorer/learn.py)
+    """
+    ALTER TABLE jobs ADD COLUMN labelled_at TEXT;
+    CREATE INDEX IF NOT EXISTS idx_jobs_labelled ON jobs (labelled_at);
+
+    CREATE TABLE IF NOT EXISTS score_model (
+        id                INTEGER PRIMARY KEY AUTOINCREMENT,
+        trained_at        TEXT    NOT NULL,
+        generation        INTEGER NOT NULL,   -- id of the batch fit online updates descend from
+        features          TEXT    NOT NULL,   -- JSON list of feature names
+        weights           TEXT    NOT NULL,   -- JSON list, same order
+        bias              REAL    NOT NULL,
+        prior             REAL    NOT NULL,   -- share of positive labels, what P(apply) is read against
+        n_labels          INTEGER NOT NULL,
+        accuracy          REAL,               -- held-out (batch) or predict-then-update (online)
+        labelled_through  TEXT    NOT NULL    -- newest jobs.labelled_at included
+    );
+
+    ALTER TABLE segment_state ADD COLUMN model_id INTEGER NOT NULL DEFAULT 0;
+    """,
+
+    # 23 — outbox change tracking for segment storage, so queued and failed
+    # digests survive between runs when jobs.db itself is not committed
+    """
+    CREATE TABLE IF NOT EXISTS segment_outbox_changes (
+        outbox_id  INTEGER PRIMARY KEY,
+        deleted    INTEGER NOT NULL DEFAULT 0
+    );
+
+    CREATE TRIGGER IF NOT EXISTS trg_outbox_segment_insert AFTER INSERT ON outbox
+    WHEN (SELECT tracking FROM segment_state) = 1 BEGIN
+        INSERT OR REPLACE INTO segment_outbox_changes (outbox_id, deleted) VALUES (new.id, 0);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_outbox_segment_update AFTER UPDATE ON outbox
+    WHEN (SELECT tracking FROM segment_state) = 1 BEGIN
+        INSERT OR REPLACE INTO segment_outbox_changes (outbox_id, deleted) VALUES (new.id, 0);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_outbox_segment_delete AFTER DELETE ON outbox
+    WHEN (SELECT tracking FROM segment_state) = 1 BEGIN
+        INSERT OR REPLACE INTO segment_outbox_changes (outbox_id, deleted) VALUES (old.id, 1);
+    END;
+    """,
+
+    # 24 — instant alerts share the outbox but never mark jobs notified: only
+    # digests do, so recipients an alert skipped still get the job in theirs
+    """
+    ALTER TABLE outbox ADD COLUMN kind TEXT NOT NULL DEFAULT 'digest';
+    """,
+
+    # 25 — jobs per region, trigger-maintained like stats_platform (v7)
+    """
+    CREATE TABLE IF NOT EXISTS stats_region (
+        region  TEXT    PRIMARY KEY,
+        jobs    INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID;
+
+    INSERT INTO stats_region (region, jobs)
+        SELECT COALESCE(region, 'Unknown'), COUNT(*) FROM jobs GROUP BY 1;
+
+    CREATE TRIGGER IF NOT EXISTS trg_jobs_region_insert AFTER INSERT ON jobs BEGIN
+        INSERT INTO stats_region (region, jobs) VALUES (COALESCE(new.region, 'Unknown'), 1)
+        ON CONFLICT (region) DO UPDATE SET jobs = jobs + 1;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_jobs_region_delete AFTER DELETE ON jobs BEGIN
+        UPDATE stats_region SET jobs = jobs - 1 WHERE region = COALESCE(old.region, 'Unknown');
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_jobs_region_update
+    AFTER UPDATE OF region ON jobs WHEN old.region IS NOT new.region BEGIN
+        UPDATE stats_region SET jobs = jobs - 1 WHERE region = COALESCE(old.region, 'Unknown');
+        INSERT INTO stats_region (region, jobs) VALUES (COALESCE(new.region, 'Unknown'), 1)
+        ON CONFLICT (region) DO UPDATE SET jobs = jobs + 1;
+    END;
+    """,
+
+    # 26 — jobs per canonical role, maintained the same way
+    """
+    CREATE TABLE IF NOT EXISTS stats_role (
+        role  TEXT    PRIMARY KEY,
+        jobs  INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID;
+
+    INSERT INTO stats_role (role, jobs)
+        SELECT COALESCE(canonical_role, 'Other'), COUNT(*) FROM jobs GROUP BY 1;
+
+    CREATE TRIGGER IF NOT EXISTS trg_jobs_role_insert AFTER INSERT ON jobs BEGIN
+        INSERT INTO stats_role (role, jobs) VALUES (COALESCE(new.canonical_role, 'Other'), 1)
+        ON CONFLICT (role) DO UPDATE SET jobs = jobs + 1;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_jobs_role_delete AFTER DELETE ON jobs BEGIN
+        UPDATE stats_role SET jobs = jobs - 1 WHERE role = COALESCE(old.canonical_role, 'Other');
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_jobs_role_update
+    AFTER UPDATE OF canonical_role ON jobs WHEN old.canonical_role IS NOT new.canonical_role BEGIN
+        UPDATE stats_role SET jobs = jobs - 1 WHERE role = COALESCE(old.canonical_role, 'Other');
+        INSERT INTO stats_role (role, jobs) VALUES (COALESCE(new.canonical_role, 'Other'), 1)
+        ON CONFLICT (role) DO UPDATE SET jobs = jobs + 1;
+    END;
+    """,
+
+    # 27 — row versions for incremental export (exporter.py). Every insert or
+    # update moves the row to the next version; existing rows start at their
+    # id, so watermarks already stored (last jobs.id exported) stay valid.
+    """
+    ALTER TABLE jobs ADD COLUMN row_version INTEGER NOT NULL DEFAULT 0;
+    UPDATE jobs SET row_version = id;
+    CREATE INDEX IF NOT EXISTS idx_jobs_row_version ON jobs (row_version);
+
+    CREATE TRIGGER IF NOT EXISTS trg_jobs_version_insert AFTER INSERT ON jobs BEGIN
+        UPDATE jobs SET row_version = (SELECT MAX(row_version) FROM jobs) + 1 WHERE id = new.id;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_jobs_version_update
+    AFTER UPDATE ON jobs WHEN new.row_version = old.row_version BEGIN
+        UPDATE jobs SET row_version = (SELECT MAX(row_version) FROM jobs) + 1 WHERE id = new.id;
+    END;
+    """,
+
+    # 28 — the scorer's role category, so digest cards built from stored rows
+    # show it. Rows scored before stay NULL; Job.from_row falls back to
+    # canonical_role for them.
+    """
+    ALTER TABLE jobs ADD COLUMN role_category TEXT;
+    ALTER TABLE job_scores ADD COLUMN role_category TEXT;
+    """,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def _migrate(conn) -> int:
+    """Apply pending migrations in order. Returns the number applied."""
+    current = conn.execute("PRAGMA user_version").fetchone()[0]
+    if current > SCHEMA_VERSION:
+        raise RuntimeError(
+            f"jobs.db schema v{current} is newer than this code (v{SCHEMA_VERSION})"
+        )
+
+    for version in range(current + 1, SCHEMA_VERSION + 1):
+        step = MIGRATIONS[version - 1]
+        if callable(step):
+            # Data migrations run in Python inside a single transaction.
+            conn.commit()
+            conn.execute("BEGIN")
+            step(conn)
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        else:
+            # executescript() commits any open transaction first, so BEGIN/COMMIT
+            # here makes each step (and its version bump) atomic.
+            conn.executescript(f"BEGIN;\n{step}\nPRAGMA user_version = {version};\nCOMMIT;")
+        print(f"[DB] Migrated schema to v{version}.")
+    return SCHEMA_VERSION - current
+
+
+def init_db():
+    """Create tables and bring the schema up to date."""
+    with get_conn() as conn:
+        # Only takes effect on a brand-new file; apply_retention converts old ones.
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        _migrate(conn)
     print("[DB] Database initialised.")
 
 
@@ -63,49 +638,332 @@ def job_exists(url: str) -> bool:
         return row is not None
 
 
-def insert_job(job: dict) -> int | None:
-    """Insert a new job. Returns row id or None if duplicate."""
-    if job_exists(job.get("url", "")):
+def insert_job(job: Job) -> int | None:
+    """Insert a new (unscored) job. Returns row id or None if duplicate."""
+    if job_exists(job.url):
         return None
     with get_conn() as conn:
         cur = conn.execute("""
             INSERT INTO jobs
               (title, company, location, url, platform, employment_type,
-               description, posted_date, date_found)
-            VALUES (?,?,?,?,?,?,?,?,?)
+               description, posted_date, date_found, city, region, work_mode,
+               canonical_role)
+            VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)
         """, (
-            job.get("title", ""), job.get("company", ""),
-            job.get("location", ""), job.get("url", ""),
-            job.get("platform", ""), job.get("employment_type", "Full-time"),
-            job.get("description", ""), job.get("posted_date", ""),
-            datetime.today().strftime("%Y-%m-%d")
+            job.title, job.company, job.location, job.url,
+            job.platform, job.employment_type,
+            None, job.posted_date,
+            datetime.today().strftime("%Y-%m-%d"),
+            *_place_row(job.location), job.canonical_role
         ))
+        _write_description(conn, cur.lastrowid, job.description)
+        job.id = cur.lastrowid
         return cur.lastrowid
 
 
-def update_score(job_id: int, score_data: dict):
+def _write_description(conn, job_id: int, text: str):
+    """Store the compressed description and (re)index the job for search."""
+    conn.execute("INSERT OR REPLACE INTO job_descriptions (job_id, body) VALUES (?, ?)",
+                 (job_id, _deflate(text)))
+    conn.execute("DELETE FROM jobs_fts WHERE rowid = ?", (job_id,))
+    conn.execute("""
+        INSERT INTO jobs_fts (rowid, title, company, description)
+        SELECT id, title, company, ? FROM jobs WHERE id = ?
+    """, (text or "", job_id))
+
+
+def get_description(job_id: int) -> str:
+    """Return the full (decompressed) description of a stored job."""
+    with get_conn() as conn:
+        row = conn.execute("SELECT body FROM job_descriptions WHERE job_id = ?",
+                           (job_id,)).fetchone()
+        return _inflate(row["body"]) if row else ""
+
+
+@timed("db.update_score")
+def update_score(job_id: int, score: ScoreResult):
     with get_conn() as conn:
         conn.execute("""
             UPDATE jobs SET
                 fit_score       = ?,
                 role_match      = ?,
+                role_category   = ?,
                 matching_skills = ?,
                 missing_skills  = ?,
                 key_requirement = ?,
                 ai_summary      = ?
             WHERE id = ?
         """, (
-            score_data.get("fit_score", 0),
-            score_data.get("role_match", ""),
-            ", ".join(score_data.get("matching_skills", [])),
-            ", ".join(score_data.get("missing_skills", [])),
-            score_data.get("key_requirement", ""),
-            score_data.get("summary", ""),
+            score.fit_score, score.role_match, score.role_category,
+            ", ".join(score.matching_skills), ", ".join(score.missing_skills),
+            score.key_requirement, score.summary,
             job_id
         ))
+        row = conn.execute("SELECT date_found FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row:
+            _write_skills(conn, job_id, row["date_found"],
+                          score.matching_skills, score.missing_skills)
+            _write_scores(conn, job_id, row["date_found"], {"default": score})
+
+
+@timed("db.save_jobs")
+def save_scored_jobs(jobs: list[Job]) -> list[int]:
+    """
+    Insert scored jobs (with their skills) in one transaction. Jobs whose
+    URL is already stored are updated if their score changed (see
+    _insert_scored). Returns the new row ids (and sets job.id / job.date_found).
+    """
+    if not jobs:
+        return []
+    with get_conn() as conn:
+        return _insert_scored(conn, jobs)
+
+
+def save_run_jobs(kept: list[Job], rejected: list[Job], ruleset: str) -> list[int]:
+    """save_scored_jobs(kept) + save_rejected(rejected, ruleset) in one transaction."""
+    with get_conn() as conn:
+        ids = _insert_scored(conn, kept)
+        _upsert_rejected(conn, rejected, ruleset)
+    return ids
+
+
+# Columns a re-scored job may change; date_found and the tracking columns
+# (status, notified, notes, labelled_at) stay as first stored.
+_RESCORED = ("title", "company", "location", "employment_type", "posted_date",
+             "exp_min", "exp_max", "city", "region", "work_mode", "canonical_role",
+             "fit_score", "role_match", "role_category", "matching_skills", "missing_skills",
+             "key_requirement", "ai_summary")
+_UPSERT_SET     = ", ".join(f"{c} = excluded.{c}" for c in _RESCORED)
+_UPSERT_CHANGED = " OR ".join(f"{c} IS NOT excluded.{c}" for c in _RESCORED)
+
+
+def _insert_scored(conn, jobs: list[Job]) -> list[int]:
+    """
+    Insert new jobs; a job whose URL is already stored is updated in place
+    when its newest score differs (same posting, seen again by another
+    search, shard or ruleset). Returns the ids of the rows inserted.
+    """
+    today = datetime.today().strftime("%Y-%m-%d")
+    ids = []
+    for job in jobs:
+        row = job.to_row()
+        stored = conn.execute("SELECT id, date_found FROM jobs WHERE url = ?", (row["url"],)).fetchone()
+        cur = conn.execute(f"""
+            INSERT INTO jobs
+              (title, company, location, url, platform, employment_type,
+               description, posted_date, date_found, exp_min, exp_max,
+               city, region, work_mode, canonical_role,
+               fit_score, role_match, role_category, matching_skills, missing_skills,
+               key_requirement, ai_summary)
+            VALUES (:title, :company, :location, :url, :platform, :employment_type,
+                    NULL, :posted_date, :date_found, :exp_min, :exp_max,
+                    :city, :region, :work_mode, :canonical_role,
+                    :fit_score, :role_match, :role_category, :matching_skills, :missing_skills,
+                    :key_requirement, :ai_summary)
+            ON CONFLICT (url) DO UPDATE SET {_UPSERT_SET}
+            WHERE {_UPSERT_CHANGED}
+        """, {**row, "date_found": today})
+        if cur.rowcount != 1:
+            continue     # stored, and nothing changed
+        job_id, date_found = (stored["id"], stored["date_found"]) if stored else (cur.lastrowid, today)
+        score = job.score or ScoreResult()
+        _write_description(conn, job_id, job.description)
+        _write_skills(conn, job_id, date_found, score.matching_skills, score.missing_skills)
+        _write_scores(conn, job_id, date_found, job.scores or {"default": score})
+        job.id, job.date_found = job_id, date_found
+        if not stored:
+            ids.append(job_id)
+    return ids
+
+
+# ── TITLE → ROLE MEMO ───────────────────────────────────────────
+
+def get_title_roles(taxonomy: int = TAXONOMY_VERSION) -> dict[str, str]:
+    """{normalized title: canonical role} classified under `taxonomy`, for roles.preload()."""
+    with get_conn() as conn:
+        return dict(conn.execute("SELECT title, role FROM title_roles WHERE taxonomy = ?",
+                                 (taxonomy,)).fetchall())
+
+
+def save_title_roles(mapping: dict[str, str], taxonomy: int = TAXONOMY_VERSION) -> int:
+    """Store titles classified this run (roles.drain_new())."""
+    if not mapping:
+        return 0
+    with get_conn() as conn:
+        conn.executemany("INSERT OR REPLACE INTO title_roles (title, role, taxonomy) VALUES (?, ?, ?)",
+                         [(t, r, taxonomy) for t, r in mapping.items()])
+    return len(mapping)
+
+
+# ── OUTCOME LABELS / LEARNED WEIGHTS ────────────────────────────
+
+def label_job(job_id: int, outcome: str, note: str | None = None) -> bool:
+    """Record what happened with a job (applied / interview / rejected / ignored)."""
+    with get_conn() as conn:
+        cur = conn.execute("""
+            UPDATE jobs SET status = ?, notes = COALESCE(?, notes), labelled_at = ?
+            WHERE id = ?
+        """, (outcome.capitalize(), note, datetime.now().isoformat(), job_id))
+        return cur.rowcount == 1
+
+
+def get_labelled_jobs(since: str = "") -> list[tuple[Job, str]]:
+    """(job with description, labelled_at) for jobs labelled after `since`, oldest first."""
+    with get_conn() as conn:
+        rows = conn.execute("""
+            SELECT j.*, inflate(d.body) AS _description
+            FROM jobs j LEFT JOIN job_descriptions d ON d.job_id = j.id
+            WHERE j.labelled_at > ?
+            ORDER BY j.labelled_at
+        """, (since,)).fetchall()
+    out = []
+    for r in rows:
+        row = dict(r)
+        row["description"] = row.pop("_description") or ""
+        out.append((Job.from_row(row), row["labelled_at"]))
+    return out
+
+
+def save_score_model(model: dict) -> int:
+    """Store a trained model (scorer/learn.py); returns its id."""
+    with get_conn() as conn:
+        cur = conn.execute("""
+            INSERT INTO score_model (trained_at, generation, features, weights, bias, prior,
+                                     n_labels, accuracy, labelled_through)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (datetime.now().isoformat(), model.get("generation") or 0,
+              json.dumps(model["features"]), json.dumps(model["weights"]), model["bias"],
+              model["prior"], model["n_labels"], model.get("accuracy"), model["labelled_through"]))
+        if not model.get("generation"):
+            # A batch fit starts its own generation.
+            conn.execute("UPDATE score_model SET generation = id WHERE id = ?", (cur.lastrowid,))
+        return cur.lastrowid
+
+
+def get_score_model() -> dict | None:
+    """The newest trained model, or None if `main.py train` never ran."""
+    with get_conn() as conn:
+        row = conn.execute("SELECT * FROM score_model ORDER BY id DESC LIMIT 1").fetchone()
+    if row is None:
+        return None
+    return {**dict(row), "features": json.loads(row["features"]),
+            "weights": json.loads(row["weights"])}
+
+
+# ── REJECTED-JOBS LEDGER ────────────────────────────────────────
+
+def _ledger_row(job: Job, ruleset: str, now: str) -> tuple:
+    scores, best = {}, 0
+    for pid, s in (job.scores or {"default": job.score or ScoreResult()}).items():
+        b = s.breakdown or {}
+        scores[pid] = {"fit_score": s.fit_score, **b}
+        best = max(best, b.get("upper_bound", s.fit_score))
+    payload = {k: v for k, v in job.to_dict().items() if k not in ("score", "scores", "id")}
+    return (job.key, ruleset, best, json.dumps(scores),
+            zlib.compress(json.dumps(payload).encode("utf-8"), 9), now, now)
 
 
-def get_todays_shortlist(min_score: int = 6) -> list:
+@timed("db.save_rejected")
+def save_rejected(jobs: list[Job], ruleset: str) -> int:
+    """Record scored-but-not-kept jobs in the ledger (first_seen survives re-scoring)."""
+    if not jobs:
+        return 0
+    with get_conn() as conn:
+        _upsert_rejected(conn, jobs, ruleset)
+    return len(jobs)
+
+
+def _upsert_rejected(conn, jobs: list[Job], ruleset: str):
+    now = datetime.now().isoformat()
+    conn.executemany("""
+        INSERT INTO rejected_jobs (job_key, ruleset, max_score, scores, job, first_seen, scored_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (job_key) DO UPDATE SET
+            ruleset = excluded.ruleset, max_score = excluded.max_score,
+            scores = excluded.scores, job = excluded.job, scored_at = excluded.scored_at
+    """, [_ledger_row(j, ruleset, now) for j in jobs])
+
+
+def get_rejected_keys(ruleset: str) -> set[str]:
+    """Keys of jobs rejected under `ruleset` — safe to skip without rescoring."""
+    with get_conn() as conn:
+        return {r[0] for r in conn.execute(
+            "SELECT job_key FROM rejected_jobs WHERE ruleset = ?", (ruleset,))}
+
+
+def get_promotable(ruleset: str, thresholds: dict[str, int]) -> list[Job]:
+    """
+    Ledger jobs some profile might keep now (after its threshold was lowered):
+    that profile's stored fit_score — or upper_bound, if the score was pruned —
+    reaches its own entry in `thresholds` ({profile: score_threshold}).
+    max_score only narrows the candidates through the index.
+    """
+    if not thresholds:
+        return []
+    with get_conn() as conn:
+        rows = conn.execute("""
+            SELECT scores, job FROM rejected_jobs WHERE ruleset = ? AND max_score >= ?
+        """, (ruleset, min(thresholds.values()))).fetchall()
+    promotable = []
+    for r in rows:
+        scores = json.loads(r["scores"])
+        if any(pid in scores and scores[pid].get("upper_bound", scores[pid]["fit_score"]) >= t
+               for pid, t in thresholds.items()):
+            promotable.append(Job.from_dict(json.loads(zlib.decompress(r["job"]))))
+    return promotable
+
+
+def delete_rejected(keys: list[str]):
+    with get_conn() as conn:
+        conn.executemany("DELETE FROM rejected_jobs WHERE job_key = ?", [(k,) for k in keys])
+
+
+def get_ledger_summary(ruleset: str) -> dict:
+    with get_conn() as conn:
+        r = conn.execute("""
+            SELECT COUNT(*) AS total, COALESCE(SUM(ruleset = ?), 0) AS current
+            FROM rejected_jobs
+        """, (ruleset,)).fetchone()
+    return {"total": r["total"], "current": r["current"]}
+
+
+def _write_scores(conn, job_id: int, date_found: str, scores: dict[str, ScoreResult]):
+    """Store {profile: ScoreResult} for one job (replacing earlier scores, keeping notified)."""
+    conn.executemany("""
+        INSERT INTO job_scores
+            (job_id, profile, fit_score, role_match, role_category, matching_skills,
+             missing_skills, ai_summary, date_found)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (job_id, profile) DO UPDATE SET
+            fit_score = excluded.fit_score, role_match = excluded.role_match,
+            role_category = excluded.role_category,
+            matching_skills = excluded.matching_skills, missing_skills = excluded.missing_skills,
+            ai_summary = excluded.ai_summary, date_found = excluded.date_found
+    """, [(job_id, profile, s.fit_score, s.role_match, s.role_category,
+           ", ".join(s.matching_skills), ", ".join(s.missing_skills),
+           s.summary, date_found)
+          for profile, s in scores.items()])
+
+
+def get_profile_shortlist(profile: str, min_score: int = 6) -> list[Job]:
+    """Today's un-notified jobs for one profile, carrying that profile's scores."""
+    today = datetime.today().strftime("%Y-%m-%d")
+    with get_conn() as conn:
+        rows = conn.execute("""
+            SELECT j.*, s.fit_score, s.role_match, s.role_category, s.matching_skills,
+                   s.missing_skills, s.ai_summary
+            FROM job_scores s JOIN jobs j ON j.id = s.job_id
+            WHERE s.profile    = ?
+              AND s.date_found = ?
+              AND s.fit_score >= ?
+              AND s.notified   = 0
+            ORDER BY s.fit_score DESC
+        """, (profile, today, min_score)).fetchall()
+        # The later s.* columns win over the j.* columns of the same name.
+        return [Job.from_row(zip(r.keys(), tuple(r))) for r in rows]
+
+
+def get_todays_shortlist(min_score: int = 6) -> list[Job]:
     today = datetime.today().strftime("%Y-%m-%d")
     with get_conn() as conn:
         rows = conn.execute("""
@@ -115,7 +973,7 @@ def get_todays_shortlist(min_score: int = 6) -> list:
               AND notified   = 0
             ORDER BY fit_score DESC
         """, (today, min_score)).fetchall()
-        return [dict(r) for r in rows]
+        return [Job.from_row(r) for r in rows]
 
 
 def mark_notified(job_ids: list[int]):
@@ -126,26 +984,485 @@ def mark_notified(job_ids: list[int]):
         conn.execute(f"UPDATE jobs SET notified=1 WHERE id IN ({placeholders})", job_ids)
 
 
-def log_run(jobs_found, jobs_scored, jobs_kept, email_sent=0):
+# ── OUTBOX ──────────────────────────────────────────────────────
+# Rendered digests are queued here before sending. A job is marked notified
+# only once every queued digest that includes it has been sent, so a failed
+# send is retried from the outbox instead of re-running the whole pipeline.
+# Instant alerts (kind 'alert') go through the same queue but leave the
+# notified flags alone — the daily digest is what "notified" tracks.
+
+@timed("db.enqueue")
+def enqueue_messages(items: list[dict]) -> list[int]:
+    """Queue messages: [{"recipient", "subject", "message", "job_ids", "profile", "kind"}]. Returns ids."""
+    now = datetime.now().isoformat()
+    ids = []
+    with get_conn() as conn:
+        for item in items:
+            cur = conn.execute("""
+                INSERT INTO outbox (recipient, subject, message, next_attempt_at, profile, kind)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (item["recipient"], item.get("subject", ""),
+                  zlib.compress(item["message"].encode("utf-8")), now,
+                  item.get("profile", "default"), item.get("kind", "digest")))
+            conn.executemany("INSERT OR IGNORE INTO outbox_jobs (outbox_id, job_id) VALUES (?, ?)",
+                             [(cur.lastrowid, j) for j in item.get("job_ids", [])])
+            ids.append(cur.lastrowid)
+    return ids
+
+
+def get_queued_job_ids(profile: str = "default") -> set[int]:
+    """Jobs already sitting in an unsent outbox digest for `profile`."""
+    with get_conn() as conn:
+        return {r[0] for r in conn.execute("""
+            SELECT oj.job_id FROM outbox_jobs oj JOIN outbox o ON o.id = oj.outbox_id
+            WHERE o.status = 'pending' AND o.kind = 'digest' AND COALESCE(o.profile, 'default') = ?
+        """, (profile,))}
+
+
+def get_due_messages(limit: int = 100) -> list[dict]:
+    with get_conn() as conn:
+        rows = conn.execute("""
+            SELECT id, recipient, subject, message, attempts FROM outbox
+            WHERE status = 'pending' AND next_attempt_at <= ?
+            ORDER BY id LIMIT ?
+        """, (datetime.now().isoformat(), limit)).fetchall()
+    return [{**dict(r), "message": zlib.decompress(r["message"]).decode("utf-8")} for r in rows]
+
+
+@timed("db.mark_sent")
+def mark_message_sent(outbox_id: int):
+    """Mark a message sent; a digest also flags its jobs notified once no other digest pends for them."""
+    with get_conn() as conn:
+        conn.execute("UPDATE outbox SET status = 'sent', sent_at = ?, last_error = NULL WHERE id = ?",
+                     (datetime.now().isoformat(), outbox_id))
+        kind = conn.execute("SELECT kind FROM outbox WHERE id = ?", (outbox_id,)).fetchone()
+        if not kind or kind[0] != "digest":
+            return
+        conn.execute("""
+            UPDATE jobs SET notified = 1
+            WHERE id IN (SELECT job_id FROM outbox_jobs WHERE outbox_id = ?)
+              AND NOT EXISTS (
+                  SELECT 1 FROM outbox_jobs oj JOIN outbox o ON o.id = oj.outbox_id
+                  WHERE oj.job_id = jobs.id AND o.status = 'pending' AND o.kind = 'digest')
+        """, (outbox_id,))
+        conn.execute("""
+            UPDATE job_scores SET notified = 1
+            WHERE profile = (SELECT COALESCE(profile, 'default') FROM outbox WHERE id = :id)
+              AND job_id IN (SELECT job_id FROM outbox_jobs WHERE outbox_id = :id)
+              AND NOT EXISTS (
+                  SELECT 1 FROM outbox_jobs oj JOIN outbox o ON o.id = oj.outbox_id
+                  WHERE oj.job_id = job_scores.job_id AND o.status = 'pending' AND o.kind = 'digest'
+                    AND COALESCE(o.profile, 'default') = job_scores.profile)
+        """, {"id": outbox_id})
+
+
+@timed("db.mark_failed")
+def mark_message_failed(outbox_id: int, error: str, retry_at: datetime | None):
+    """Record a failed attempt; `retry_at=None` gives up on the message."""
+    with get_conn() as conn:
+        conn.execute("""
+            UPDATE outbox SET attempts = attempts + 1, last_error = ?,
+                status = ?, next_attempt_at = COALESCE(?, next_attempt_at)
+            WHERE id = ?
+        """, (error[:500], "pending" if retry_at else "failed",
+              retry_at.isoformat() if retry_at else None, outbox_id))
+
+
+def get_outbox_summary() -> dict:
+    """{"pending", "failed", "sent", "next_attempt_at"} for the outbox."""
+    with get_conn() as conn:
+        counts = dict(conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+        nxt = conn.execute("SELECT MIN(next_attempt_at) FROM outbox WHERE status = 'pending'").fetchone()[0]
+    return {"pending": counts.get("pending", 0), "failed": counts.get("failed", 0),
+            "sent": counts.get("sent", 0), "next_attempt_at": nxt}
+
+
+def purge_sent_messages(days: int = 7) -> int:
+    """Drop sent messages older than `days` — the jobs keep their notified flag."""
+    cutoff = (datetime.now() - timedelta(days=days)).isoformat()
     with get_conn() as conn:
         conn.execute("""
-            INSERT INTO run_log (run_at, jobs_found, jobs_scored, jobs_kept, email_sent)
-            VALUES (?, ?, ?, ?, ?)
-        """, (datetime.now().isoformat(), jobs_found, jobs_scored, jobs_kept, email_sent))
+            DELETE FROM outbox_jobs WHERE outbox_id IN
+                (SELECT id FROM outbox WHERE status = 'sent' AND sent_at < ?)
+        """, (cutoff,))
+        return conn.execute("DELETE FROM outbox WHERE status = 'sent' AND sent_at < ?",
+                            (cutoff,)).rowcount
+
+
+def log_run(jobs_found, jobs_scored, jobs_kept, email_sent=0,
+            run_id: str | None = None, stage_timings: dict | None = None,
+            prefilter_rejects: dict | None = None):
+    with get_conn() as conn:
+        conn.execute("""
+            INSERT INTO run_log (run_at, jobs_found, jobs_scored, jobs_kept, email_sent,
+                                 run_id, stage_timings, prefilter_rejects)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (datetime.now().isoformat(), jobs_found, jobs_scored, jobs_kept, email_sent,
+              run_id, json.dumps(stage_timings) if stage_timings else None,
+              json.dumps(prefilter_rejects) if prefilter_rejects else None))
+
+
+def save_run_metrics(run_id: str, spans: dict):
+    """Store metrics.summary() for one run."""
+    with get_conn() as conn:
+        conn.executemany("""
+            INSERT OR REPLACE INTO run_metrics (run_id, name, count, total_s, p50_s, p95_s, max_s)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, [(run_id, name, m["count"], m["total_s"], m["p50_s"], m["p95_s"], m["max_s"])
+              for name, m in spans.items()])
+
+
+def get_run_metrics(run_id: str | None = None) -> dict:
+    """Span aggregates for `run_id` (default: the latest run that recorded any)."""
+    with get_conn() as conn:
+        if run_id is None:
+            row = conn.execute("SELECT run_id FROM run_log WHERE run_id IN "
+                               "(SELECT run_id FROM run_metrics) ORDER BY id DESC LIMIT 1").fetchone()
+            run_id = row[0] if row else None
+        rows = conn.execute("SELECT * FROM run_metrics WHERE run_id = ? ORDER BY total_s DESC",
+                            (run_id,)).fetchall()
+    return {r["name"]: {k: r[k] for k in ("count", "total_s", "p50_s", "p95_s", "max_s")}
+            for r in rows}
 
 
 def get_stats() -> dict:
+    """Headline numbers, read from the trigger-maintained stats tables."""
+    today = datetime.today().strftime("%Y-%m-%d")
     with get_conn() as conn:
-        total   = conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
-        today   = conn.execute("SELECT COUNT(*) FROM jobs WHERE date_found=?",
-                               (datetime.today().strftime("%Y-%m-%d"),)).fetchone()[0]
-        avg     = conn.execute("SELECT AVG(fit_score) FROM jobs WHERE fit_score > 0").fetchone()[0]
-        by_plat = conn.execute("SELECT platform, COUNT(*) FROM jobs GROUP BY platform").fetchall()
-        return {
-            "total": total, "today": today,
-            "avg_score": round(avg or 0, 1),
-            "by_platform": {r[0]: r[1] for r in by_plat}
-        }
+        plats = conn.execute(
+            "SELECT platform, jobs, scored, score_sum FROM stats_platform WHERE jobs > 0"
+        ).fetchall()
+        today_n = conn.execute("SELECT COALESCE(SUM(jobs), 0) FROM stats_daily WHERE day = ?",
+                               (today,)).fetchone()[0]
+        regions = conn.execute(
+            "SELECT region, jobs AS n FROM stats_region WHERE jobs > 0 ORDER BY n DESC"
+        ).fetchall()
+        roles = conn.execute(
+            "SELECT role, jobs AS n FROM stats_role WHERE jobs > 0 ORDER BY n DESC"
+        ).fetchall()
+    scored = sum(r["scored"] for r in plats)
+    return {
+        "total": sum(r["jobs"] for r in plats), "today": today_n,
+        "avg_score": round(sum(r["score_sum"] for r in plats) / scored, 1) if scored else 0,
+        "by_platform": {r["platform"]: r["jobs"] for r in plats},
+        "by_region": {r["region"]: r["n"] for r in regions},
+        "by_role": {r["role"]: r["n"] for r in roles},
+    }
+
+
+def get_prefilter_rejects(days: int = 7) -> dict:
+    """{source: {reason: n}} summed over the runs of the last `days` days."""
+    totals = {}
+    with get_conn() as conn:
+        for (blob,) in conn.execute("""
+            SELECT prefilter_rejects FROM run_log
+            WHERE run_at >= ? AND prefilter_rejects IS NOT NULL
+        """, (_since(days),)):
+            for source, reasons in json.loads(blob).items():
+                for reason, n in reasons.items():
+                    totals.setdefault(source, {}).setdefault(reason, 0)
+                    totals[source][reason] += n
+    return totals
+
+
+def get_trend(days: int = 7) -> list[dict]:
+    """
+    Per-day history for the last `days` days, oldest first:
+    [{"day", "found", "kept", "scores": {fit_score: n}}].
+    `found` is what the scrapers returned (run_log); `kept` is what was stored.
+    """
+    since = _since(days - 1)
+    trend = {}
+    with get_conn() as conn:
+        for day, found in conn.execute("""
+            SELECT substr(run_at, 1, 10), SUM(jobs_found) FROM run_log
+            WHERE run_at >= ? GROUP BY 1
+        """, (since,)):
+            trend.setdefault(day, {"day": day, "found": 0, "kept": 0, "scores": {}})["found"] = found
+        for day, score, n in conn.execute("""
+            SELECT day, score, SUM(jobs) FROM stats_daily
+            WHERE day >= ? GROUP BY day, score HAVING SUM(jobs) > 0
+        """, (since,)):
+            row = trend.setdefault(day, {"day": day, "found": 0, "kept": 0, "scores": {}})
+            row["kept"] += n
+            row["scores"][score] = n
+    return [trend[d] for d in sorted(trend)]
+
+
+# ── SKILL ANALYTICS ─────────────────────────────────────────────
+# All of these are served by idx_job_skills_gap / idx_job_skills_skill.
+_PERIODS = {
+    "day":   "js.date_found",
+    "week":  "strftime('%Y-W%W', js.date_found)",
+    "month": "substr(js.date_found, 1, 7)",
+}
+
+
+def _since(days: int) -> str:
+    return (datetime.today() - timedelta(days=days)).strftime("%Y-%m-%d")
+
+
+def get_skill_gaps(days: int = 30, kind: str = "missing", limit: int = 10) -> list[tuple]:
+    """Most frequent missing (or matching) skills over the last `days` days."""
+    with get_conn() as conn:
+        rows = conn.execute("""
+            SELECT s.name, COUNT(*) AS n
+            FROM job_skills js JOIN skills s ON s.id = js.skill_id
+            WHERE js.kind = ? AND js.date_found >= ?
+            GROUP BY js.skill_id
+            ORDER BY n DESC, s.name
+            LIMIT ?
+        """, (kind, _since(days), limit)).fetchall()
+        return [(r[0], r[1]) for r in rows]
+
+
+def get_skill_gap_trend(days: int = 90, kind: str = "missing",
+                        period: str = "month", skill: str | None = None) -> dict:
+    """
+    Skill frequency per period over the last `days` days.
+    Returns {period: {skill: count}}, oldest period first.
+    """
+    bucket = _PERIODS[period]
+    sql = f"""
+        SELECT {bucket} AS period, s.name, COUNT(*)
+        FROM job_skills js JOIN skills s ON s.id = js.skill_id
+        WHERE js.kind = ? AND js.date_found >= ?
+    """
+    params = [kind, _since(days)]
+    if skill:
+        sql += " AND js.skill_id = (SELECT id FROM skills WHERE name = ?)"
+        params.append(skill)
+    sql += " GROUP BY period, js.skill_id ORDER BY period, COUNT(*) DESC"
+
+    trend = {}
+    with get_conn() as conn:
+        for period_key, name, n in conn.execute(sql, params):
+            trend.setdefault(period_key, {})[name] = n
+    return trend
+
+
+
+# ── FULL-TEXT SEARCH ────────────────────────────────────────────
+# bm25 column weights: a hit in the title counts most, then company.
+_FTS_RANK = "bm25(jobs_fts, 10.0, 5.0, 1.0)"
+
+
+def _quote_fts(query: str) -> str:
+    """Turn free text into an FTS5 query of quoted terms (implicit AND)."""
+    return " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+
+# Job range [exp_min, exp_max] overlaps the wanted [lo, hi]; open-ended asks
+# (exp_max NULL) are judged by their minimum, as in scorer.engine.experience_fit.
+_EXP_OVERLAP = "j.exp_min <= ? AND COALESCE(j.exp_max, j.exp_min) >= ?"
+
+
+def search_jobs(query: str, min_score: int | None = None, platform: str | None = None,
+                since: str | None = None, until: str | None = None,
+                experience: tuple[int, int] | None = None, location: str | None = None,
+                role: str | None = None, limit: int = 20, after: tuple | None = None) -> list[dict]:
+    """
+    Ranked full-text search over title, company and description.
+
+    `query` accepts FTS5 syntax (e.g. 'hubspot company:deloitte'); if it does not
+    parse, every word is matched literally instead. `experience=(lo, hi)` keeps
+    jobs whose stated range overlaps lo–hi years; `location` ("Gurgaon", "NCR",
+    "remote") is resolved to its canonical city or region, and `role` ("BDE",
+    "product manager") to its canonical role. Results are ordered best
+    first. Pass the last row's (rank, id) as `after` to fetch the next page.
+    """
+    sql = f"""
+        SELECT j.id, j.title, j.company, j.location, j.platform, j.url,
+               j.fit_score, j.exp_min, j.exp_max, j.date_found, {_FTS_RANK} AS rank
+        FROM jobs_fts JOIN jobs j ON j.id = jobs_fts.rowid
+        WHERE jobs_fts MATCH ?
+    """
+    params = []
+    if min_score is not None:
+        sql += " AND j.fit_score >= ?"
+        params.append(min_score)
+    if experience:
+        sql += f" AND {_EXP_OVERLAP}"
+        params.extend((experience[1], experience[0]))
+    if location:
+        where, value = _place_filter(location)
+        sql += f" AND {where}"
+        params.append(value)
+    if role:
+        sql += " AND j.canonical_role = ?"
+        params.append(classify_title(role))
+    if platform:
+        sql += " AND j.platform = ? COLLATE NOCASE"
+        params.append(platform)
+    if since:
+        sql += " AND j.date_found >= ?"
+        params.append(since)
+    if until:
+        sql += " AND j.date_found <= ?"
+        params.append(until)
+    if after:
+        sql += f" AND ({_FTS_RANK}, j.id) > (?, ?)"
+        params.extend(after)
+    sql += " ORDER BY rank, j.id LIMIT ?"
+    params.append(limit)
+
+    with get_conn() as conn:
+        try:
+            rows = conn.execute(sql, [query] + params).fetchall()
+        except sqlite3.OperationalError:
+            rows = conn.execute(sql, [_quote_fts(query)] + params).fetchall()
+        return [dict(r) for r in rows]
+
+
+def _place_filter(location: str) -> tuple[str, str]:
+    """SQL condition + value for a user-typed location, on the indexed canonical columns."""
+    p = resolve_location(location)
+    if p.city:
+        return "j.city = ?", p.city
+    if p.region and p.region != "Remote":
+        return "j.region = ?", p.region
+    if p.work_mode:
+        return "j.work_mode = ?", p.work_mode
+    return "j.location LIKE '%' || ? || '%'", location
+
+
+def get_jobs_by_experience(lo: int, hi: int, min_score: int | None = None,
+                           since: str | None = None, limit: int = 50) -> list[dict]:
+    """Stored jobs whose experience range overlaps lo–hi years (idx_jobs_experience), best first."""
+    sql = f"""
+        SELECT j.id, j.title, j.company, j.location, j.platform, j.url,
+               j.fit_score, j.exp_min, j.exp_max, j.date_found
+        FROM jobs j WHERE {_EXP_OVERLAP}
+    """
+    params = [hi, lo]
+    if min_score is not None:
+        sql += " AND j.fit_score >= ?"
+        params.append(min_score)
+    if since:
+        sql += " AND j.date_found >= ?"
+        params.append(since)
+    sql += " ORDER BY j.fit_score DESC, j.id DESC LIMIT ?"
+    params.append(limit)
+    with get_conn() as conn:
+        return [dict(r) for r in conn.execute(sql, params)]
+
+
+
+# ── RETENTION ───────────────────────────────────────────────────
+# Jobs older than RETENTION_DAYS move to data/archive/jobs-YYYY-MM.db. A month's
+# archive stops changing once the month has aged out, so git stores it once
+# and the hot jobs.db stays roughly the size of the retention window.
+
+def _archive_path(month: str) -> str:
+    return os.path.join(ARCHIVE_DIR, f"jobs-{month}.db")
+
+
+def _ensure_archive_schema(conn):
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS arc.jobs AS SELECT * FROM main.jobs WHERE 0;
+        CREATE UNIQUE INDEX IF NOT EXISTS arc.idx_archive_jobs_id ON jobs (id);
+        CREATE TABLE IF NOT EXISTS arc.job_descriptions (
+            job_id  INTEGER PRIMARY KEY,
+            body    BLOB    NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS arc.job_skills (
+            job_id  INTEGER NOT NULL,
+            kind    TEXT    NOT NULL,
+            skill   TEXT    NOT NULL,
+            PRIMARY KEY (job_id, kind, skill)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS arc.job_scores AS SELECT * FROM main.job_scores WHERE 0;
+        CREATE UNIQUE INDEX IF NOT EXISTS arc.idx_archive_job_scores ON job_scores (job_id, profile);
+    """)
+    # Archives are copied with SELECT *, so columns added to the hot tables
+    # since the archive was created (e.g. exp_min / exp_max) are added here too.
+    for table in ("jobs", "job_scores"):
+        have = {r[1] for r in conn.execute(f"PRAGMA arc.table_info({table})")}
+        for r in conn.execute(f"PRAGMA main.table_info({table})"):
+            if r[1] not in have:
+                conn.execute(f"ALTER TABLE arc.{table} ADD COLUMN {r[1]} {r[2]}")
+
+
+@timed("db.archive")
+def archive_old_jobs(max_age_days: int = RETENTION_DAYS) -> dict:
+    """Move jobs found more than `max_age_days` ago into monthly archive DBs."""
+    cutoff = _since(max_age_days)
+    moved = {}
+    with get_conn() as conn:
+        months = [r[0] for r in conn.execute("""
+            SELECT DISTINCT substr(date_found, 1, 7) FROM jobs
+            WHERE date_found < ? AND date_found != ''
+        """, (cutoff,))]
+
+    for month in months:
+        os.makedirs(ARCHIVE_DIR, exist_ok=True)
+        conn = get_conn()
+        try:
+            conn.execute("ATTACH DATABASE ? AS arc", (_archive_path(month),))
+            _ensure_archive_schema(conn)
+            where = "date_found >= ? AND date_found < ? AND date_found < ?"
+            span  = (f"{month}-01", f"{month}-99", cutoff)
+            with conn:
+                conn.execute(f"""
+                    CREATE TEMP TABLE moving AS SELECT id FROM main.jobs WHERE {where}
+                """, span)
+                conn.execute("""
+                    INSERT OR REPLACE INTO arc.jobs SELECT * FROM main.jobs
+                    WHERE id IN (SELECT id FROM temp.moving)
+                """)
+                conn.execute("""
+                    INSERT OR REPLACE INTO arc.job_descriptions
+                    SELECT job_id, body FROM main.job_descriptions
+                    WHERE job_id IN (SELECT id FROM temp.moving)
+                """)
+                conn.execute("""
+                    INSERT OR REPLACE INTO arc.job_skills
+                    SELECT js.job_id, js.kind, s.name
+                    FROM main.job_skills js JOIN main.skills s ON s.id = js.skill_id
+                    WHERE js.job_id IN (SELECT id FROM temp.moving)
+                """)
+                conn.execute("""
+                    INSERT OR REPLACE INTO arc.job_scores SELECT * FROM main.job_scores
+                    WHERE job_id IN (SELECT id FROM temp.moving)
+                """)
+                n = conn.execute("DELETE FROM main.jobs WHERE id IN (SELECT id FROM temp.moving)").rowcount
+                conn.execute("DROP TABLE temp.moving")
+            conn.execute("VACUUM arc")
+            conn.execute("DETACH DATABASE arc")
+            moved[month] = n
+        finally:
+            conn.close()
+    return moved
+
+
+def apply_retention(max_age_days: int = RETENTION_DAYS) -> dict:
+    """
+    Archive old jobs, then give the freed pages back to the filesystem.
+    Returns {"archived": {month: n}, "size_before": bytes, "size_after": bytes}.
+    """
+    size_before = os.path.getsize(DB_PATH) if os.path.exists(DB_PATH) else 0
+    moved = archive_old_jobs(max_age_days)
+    with get_conn() as conn:
+        # A ledger row not re-scored for this long belongs to a posting long gone.
+        conn.execute("DELETE FROM rejected_jobs WHERE scored_at < ?", (_since(max_age_days),))
+
+    conn = get_conn()
+    try:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            # One-off: switching an existing file to incremental mode needs a full VACUUM.
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+        else:
+            # Frees one page per sqlite3_step; executescript steps it to completion.
+            conn.executescript("PRAGMA incremental_vacuum;")
+    finally:
+        conn.close()
+
+    size_after = os.path.getsize(DB_PATH)
+    if moved:
+        print(f"[DB] Archived {sum(moved.values())} old jobs "
+              f"({', '.join(f'{m}: {n}' for m, n in moved.items())}).")
+    return {"archived": moved, "size_before": size_before, "size_after": size_after}
 
 
 if __name__ == "__main__":
@@ -0,0 +1,231 @@
+"""
+exporter.py — Stream job history out of SQLite for notebooks
+
+Writes `jobs` and `run_log` in fixed-size chunks, so memory stays flat no
+matter how big the history gets. Parquet / Arrow IPC need pyarrow
+(`pip install pyarrow`); without it everything falls back to CSV.
+
+Incremental mode exports the rows that changed since the last export of the
+same table + format (tracked in the export_state table) into a new file.
+For `jobs` the watermark is jobs.row_version, which every insert or update
+bumps, so re-scored, labelled and notified jobs are exported again: read the
+files in order and keep the last row per id. Deleted (archived) jobs are not
+exported as deletions. run_log is append-only and keys on its id.
+"""
+import csv
+import os
+from datetime import date, datetime
+
+from config import EXPORT_DIR
+from database import get_conn
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:          # optional dependency
+    pa = pq = None
+
+FORMATS    = ("parquet", "arrow", "csv")
+EXTENSIONS = {"parquet": "parquet", "arrow": "arrows", "csv": "csv"}
+
+# (column, SQL expression, arrow type name). Types are resolved lazily so the
+# module imports fine without pyarrow.
+TABLES = {
+    "jobs": {
+        "from": "jobs j LEFT JOIN job_descriptions d ON d.job_id = j.id",
+        "watermark": "j.row_version",
+        "columns": [
+            ("id",              "j.id",              "int64"),
+            ("title",           "j.title",           "string"),
+            ("company",         "j.company",         "string"),
+            ("location",        "j.location",        "string"),
+            ("url",             "j.url",             "string"),
+            ("platform",        "j.platform",        "category"),
+            ("employment_type", "j.employment_type", "category"),
+            ("description",     "inflate(d.body)",   "string"),
+            ("posted_date",     "j.posted_date",     "string"),   # raw, per-source format
+            ("exp_min",         "j.exp_min",         "int8"),
+            ("exp_max",         "j.exp_max",         "int8"),
+            ("city",            "j.city",            "category"),
+            ("region",          "j.region",          "category"),
+            ("work_mode",       "j.work_mode",       "category"),
+            ("canonical_role",  "j.canonical_role",  "category"),
+            ("fit_score",       "j.fit_score",       "int8"),
+            ("role_match",      "j.role_match",      "category"),
+            ("matching_skills", "j.matching_skills", "string"),
+            ("missing_skills",  "j.missing_skills",  "string"),
+            ("key_requirement", "j.key_requirement", "string"),
+            ("ai_summary",      "j.ai_summary",      "string"),
+            ("date_found",      "j.date_found",      "date"),
+            ("status",          "j.status",          "category"),
+            ("notified",        "j.notified",        "bool"),
+            ("notes",           "j.notes",           "string"),
+            ("created_at",      "j.created_at",      "timestamp"),
+        ],
+    },
+    "run_log": {
+        "from": "run_log",
+        "watermark": "id",
+        "columns": [
+            ("id",          "id",          "int64"),
+            ("run_at",      "run_at",      "timestamp"),
+            ("jobs_found",  "jobs_found",  "int32"),
+            ("jobs_scored", "jobs_scored", "int32"),
+            ("jobs_kept",   "jobs_kept",   "int32"),
+            ("email_sent",  "email_sent",  "bool"),
+            ("run_id",        "run_id",        "string"),
+            ("stage_timings", "stage_timings", "string"),   # JSON {stage: seconds}
+            ("prefilter_rejects", "prefilter_rejects", "string"),   # JSON {source: {reason: n}}
+        ],
+    },
+}
+
+
+def _parse_date(value):
+    return date.fromisoformat(value[:10]) if value else None
+
+
+def _parse_timestamp(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+def _parse_bool(value):
+    return None if value is None else bool(value)
+
+
+_CONVERTERS = {"date": _parse_date, "timestamp": _parse_timestamp, "bool": _parse_bool}
+
+
+def _arrow_type(kind: str):
+    return {
+        "int64": pa.int64(), "int32": pa.int32(), "int8": pa.int8(),
+        "string": pa.string(), "category": pa.dictionary(pa.int32(), pa.string()),
+        "date": pa.date32(), "timestamp": pa.timestamp("us"), "bool": pa.bool_(),
+    }[kind]
+
+
+# ── SINKS ───────────────────────────────────────────────────────
+
+class _CsvSink:
+    def __init__(self, path, columns):
+        self._f = open(path, "w", newline="", encoding="utf-8")
+        self._w = csv.writer(self._f)
+        self._w.writerow([c[0] for c in columns])
+
+    def write(self, rows):
+        self._w.writerows(rows)
+
+    def close(self):
+        self._f.close()
+
+
+class _ArrowSink:
+    def __init__(self, path, columns, fmt):
+        self._columns = columns
+        self._schema = pa.schema([(name, _arrow_type(kind)) for name, _, kind in columns])
+        if fmt == "parquet":
+            self._writer = pq.ParquetWriter(path, self._schema, compression="zstd")
+        else:
+            # Stream format: each batch may carry its own dictionary for the
+            # category columns, which the IPC *file* format does not allow.
+            self._writer = pa.ipc.new_stream(path, self._schema)
+
+    def write(self, rows):
+        arrays = []
+        for i, (name, _, kind) in enumerate(self._columns):
+            values = [r[i] for r in rows]
+            if kind in _CONVERTERS:
+                values = [_CONVERTERS[kind](v) for v in values]
+            if kind == "category":
+                arrays.append(pa.array(values, pa.string()).dictionary_encode())
+            else:
+                arrays.append(pa.array(values, _arrow_type(kind)))
+        self._writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+# ── EXPORT ──────────────────────────────────────────────────────
+
+def get_watermark(table: str, fmt: str) -> int:
+    with get_conn() as conn:
+        row = conn.execute("SELECT last_id FROM export_state WHERE target = ?",
+                           (f"{table}:{fmt}",)).fetchone()
+        return row[0] if row else 0
+
+
+def _set_watermark(table: str, fmt: str, last_id: int):
+    with get_conn() as conn:
+        conn.execute("""
+            INSERT INTO export_state (target, last_id, exported_at) VALUES (?, ?, ?)
+            ON CONFLICT (target) DO UPDATE SET
+                last_id = excluded.last_id, exported_at = excluded.exported_at
+        """, (f"{table}:{fmt}", last_id, datetime.now().isoformat()))
+
+
+def export_table(table: str, fmt: str = "parquet", out_dir: str = EXPORT_DIR,
+                 incremental: bool = False, chunk_size: int = 5000) -> dict:
+    """
+    Stream one table to `out_dir`. Returns {"path", "rows", "last_id"}, where
+    last_id is the new watermark (path is None when an incremental export
+    finds nothing new).
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if fmt != "csv" and pa is None:
+        print(f"[Export] pyarrow not installed — writing {table} as CSV instead.")
+        fmt = "csv"
+
+    spec    = TABLES[table]
+    columns = spec["columns"]
+    since   = get_watermark(table, fmt) if incremental else 0
+    mark    = spec["watermark"]
+    # The watermark rides along as the last column and is not written out.
+    sql = (f"SELECT {', '.join(expr for _, expr, _ in columns)}, {mark} FROM {spec['from']} "
+           f"WHERE {mark} > ? ORDER BY {mark}")
+
+    os.makedirs(out_dir, exist_ok=True)
+    name = f"{table}-{since + 1:08d}" if incremental else table
+    path = os.path.join(out_dir, f"{name}.{EXTENSIONS[fmt]}")
+    tmp  = path + ".part"
+
+    rows_out, last_id, sink = 0, since, None
+    conn = get_conn()
+    try:
+        cur = conn.execute(sql, (since,))
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                break
+            if sink is None:
+                sink = _CsvSink(tmp, columns) if fmt == "csv" else _ArrowSink(tmp, columns, fmt)
+            sink.write([tuple(r)[:-1] for r in rows])
+            rows_out += len(rows)
+            last_id = rows[-1][-1]
+    finally:
+        conn.close()
+        if sink is not None:
+            sink.close()
+
+    if sink is None:
+        if not incremental:
+            # Empty table: still produce a file with just the header/schema.
+            (_CsvSink(path, columns) if fmt == "csv" else _ArrowSink(path, columns, fmt)).close()
+            return {"path": path, "rows": 0, "last_id": since}
+        return {"path": None, "rows": 0, "last_id": since}
+
+    os.replace(tmp, path)
+    _set_watermark(table, fmt, last_id)
+    print(f"[Export] {table}: {rows_out} rows → {path}")
+    return {"path": path, "rows": rows_out, "last_id": last_id}
+
+
+def export_all(fmt: str = "parquet", out_dir: str = EXPORT_DIR,
+               incremental: bool = False, tables=("jobs", "run_log")) -> dict:
+    return {t: export_table(t, fmt, out_dir, incremental) for t in tables}
+
+
+if __name__ == "__main__":
+    import sys
+    print(export_all(sys.argv[1] if len(sys.argv) > 1 else "parquet"))
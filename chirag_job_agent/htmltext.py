@@ -0,0 +1,148 @@
+"""
+htmltext.py — Streaming HTML → plain-text normalizer for job descriptions
+
+Every scraper turns some HTML into description text: Indeed's RSS
+<description> is an HTML fragment, Naukri and LinkedIn cards hold a
+snippet element. html_to_text() does it in one pass over html.parser's
+tokenizer — no tree is built:
+
+    html_to_text("<p>B2B&nbsp;SaaS <b>sales</b></p><ul><li>CRM</li><li>HubSpot</li></ul>")
+    → "B2B SaaS sales CRM HubSpot"
+
+Entities are decoded by the tokenizer, whitespace is collapsed as text
+arrives, <script>/<style> bodies are dropped, block tags (<p>, <li>, <br>)
+separate words while inline tags (<b>, <span>) do not, and parsing stops
+as soon as `limit` characters are collected. element_text() applies the
+same rules to an element the scraper already selected from its card soup.
+
+    python htmltext.py --bench     # compare against BeautifulSoup(...).get_text()
+"""
+from html.parser import HTMLParser
+
+DESCRIPTION_CHARS = 2000   # stored description length (Job.description)
+
+_SKIP = frozenset({"script", "style", "noscript", "template", "head", "svg"})
+_BLOCK = frozenset({
+    "p", "div", "br", "hr", "li", "ul", "ol", "dl", "dt", "dd", "tr", "td", "th", "table",
+    "h1", "h2", "h3", "h4", "h5", "h6", "section", "article", "header", "footer",
+    "blockquote", "pre", "title",
+})
+
+
+class _Full(Exception):
+    """Raised by _Sink once `limit` characters are collected, to stop the parser."""
+
+
+class _Sink:
+    """Collects text pieces with whitespace collapsed, up to `limit` characters."""
+    __slots__ = ("parts", "size", "limit", "gap")
+
+    def __init__(self, limit: int):
+        self.parts: list[str] = []
+        self.size = 0
+        self.limit = limit
+        self.gap = False           # a word break is pending before the next piece
+
+    def add(self, text: str):
+        words = text.split()
+        if not words:
+            self.gap = self.gap or bool(text)
+            return
+        piece = " ".join(words)
+        if self.parts and (self.gap or text[0].isspace()):
+            piece = " " + piece
+        self.parts.append(piece)
+        self.size += len(piece)
+        self.gap = text[-1].isspace()
+        if self.size >= self.limit:
+            raise _Full
+
+    def text(self) -> str:
+        return "".join(self.parts)[:self.limit]
+
+
+class _Parser(HTMLParser):
+    def __init__(self, sink: _Sink):
+        super().__init__(convert_charrefs=True)
+        self.sink = sink
+        self.skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP:
+            self.skipping += 1
+        elif tag in _BLOCK:
+            self.sink.gap = True
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP:
+            self.skipping = max(0, self.skipping - 1)
+        elif tag in _BLOCK:
+            self.sink.gap = True
+
+    def handle_data(self, data):
+        if not self.skipping:
+            self.sink.add(data)
+
+
+def html_to_text(html: str | None, limit: int = DESCRIPTION_CHARS) -> str:
+    """Plain text of an HTML fragment: entities decoded, whitespace collapsed, ≤ limit chars."""
+    if not html:
+        return ""
+    if "<" not in html and "&" not in html:
+        return " ".join(html.split())[:limit]
+    sink = _Sink(limit)
+    parser = _Parser(sink)
+    try:
+        parser.feed(html)
+        parser.close()
+    except _Full:
+        pass
+    return sink.text()
+
+
+def element_text(el, limit: int = DESCRIPTION_CHARS) -> str:
+    """html_to_text() rules for a BeautifulSoup element (None → "")."""
+    if el is None:
+        return ""
+    from bs4 import NavigableString, Tag
+    sink = _Sink(limit)
+    try:
+        for node in el.descendants:
+            # Exact type: comments and <script>/<style> bodies are NavigableString subclasses.
+            if type(node) is NavigableString:
+                # Text after a block element starts a new word ("<p>a</p>b").
+                prev = node.previous_sibling
+                if isinstance(prev, Tag) and prev.name in _BLOCK:
+                    sink.gap = True
+                sink.add(node)
+            elif isinstance(node, Tag) and node.name in _BLOCK:
+                sink.gap = True
+    except _Full:
+        pass
+    return sink.text()
+
+
+def _bench(n: int = 2000):
+    import timeit
+    from bs4 import BeautifulSoup
+    item = ("<p><b>About the role</b></p><p>We are hiring a Business Development Executive "
+            "for our B2B&nbsp;SaaS team in Noida &amp; Gurugram.</p><ul>"
+            + "".join(f"<li>Own the CRM pipeline for region {i} &mdash; HubSpot, Salesforce</li>"
+                      for i in range(25))
+            + "</ul><script>track()</script><p>0&ndash;3 years&#39; experience.</p>")
+    old = lambda: BeautifulSoup(item, "html.parser").get_text(" ", strip=True)[:DESCRIPTION_CHARS]
+    new = lambda: html_to_text(item)
+    for name, fn in (("BeautifulSoup.get_text", old), ("html_to_text", new)):
+        per = min(timeit.repeat(fn, number=n, repeat=3)) / n
+        print(f"  {name:<24} {per * 1e6:8.1f} µs/item   ({len(fn())} chars)")
+
+
+if __name__ == "__main__":
+    import sys
+    if "--bench" in sys.argv:
+        _bench()
+    else:
+        for raw in sys.argv[1:] or ["<p>B2B&nbsp;SaaS <b>sales</b></p><ul><li>CRM</li><li>HubSpot</li></ul>",
+                                    "Line one<br/>line&nbsp;two <style>p{}</style>&amp; three",
+                                    "plain   text\n with  spaces"]:
+            print(f"  {raw!r:<76} → {html_to_text(raw)!r}")
@@ -0,0 +1,210 @@
+"""
+locations.py — Indian city gazetteer and canonical location resolver
+
+Scraped locations come in every shape: "Gurugram, Haryana, India",
+"Gurgaon", "Noida Sector 62", "Delhi NCR", "Bengaluru (Hybrid)",
+"Work from home". resolve_location() maps them to one Place:
+
+    resolve_location("Noida Sector 62, Uttar Pradesh")
+    → Place(city="Noida", region="Delhi NCR", work_mode=None)
+
+    resolve_location("Remote, India")
+    → Place(city=None, region="Remote", work_mode="remote")
+
+All aliases live in one character trie, so a string is resolved in a
+single left-to-right pass (longest alias per word, first place wins), and
+results are LRU-cached because the same few hundred strings repeat across
+every scrape. The jobs table stores city / region / work_mode so filters
+and --stats breakdowns use an index instead of substring tests.
+"""
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+# ── GAZETTEER ───────────────────────────────────────────────────
+# canonical city → (region, aliases). Region is the metro area where jobs are
+# posted across city lines (NCR, MMR, the Tricity), otherwise the state.
+CITIES = {
+    "Delhi":              ("Delhi NCR",   ["delhi", "new delhi", "dilli"]),
+    "Noida":              ("Delhi NCR",   ["noida"]),
+    "Greater Noida":      ("Delhi NCR",   ["greater noida"]),
+    "Gurugram":           ("Delhi NCR",   ["gurugram", "gurgaon", "ggn"]),
+    "Ghaziabad":          ("Delhi NCR",   ["ghaziabad"]),
+    "Faridabad":          ("Delhi NCR",   ["faridabad"]),
+    "Mumbai":             ("Mumbai MMR",  ["mumbai", "bombay"]),
+    "Navi Mumbai":        ("Mumbai MMR",  ["navi mumbai"]),
+    "Thane":              ("Mumbai MMR",  ["thane"]),
+    "Pune":               ("Maharashtra", ["pune", "pimpri", "hinjewadi"]),
+    "Nagpur":             ("Maharashtra", ["nagpur"]),
+    "Bengaluru":          ("Karnataka",   ["bengaluru", "bangalore", "banglore", "blr"]),
+    "Mysuru":             ("Karnataka",   ["mysuru", "mysore"]),
+    "Mangaluru":          ("Karnataka",   ["mangaluru", "mangalore"]),
+    "Hyderabad":          ("Telangana",   ["hyderabad", "secunderabad", "hitech city"]),
+    "Chennai":            ("Tamil Nadu",  ["chennai", "madras"]),
+    "Coimbatore":         ("Tamil Nadu",  ["coimbatore"]),
+    "Kolkata":            ("West Bengal", ["kolkata", "calcutta"]),
+    "Ahmedabad":          ("Gujarat",     ["ahmedabad", "gandhinagar"]),
+    "Vadodara":           ("Gujarat",     ["vadodara", "baroda"]),
+    "Surat":              ("Gujarat",     ["surat"]),
+    "Jaipur":             ("Rajasthan",   ["jaipur"]),
+    "Chandigarh":         ("Chandigarh Tricity", ["chandigarh"]),
+    "Mohali":             ("Chandigarh Tricity", ["mohali", "sas nagar"]),
+    "Panchkula":          ("Chandigarh Tricity", ["panchkula"]),
+    "Lucknow":            ("Uttar Pradesh",  ["lucknow"]),
+    "Indore":             ("Madhya Pradesh", ["indore"]),
+    "Bhopal":             ("Madhya Pradesh", ["bhopal"]),
+    "Kochi":              ("Kerala",      ["kochi", "cochin", "ernakulam"]),
+    "Thiruvananthapuram": ("Kerala",      ["thiruvananthapuram", "trivandrum"]),
+    "Bhubaneswar":        ("Odisha",      ["bhubaneswar"]),
+    "Visakhapatnam":      ("Andhra Pradesh", ["visakhapatnam", "vizag"]),
+    "Dehradun":           ("Uttarakhand", ["dehradun"]),
+    "Patna":              ("Bihar",       ["patna"]),
+    "Goa":                ("Goa",         ["goa", "panaji"]),
+}
+
+# Region-only mentions (no city): metro areas and states.
+REGIONS = {
+    "Delhi NCR":      ["delhi ncr", "ncr", "delhi / ncr", "national capital region", "delhi ncr region"],
+    "Mumbai MMR":     ["mmr", "mumbai metropolitan region"],
+    "Haryana":        ["haryana"],
+    "Uttar Pradesh":  ["uttar pradesh"],
+    "Maharashtra":    ["maharashtra"],
+    "Karnataka":      ["karnataka"],
+    "Telangana":      ["telangana"],
+    "Tamil Nadu":     ["tamil nadu", "tamilnadu"],
+    "West Bengal":    ["west bengal"],
+    "Gujarat":        ["gujarat"],
+    "Rajasthan":      ["rajasthan"],
+    "Punjab":         ["punjab"],
+    "Madhya Pradesh": ["madhya pradesh"],
+    "Kerala":         ["kerala"],
+    "Odisha":         ["odisha", "orissa"],
+    "Andhra Pradesh": ["andhra pradesh"],
+    "Uttarakhand":    ["uttarakhand"],
+    "Bihar":          ["bihar"],
+}
+
+# State codes that are also ordinary words ("Follow Up") only count after a
+# comma, as in "Lucknow, UP" — resolve_location spells them out first.
+STATE_CODES = {"up": "Uttar Pradesh"}
+_STATE_CODE_RE = re.compile(r",\s*(up|u\.p\.?)(?=\s*(?:[,(/]|$))", re.IGNORECASE)
+
+WORK_MODES = {
+    "remote": ["remote", "work from home", "wfh", "anywhere in india", "fully remote"],
+    "hybrid": ["hybrid"],
+    "onsite": ["on site", "onsite", "work from office", "wfo", "in office"],
+}
+
+
+@dataclass(frozen=True, slots=True)
+class Place:
+    city:      str | None = None
+    region:    str | None = None
+    work_mode: str | None = None     # "remote" | "hybrid" | "onsite" | None (not stated)
+
+    def __bool__(self):
+        return bool(self.city or self.region or self.work_mode)
+
+
+# ── TRIE ────────────────────────────────────────────────────────
+
+_END = ""   # trie key holding the value of an alias that ends at this node
+
+
+def _normalize(text: str) -> str:
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", (text or "").lower()).split())
+
+
+def _build_trie() -> dict:
+    root = {}
+    entries = [(alias, ("place", city, region))
+               for city, (region, aliases) in CITIES.items() for alias in aliases]
+    entries += [(alias, ("place", None, region))
+                for region, aliases in REGIONS.items() for alias in aliases]
+    entries += [(alias, ("mode", mode)) for mode, aliases in WORK_MODES.items() for alias in aliases]
+    for alias, value in entries:
+        node = root
+        for ch in _normalize(alias):
+            node = node.setdefault(ch, {})
+        node[_END] = value
+    return root
+
+
+_TRIE = _build_trie()
+
+
+def _matches(text: str):
+    """Yield (value) for the longest alias starting at each word of `text`."""
+    i, n = 0, len(text)
+    while i < n:
+        node, hit, end, j = _TRIE, None, i, i
+        while j < n and text[j] in node:
+            node = node[text[j]]
+            j += 1
+            # Only whole words: "pune" must not match inside "punekar".
+            if _END in node and (j == n or text[j] == " "):
+                hit, end = node[_END], j
+        if hit:
+            yield hit
+            i = end + 1
+        else:
+            nxt = text.find(" ", i)
+            if nxt < 0:
+                break
+            i = nxt + 1
+
+
+# ── RESOLVER ────────────────────────────────────────────────────
+
+@lru_cache(maxsize=4096)
+def resolve_location(raw: str) -> Place:
+    """Canonical Place for a raw location string; Place() when nothing is recognised."""
+    city = region = mode = None
+    raw = _STATE_CODE_RE.sub(lambda m: ", " + STATE_CODES[m.group(1).lower().replace(".", "")], raw or "")
+    for hit in _matches(_normalize(raw)):
+        if hit[0] == "mode":
+            # "Remote" beats "Hybrid" beats "On-site" when a listing names several.
+            if mode is None or list(WORK_MODES).index(hit[1]) < list(WORK_MODES).index(mode):
+                mode = hit[1]
+        elif city is None:
+            # First city wins; a city after a region-only mention ("Haryana,
+            # Gurgaon") replaces that region with the city's own.
+            if hit[1] is not None:
+                city, region = hit[1], hit[2]
+            elif region is None:
+                region = hit[2]
+    if region is None and mode == "remote":
+        region = "Remote"
+    return Place(city, region, mode)
+
+
+def place_matches(place: Place, targets: tuple[str, ...]) -> bool:
+    """
+    True if `place` is one of `targets` (e.g. TARGET_LOCATIONS). City targets
+    match that city; region targets ("Delhi NCR") match every city in it;
+    "Remote" matches remote jobs.
+    """
+    cities, regions, remote = _target_places(tuple(targets))
+    return ((remote and place.work_mode == "remote")
+            or place.city in cities or place.region in regions)
+
+
+@lru_cache(maxsize=64)
+def _target_places(targets: tuple[str, ...]) -> tuple[frozenset, frozenset, bool]:
+    cities, regions, remote = set(), set(), False
+    for t in targets:
+        p = resolve_location(t)
+        if p.city:
+            cities.add(p.city)
+        elif p.region and p.region != "Remote":
+            regions.add(p.region)
+        remote = remote or p.work_mode == "remote"
+    return frozenset(cities), frozenset(regions), remote
+
+
+if __name__ == "__main__":
+    import sys
+    for raw in sys.argv[1:] or ["Gurugram, Haryana, India", "Delhi NCR", "Noida Sector 62",
+                                "Bengaluru (Hybrid)", "Work from home", "Mumbai, Maharashtra",
+                                "Haryana, Gurgaon", "Pune / Remote", "India"]:
+        print(f"  {raw!r:<34} → {resolve_location(raw)}")
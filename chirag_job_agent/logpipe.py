@@ -0,0 +1,206 @@
+"""
+logpipe.py — Non-blocking structured logging for main.py runs
+
+setup() puts a QueueHandler on the root logger, so a logging call (or a
+print) only enqueues a record; a QueueListener thread does the formatting
+and I/O for all three outputs:
+
+  console            human-readable, as before: "08:15:02  message"
+  logs/agent.log     the same lines, as before (committed by the workflows)
+  logs/agent.jsonl   one JSON object per record, rotated at LOG_MAX_BYTES
+                     with LOG_BACKUPS old files kept (artifact only)
+
+    {"ts": "2026-10-19T08:15:02.114", "level": "INFO", "logger": "print",
+     "stage": "scrape", "tag": "Indeed", "msg": "[Indeed] Querying RSS: ..."}
+
+print() from any module goes through the same queue: sys.stdout is replaced
+by a line writer logging to "print", and a leading "[Tag]" becomes "tag".
+
+Per-job lines are sampled before they are built: `if logpipe.sample(key):`
+is true for the first LOG_SAMPLE_FIRST calls per key in a stage, then for
+one in every LOG_SAMPLE_EVERY, so a dropped line costs a counter bump, not
+a LogRecord. stage(name) stamps each record with the pipeline
+stage and, when the stage ends, logs one summary record — lines per level,
+per-job lines sampled out, seconds — instead of leaving that to the reader.
+The current stage is a ContextVar, so concurrent stages (threads, tasks)
+each stamp their own; a worker thread started inside a stage logs as "-"
+unless it runs in a copy of the caller's context.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+from config import (LOG_PATH, LOG_JSONL_PATH, LOG_MAX_BYTES, LOG_BACKUPS,
+                    LOG_SAMPLE_FIRST, LOG_SAMPLE_EVERY)
+
+_TAG_RE = re.compile(r"^\s*\[([^\]\n]{1,30})\]")
+_EXTRAS = ("tag", "summary")
+
+log = logging.getLogger("logpipe")
+_listener: logging.handlers.QueueListener | None = None
+_stdout = sys.stdout
+_stage: ContextVar[str] = ContextVar("logpipe_stage", default="-")
+
+
+# ── FORMAT / FILTER ─────────────────────────────────────────────
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        doc = {"ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+               "level": record.levelname, "logger": record.name,
+               "stage": getattr(record, "stage", None), "msg": record.getMessage().strip()}
+        for key in _EXTRAS:
+            value = getattr(record, key, None)
+            if value is not None:
+                doc[key] = value
+        return json.dumps(doc, ensure_ascii=False, default=str)
+
+
+class _Pipeline(logging.Filter):
+    """On the QueueHandler: stamps the stage and counts records per stage; also the sampler."""
+
+    def __init__(self):
+        super().__init__()
+        self.lock = threading.Lock()
+        self.seen: Counter = Counter()
+        self.counts: dict[str, Counter] = defaultdict(Counter)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # Filters run in the logging thread, so this is the caller's stage.
+        record.stage = name = _stage.get()
+        with self.lock:
+            self.counts[name][record.levelname] += 1
+        return True
+
+    def sample(self, key: str) -> bool:
+        name = _stage.get()
+        with self.lock:
+            self.seen[name, key] += 1
+            n = self.seen[name, key] - LOG_SAMPLE_FIRST
+            if n > 0 and n % LOG_SAMPLE_EVERY:
+                self.counts[name]["sampled_out"] += 1
+                return False
+        return True
+
+    def pop(self, stage: str) -> Counter:
+        with self.lock:
+            for k in [k for k in self.seen if k[0] == stage]:
+                del self.seen[k]
+            return self.counts.pop(stage, Counter())
+
+
+_pipeline = _Pipeline()
+
+
+class _PrintStream:
+    """sys.stdout stand-in: every complete printed line becomes one log record."""
+    encoding = "utf-8"
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logger
+        self.local = threading.local()   # partial lines, per thread
+
+    def write(self, text: str) -> int:
+        *lines, self.local.buf = (getattr(self.local, "buf", "") + text).split("\n")
+        for line in lines:
+            if line.strip():
+                tag = _TAG_RE.match(line)
+                self.logger.info(line.rstrip(), extra={"tag": tag.group(1) if tag else None})
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def isatty(self) -> bool:
+        return False
+
+
+# ── SET-UP ──────────────────────────────────────────────────────
+
+def setup(log_path: str = LOG_PATH, jsonl_path: str = LOG_JSONL_PATH, level: int = logging.INFO):
+    """Route logging and print() through the queue (idempotent)."""
+    global _listener, _stdout
+    if _listener is not None:
+        return
+    for path in (log_path, jsonl_path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    _stdout = sys.stdout
+    plain = logging.Formatter("%(asctime)s  %(message)s", datefmt="%H:%M:%S")
+    console = logging.StreamHandler(_stdout)
+    console.setFormatter(plain)
+    text = logging.FileHandler(log_path, encoding="utf-8")
+    text.setFormatter(plain)
+    jsonl = logging.handlers.RotatingFileHandler(jsonl_path, maxBytes=LOG_MAX_BYTES,
+                                                 backupCount=LOG_BACKUPS, encoding="utf-8")
+    jsonl.setFormatter(JsonFormatter())
+
+    records = queue.SimpleQueue()
+    handler = logging.handlers.QueueHandler(records)
+    handler.addFilter(_pipeline)
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(records, console, text, jsonl)
+    _listener.start()
+    sys.stdout = _PrintStream(logging.getLogger("print"))
+    atexit.register(shutdown)
+
+
+def shutdown():
+    """Flush the queue and restore stdout (runs at exit)."""
+    global _listener
+    if _listener is None:
+        return
+    if isinstance(sys.stdout, _PrintStream):
+        sys.stdout = _stdout
+    _listener.stop()
+    _listener = None
+
+
+# ── STAGES ──────────────────────────────────────────────────────
+
+def sample(key: str) -> bool:
+    """True if this per-job line (one of many under `key`) should be logged."""
+    return _pipeline.sample(key)
+
+
+@contextmanager
+def stage(name: str):
+    """Tag records with `name`; log the stage's aggregated line counts when it ends."""
+    token = _stage.set(name)
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        counts = _pipeline.pop(name)
+        seconds = round(time.perf_counter() - t0, 3)
+        dropped = counts.pop("sampled_out", 0)
+        summary = {"seconds": seconds, "lines": dict(counts), "sampled_out": dropped}
+        log.info(f"  ⋯ {name}: {sum(counts.values())} log line(s)"
+                 + (f", {dropped} per-job line(s) sampled out" if dropped else "")
+                 + f" · {seconds}s", extra={"summary": summary})
+        _pipeline.pop(name)   # the summary line itself is not part of the next run of `name`
+        _stage.reset(token)
+
+
+def staged(name: str, fn):
+    """`fn` wrapped in stage(name) — for checkpoints.run_stages stage lists."""
+    def run(data):
+        with stage(name):
+            return fn(data)
+    return run
@@ -5,38 +5,58 @@ GitHub Actions calls this once per day. No scheduler needed — Actions IS the s
 Usage:
   python main.py           → full run (scrape + score + email)
   python main.py --test    → test mode (5 jobs per source, prints to console)
-  python main.py --stats   → show database stats
+  python main.py --stats   → show database stats (+ trend: --days 14)
+  python main.py --profile → also write cProfile + tracemalloc output to logs/metrics/
+  python main.py --resume latest
+                           → finish a crashed run from its last checkpointed stage
+  python main.py search hubspot company:deloitte --days 90
+                           → ranked full-text search over stored jobs
+  python main.py export --format parquet --incremental
+                           → stream jobs + run_log to exports/ (parquet/arrow/csv)
+  python main.py deliver   → retry digests left in the outbox (no re-scrape)
+  python main.py serve     → stay resident: poll sources, alert on 9+/10, daily digest
+  python main.py label 412 applied / python main.py train
+                           → record outcomes and learn scoring weights from them
+  python main.py --shard 2/4 --run-id r1   (one per worker)  then  python main.py merge --run r1
+                           → split the searches across N workers, merge their shard files
 """
 import sys
 import os
+import glob
 import time
 import logging
 import argparse
-from datetime import datetime
+from datetime import datetime, timedelta
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-from config import MIN_FIT_SCORE, LOG_PATH
-from database import (init_db, insert_job, update_score,
-                      get_todays_shortlist, mark_notified, log_run, get_stats)
-
-# ── Logging — writes to file AND console (GitHub Actions shows console live) ──
-os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s  %(message)s",
-    datefmt="%H:%M:%S",
-    handlers=[
-        logging.FileHandler(LOG_PATH),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+from config import STORAGE_MODE
+import checkpoints
+import logpipe
+import metrics
+from profiles import load_profiles, score_matrix, score_threshold, is_kept, min_recipient_score
+from models import as_jobs
+from database import (init_db, save_scored_jobs, get_profile_shortlist,
+                      log_run, get_stats, get_skill_gaps, get_prefilter_rejects,
+                      search_jobs, apply_retention, get_trend,
+                      get_queued_job_ids, get_outbox_summary,
+                      save_run_metrics, get_run_metrics,
+                      save_rejected, save_run_jobs, get_rejected_keys, get_promotable, delete_rejected,
+                      get_ledger_summary, get_title_roles, save_title_roles,
+                      label_job, get_labelled_jobs, save_score_model, get_score_model)
+import roles
+
+# ── Logging — queued console + JSON-lines file (GitHub Actions shows console live) ──
+# print() from scrapers / DB / notifier goes through the same queue (logpipe.py).
+logpipe.setup()
 log = logging.getLogger(__name__)
 
 
-def run_scrapers(test_mode=False):
+def run_scrapers(test_mode=False, searches=None):
+    """Run every scraper, or with `searches` ({source: [...]}, main.py --shard) only those searches."""
     from scrapers.linkedin import scrape_linkedin
     from scrapers.indeed   import scrape_indeed_rss
     from scrapers.naukri   import scrape_naukri
+    from scorer.engine     import prefilter_report
 
     log.info("━" * 50)
     log.info("  🤖 AI JOB AGENT — GitHub Actions Run")
@@ -48,87 +68,526 @@ def run_scrapers(test_mode=False):
     all_raw = []
 
     for name, fn in [("LinkedIn", scrape_linkedin), ("Indeed", scrape_indeed_rss), ("Naukri", scrape_naukri)]:
+        if searches is not None and not searches.get(name):
+            continue
         try:
-            jobs = fn(max_jobs=limit)
-            log.info(f"  {name}: {len(jobs)} jobs found")
+            jobs = fn(max_jobs=limit) if searches is None else fn(max_jobs=limit, searches=searches[name])
+            rejected = prefilter_report(reset=False).get(name, {})
+            log.info(f"  {name}: {len(jobs)} jobs found" + (
+                f", {sum(rejected.values())} pre-filtered ("
+                + ", ".join(f"{r} {n}" for r, n in sorted(rejected.items())) + ")"
+                if rejected else ""))
             all_raw.extend(jobs)
         except Exception as e:
             log.error(f"  {name} failed: {e}")
 
-    # Deduplicate
+    return all_raw
+
+
+def dedupe_jobs(all_raw):
     seen, unique = set(), []
-    for job in all_raw:
-        key = (job.get("url") or job.get("title","") + job.get("company","")).lower()[:100]
-        if key not in seen:
-            seen.add(key)
+    for job in as_jobs(all_raw):
+        if job.key not in seen:
+            seen.add(job.key)
             unique.append(job)
 
     log.info(f"\n  Total unique jobs: {len(unique)}")
     return unique
 
 
-def run_scoring(jobs, test_mode=False):
+@metrics.timed("score.batch")
+def run_scoring(jobs, profiles, test_mode=False):
+    """Score every job in place for every profile; returns all of them (kept or not)."""
     from scorer.engine import score_job
+    from scorer.learn import apply_model
 
-    log.info("\n🧠 STEP 2/3 — Scoring with AI engine...")
-    inserted_ids, kept = [], 0
+    log.info(f"\n🧠 STEP 2/3 — Scoring with AI engine ({len(profiles)} profile(s))...")
+    scored, pruned = [], 0
 
-    for i, job in enumerate(jobs):
+    jobs = as_jobs(jobs)
+    for job in jobs:
         try:
-            score_data = score_job(job)
-            job.update(score_data)
-            fit = score_data.get("fit_score", 0)
+            score_matrix(job, profiles, score_job)
+            scored.append(job)
+            pruned += sum(1 for s in job.scores.values() if (s.breakdown or {}).get("pruned_after"))
+        except Exception as e:
+            log.error(f"  Error: {e}")
 
-            status = "✅ KEPT" if fit >= MIN_FIT_SCORE else "🗑  skip"
-            log.info(f"  [{i+1:02d}/{len(jobs)}] {status}  {fit}/10  {job['title'][:40]} @ {job.get('company','?')[:20]}")
+    learned = apply_model(scored)
+    for i, job in enumerate(scored):
+        # Every kept job is listed; skipped ones are sampled (LOG_SAMPLE_FIRST / _EVERY).
+        keep = is_kept(job, profiles)
+        if not (keep or logpipe.sample("score.skip")):
+            continue
+        others = "".join(f" {pid}:{s.fit_score}" for pid, s in job.scores.items()
+                         if pid != "default")
+        status = "✅ KEPT" if keep else "🗑  skip"
+        log.info(f"  [{i+1:02d}/{len(jobs)}] {status}  {job.fit_score}/10{others}  {job.title[:40]} @ {job.company[:20]}")
 
-            if fit >= MIN_FIT_SCORE:
-                row_id = insert_job(job)
-                if row_id:
-                    update_score(row_id, score_data)
-                    inserted_ids.append(row_id)
-                    kept += 1
+    if learned:
+        log.info(f"  🎯 {learned} default-profile score(s) set by learned weights")
+    if pruned:
+        log.info(f"  ✂️  {pruned} of {len(scored) * len(profiles)} job × profile scores stopped early (below threshold)")
+    return scored
 
-        except Exception as e:
-            log.error(f"  Error: {e}")
 
-    log.info(f"\n  Result: {kept} new jobs kept out of {len(jobs)} scored")
-    return inserted_ids, kept
+def persist_jobs(scored, profiles):
+    """
+    One transaction for all jobs some profile kept (rows, skills, per-profile
+    scores); the rest go to the rejected-jobs ledger so later runs skip them.
+    """
+    from scorer.engine import ruleset_id
+    scored = as_jobs(scored)
+    inserted_ids = save_run_jobs([j for j in scored if is_kept(j, profiles)],
+                                 [j for j in scored if not is_kept(j, profiles)],
+                                 ruleset_id(profiles))
+    kept = len(inserted_ids)
+    save_title_roles(roles.drain_new())
+
+    log.info(f"\n  Result: {kept} new jobs kept out of {len(scored)} scored")
+    return {"ids": inserted_ids, "kept": kept}
 
 
-def run_notification():
+def current_ruleset(profiles) -> str:
+    """Load the learned weights (if `main.py train` ever ran) and return the ruleset id they give."""
+    from scorer.engine import ruleset_id
+    from scorer.learn import set_model
+    set_model(get_score_model())
+    return ruleset_id(profiles)
+
+
+def load_ledger(profiles, promote=True):
+    """
+    Before scraping: rescore ledger jobs a lowered threshold may now keep (no
+    re-scrape — the ledger holds the job), then let the scrapers skip the rest.
+    Shard workers pass promote=False: they never write to jobs.db.
+    Also seeds the title classifier with titles earlier runs already mapped
+    and loads the learned scoring weights, if `main.py train` ever ran.
+    """
+    from scorer.engine import score_job, set_known_rejects
+    from scorer.learn import apply_model
+    roles.preload(get_title_roles())
+    ruleset = current_ruleset(profiles)
+    thresholds = {p["id"]: score_threshold(p) for p in profiles}
+    candidates = get_promotable(ruleset, thresholds) if promote else []
+    if candidates:
+        for j in candidates:
+            score_matrix(j, profiles, score_job)
+        apply_model(candidates)
+        kept = [j for j in candidates if is_kept(j, profiles)]
+        ids = save_scored_jobs(kept)
+        delete_rejected([j.key for j in kept])
+        save_rejected([j for j in candidates if not is_kept(j, profiles)], ruleset)
+        log.info(f"  📒 Ledger: promoted {len(ids)} of {len(candidates)} previously rejected job(s)")
+    set_known_rejects(get_rejected_keys(ruleset))
+    return ruleset
+
+
+def run_notification(profiles=None):
+    from config import EMAIL_PASSWORD
     from notifier.email_digest import send_digest
+    from notifier.delivery import queue_digests, drain_outbox
 
     log.info("\n📬 STEP 3/3 — Sending digest email...")
-    shortlist = get_todays_shortlist(min_score=MIN_FIT_SCORE)
-    log.info(f"  Today's shortlist: {len(shortlist)} jobs")
+    for profile in profiles or load_profiles():
+        shortlist = get_profile_shortlist(profile["id"], min_score=min_recipient_score(profile))
+        # Jobs already waiting in the outbox from an earlier attempt go out with that message.
+        queued = get_queued_job_ids(profile["id"])
+        shortlist = [j for j in shortlist if j.id not in queued]
+        log.info(f"  {profile['name']}: {len(shortlist)} jobs for {len(profile['recipients'])} recipient(s)")
+
+        if EMAIL_PASSWORD == "YOUR_GMAIL_APP_PASSWORD":
+            send_digest(shortlist)   # prints to console instead
+            continue
+        queue_digests(shortlist, profile["recipients"], profile=profile["id"])
+
+    if EMAIL_PASSWORD == "YOUR_GMAIL_APP_PASSWORD":
+        return False
+    result = drain_outbox()
+    if result["retrying"] or result["failed"]:
+        log.info(f"  📮 {result['retrying']} message(s) left in the outbox — "
+                 f"retry with: python main.py deliver")
+    return result["sent"] > 0 and not (result["retrying"] or result["failed"])
+
+
+def run_deliver(args):
+    """Drain the outbox; with --wait keep retrying (honouring backoff) until it is empty."""
+    from notifier.delivery import drain_outbox
+
+    while True:
+        result  = drain_outbox()
+        summary = get_outbox_summary()
+        log.info(f"📮 Outbox: sent {result['sent']}, retrying {result['retrying']}, "
+                 f"failed {result['failed']} · {summary['pending']} pending")
+        if not args.wait or not summary["pending"]:
+            return summary["pending"] == 0
+        wait = (datetime.fromisoformat(summary["next_attempt_at"]) - datetime.now()).total_seconds()
+        if wait > args.max_wait:
+            log.info(f"  Next retry due at {summary['next_attempt_at']} — not waiting that long.")
+            return False
+        time.sleep(max(0, wait))
 
-    sent = send_digest(shortlist)
-    if sent and shortlist:
-        mark_notified([j["id"] for j in shortlist])
-    return sent
+
+def run_serve(args):
+    """Resident mode; the daily digest / retention / segment step runs inside the daemon."""
+    from daemon import serve
+
+    def daily(profiles):
+        log.info("\n📬 Daily digest")
+        email_sent = run_notification(profiles)
+        run_id = f"{checkpoints.new_run_id()}-digest"
+        log_run(0, 0, 0, 1 if email_sent else 0, run_id=run_id)
+        apply_retention()
+        save_run_metrics(run_id, metrics.summary())
+        metrics.write_artifact(run_id)
+        metrics.reset()
+        save_segments()
+
+    serve(daily, sources=args.sources, log=log.info, on_start=load_ledger)
+    save_segments()
+
+
+def run_label(args):
+    """Record an outcome for a stored job, then fold it into the learned weights."""
+    if not label_job(args.job_id, args.outcome, args.note):
+        log.error(f"No stored job with id {args.job_id}.")
+        return False
+    log.info(f"🏷  Job {args.job_id} labelled {args.outcome}.")
+    if get_score_model():
+        run_train(full=False)
+    return True
+
+
+def run_train(full=False):
+    """
+    Learn scoring weights from labelled jobs (scorer/learn.py): a batch fit
+    the first time or with --full, otherwise online steps on new labels.
+    """
+    from scorer import learn
+    if learn.np is None:
+        log.error("NumPy is not installed — `pip install numpy` to train scoring weights.")
+        return None
+    model = get_score_model()
+    if model and not full and model["features"] == learn.FEATURES:
+        labelled = get_labelled_jobs(since=model["labelled_through"])
+        if not labelled:
+            log.info("🎯 No new labels since the last training run.")
+            return model
+        model = learn.update(model, labelled)
+        log.info(f"🎯 Online update on {len(labelled)} new label(s): "
+                 f"{model['accuracy']:.0%} predicted correctly before updating")
+    else:
+        try:
+            model = learn.train(get_labelled_jobs())
+        except ValueError as e:
+            log.info(f"🎯 Not training yet — {e}")
+            return None
+        log.info(f"🎯 Batch fit on {model['n_labels']} labels: held-out accuracy "
+                 f"{model['accuracy']:.0%} (majority baseline {model['baseline']:.0%})")
+    model["id"] = save_score_model(model)
+    model["generation"] = model["generation"] or model["id"]
+    log.info("   Strongest weights: " +
+             ", ".join(f"{f} {w:+.2f}" for f, w in learn.top_weights(model)))
+    return model
+
+
+def run_merge(args):
+    """Fold a sharded run's files into jobs.db, then log it and send the digest like a normal run."""
+    from shards import find_shards, merge_shards
+    start = time.time()
+    paths = []
+    for p in args.paths:
+        paths += glob.glob(os.path.join(p, "shard-*.json.gz")) if os.path.isdir(p) else [p]
+    paths = paths or find_shards(args.run)
+    if not paths:
+        log.error("No shard files to merge.")
+        return False
+
+    merged = merge_shards(paths)
+    run_id = merged["run_id"]
+    log.info(f"🧩 Merging run {run_id}: shard(s) {merged['shards']} of {merged['of']}, "
+             f"{merged['found']} found → {len(merged['jobs'])} unique")
+    if merged["missing"]:
+        log.warning(f"  ⚠️  Shard(s) {merged['missing']} missing — their searches are not in this run")
+
+    profiles = load_profiles()
+    load_ledger(profiles)
+    result = persist_jobs(merged["jobs"], profiles)
+    email_sent = False if args.test else run_notification(profiles)
+    log_run(merged["found"], len(merged["jobs"]), result["kept"], 1 if email_sent else 0,
+            run_id=run_id, stage_timings=merged["stage_timings"],
+            prefilter_rejects=merged["prefilter_rejects"] or None)
+
+    if not args.test:
+        apply_retention()
+    spans = metrics.summary(merged["samples"])
+    save_run_metrics(run_id, spans)
+    metrics.write_artifact(run_id, {"stage_timings": merged["stage_timings"],
+                                    "shards": merged["shards"], "of": merged["of"]})
+    if not args.test:
+        save_segments()
+    log.info(f"\n✅ Merged in {round(time.time()-start, 1)}s")
+    return True
+
+
+def open_db():
+    """Bring jobs.db up to date — in segment mode, replay any new segments first."""
+    init_db()
+    if STORAGE_MODE == "segments":
+        from segments import sync
+        sync()
+
+
+def save_segments():
+    """Segment mode: persist this run's changes as a new segment (compacting if due)."""
+    if STORAGE_MODE != "segments":
+        return
+    from segments import write_segment, compact
+    write_segment()
+    compact()
+
+
+def run_search(args):
+    """Print one page of search results plus the cursor for the next page."""
+    since = args.since
+    if args.days:
+        since = (datetime.today() - timedelta(days=args.days)).strftime("%Y-%m-%d")
+    after = None
+    if args.after:
+        rank, job_id = args.after.rsplit(":", 1)
+        after = (float(rank), int(job_id))
+    experience = None
+    if args.exp:
+        lo, _, hi = args.exp.partition("-")
+        experience = (int(lo), int(hi or lo))
+
+    results = search_jobs(" ".join(args.query), min_score=args.min_score,
+                          platform=args.platform, since=since, until=args.until,
+                          experience=experience, location=args.location, role=args.role,
+                          limit=args.limit, after=after)
+    if not results:
+        log.info("🔎 No matching jobs.")
+        return
+
+    for j in results:
+        log.info(f"  [{j['id']:>5}] {j['fit_score']:>2}/10  {j['date_found']}  "
+                 f"{j['title'][:45]} @ {(j['company'] or '?')[:25]} · {j['platform']}")
+        log.info(f"          {j['url']}")
+    if len(results) == args.limit:
+        last = results[-1]
+        # "=" form: a BM25 rank is negative and would be read as an option.
+        log.info(f"\n  More results: --after={last['rank']!r}:{last['id']}")
 
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--test",  action="store_true")
     parser.add_argument("--stats", action="store_true")
+    parser.add_argument("--days",  type=int, default=7, help="trend window for --stats")
+    parser.add_argument("--resume", metavar="RUN_ID",
+                        help="continue a crashed run from its checkpoints ('latest' for the newest)")
+    parser.add_argument("--profile", action="store_true",
+                        help="cProfile + tracemalloc snapshots per stage, written to logs/metrics/")
+    parser.add_argument("--shard", metavar="I/N",
+                        help="worker I of N: scrape + score only this share of the searches and "
+                             "write a shard file for `merge` (no DB writes)")
+    parser.add_argument("--run-id", help="name the run — required with --shard; every shard "
+                                         "of one run must share it")
+    sub = parser.add_subparsers(dest="command")
+
+    search = sub.add_parser("search", help="full-text search over stored jobs")
+    search.add_argument("query", nargs="+", help="words or FTS5 query, e.g. 'hubspot company:deloitte'")
+    search.add_argument("--min-score", type=int)
+    search.add_argument("--platform")
+    search.add_argument("--since", help="YYYY-MM-DD (date found, inclusive)")
+    search.add_argument("--until", help="YYYY-MM-DD (date found, inclusive)")
+    search.add_argument("--days",  type=int, help="only jobs found in the last N days")
+    search.add_argument("--location", help="city, region or 'remote' (aliases like Gurgaon / NCR work)")
+    search.add_argument("--role", help="role or title, e.g. 'BDE' → Business Development")
+    search.add_argument("--exp",   help="years of experience, e.g. 0-3 (jobs whose stated range overlaps it)")
+    search.add_argument("--limit", type=int, default=20)
+    search.add_argument("--after", help="cursor printed at the end of the previous page")
+
+    export = sub.add_parser("export", help="stream jobs and run_log to columnar files")
+    export.add_argument("--format", choices=["parquet", "arrow", "csv"], default="parquet")
+    export.add_argument("--out", help="output directory (default: exports/)")
+    export.add_argument("--tables", nargs="+", choices=["jobs", "run_log"], default=["jobs", "run_log"])
+    export.add_argument("--incremental", action="store_true",
+                        help="only rows added since the last export of this format")
+
+    deliver = sub.add_parser("deliver", help="send queued digests from the outbox")
+    deliver.add_argument("--wait", action="store_true", help="keep retrying until the outbox is empty")
+    deliver.add_argument("--max-wait", type=int, default=900,
+                         help="longest single backoff (seconds) to sleep through with --wait")
+
+    label = sub.add_parser("label", help="record what happened with a stored job (trains the scorer)")
+    label.add_argument("job_id", type=int, help="id shown by `search`")
+    label.add_argument("outcome", choices=["applied", "interview", "rejected", "ignored"])
+    label.add_argument("--note", help="free text, stored in jobs.notes")
+
+    train = sub.add_parser("train", help="learn scoring weights from labelled jobs (needs numpy)")
+    train.add_argument("--full", action="store_true",
+                       help="fresh batch fit on all labels instead of online updates")
+
+    merge = sub.add_parser("merge", help="merge --shard worker files into jobs.db")
+    merge.add_argument("paths", nargs="*", help="shard files or a run's shard directory "
+                                                "(default: the newest run under data/shards/)")
+    merge.add_argument("--run", help="run id under data/shards/ to merge")
+
+    serve = sub.add_parser("serve", help="long-running mode with per-source polling and instant alerts")
+    serve.add_argument("--sources", nargs="+", choices=["LinkedIn", "Indeed", "Naukri"],
+                       help="sources to poll (default: all in POLL_INTERVALS)")
     args = parser.parse_args()
 
+    if args.command == "serve":
+        open_db()
+        run_serve(args)
+        return
+
+    if args.command == "deliver":
+        open_db()
+        sent = run_deliver(args)
+        save_segments()
+        sys.exit(0 if sent else 1)
+
+    if args.command == "search":
+        open_db()
+        run_search(args)
+        return
+
+    if args.command == "merge":
+        open_db()
+        with logpipe.stage("merge"):
+            ok = run_merge(args)
+        sys.exit(0 if ok else 1)
+
+    if args.command == "label":
+        open_db()
+        ok = run_label(args)
+        save_segments()
+        sys.exit(0 if ok else 1)
+
+    if args.command == "train":
+        open_db()
+        run_train(full=args.full)
+        save_segments()
+        return
+
+    if args.command == "export":
+        from exporter import export_all, EXPORT_DIR
+        open_db()
+        export_all(args.format, args.out or EXPORT_DIR, args.incremental, args.tables)
+        return
+
     if args.stats:
-        init_db()
+        open_db()
         stats = get_stats()
         log.info(f"📊 Stats: {stats}")
+        gaps = get_skill_gaps(days=30)
+        if gaps:
+            log.info("   Top skill gaps (30 days): " + ", ".join(f"{s} ×{n}" for s, n in gaps))
+        log.info(f"\n📈 Last {args.days} days (found → kept · score histogram)")
+        for d in get_trend(days=args.days):
+            hist = " ".join(f"{s}:{n}" for s, n in sorted(d["scores"].items(), reverse=True))
+            log.info(f"   {d['day']}  {d['found']:>4} → {d['kept']:<3}  {hist}")
+        ledger = get_ledger_summary(current_ruleset(load_profiles()))
+        log.info(f"   Rejected-jobs ledger: {ledger['current']} skipped on sight "
+                 f"({ledger['total'] - ledger['current']} from older rulesets)")
+        model = get_score_model()
+        if model:
+            log.info(f"   Learned scoring weights: generation {model['generation']}, "
+                     f"{model['n_labels']} labels, last accuracy {model['accuracy']:.0%}")
+        rejects = get_prefilter_rejects(days=args.days)
+        if rejects:
+            log.info(f"\n🚫 Pre-filtered before scoring (last {args.days} days)")
+            for source, reasons in sorted(rejects.items()):
+                log.info(f"   {source:<9} {sum(reasons.values()):>5}  " +
+                         ", ".join(f"{r} {n}" for r, n in sorted(reasons.items())))
+        spans = get_run_metrics()
+        if spans:
+            log.info("\n⏱  Slowest spans, last run (count · total · p95)")
+            for name, m in list(spans.items())[:10]:
+                log.info(f"   {name:<24} ×{m['count']:<5} {m['total_s']:>8.3f}s  {m['p95_s'] * 1000:>8.1f}ms")
         return
 
     start = time.time()
-    init_db()
+    open_db()
+
+    run_id = args.resume
+    if run_id == "latest":
+        run_id = checkpoints.latest_run_id()
+        if run_id is None:
+            log.error("No checkpointed run to resume.")
+            sys.exit(1)
+    run_id = run_id or args.run_id or checkpoints.new_run_id()
+
+    shard = share = None
+    if args.shard:
+        from shards import parse_shard, searches_for
+        if not (args.run_id or args.resume):
+            # A per-worker timestamp would split one run into N runs for `merge`.
+            log.error("--shard needs --run-id: every shard of one run must share it")
+            sys.exit(2)
+        try:
+            shard = parse_shard(args.shard)
+        except ValueError as e:
+            log.error(str(e))
+            sys.exit(2)
+        share = searches_for(*shard)
+        # Local workers of one run each keep their own checkpoints.
+        suffix = f"-{shard[0]}of{shard[1]}"
+        run_id = run_id.removesuffix(suffix) + suffix
+    log.info(f"  Run {run_id}" + (" (resuming)" if args.resume else ""))
+
+    profiles = load_profiles()
+    load_ledger(profiles, promote=not shard)
+    stages = [
+        ("scrape",  lambda _: run_scrapers(test_mode=args.test, searches=share)),
+        ("dedup",   dedupe_jobs),
+        ("score",   lambda jobs: run_scoring(jobs, profiles, test_mode=args.test)),
+    ]
+    if not shard:
+        stages.append(("persist", lambda jobs: persist_jobs(jobs, profiles)))
+    if not args.test and not shard:
+        stages.append(("notify", lambda _: run_notification(profiles)))
+    stages = [(name, logpipe.staged(name, fn)) for name, fn in stages]
+
+    profiler = metrics.Profiler(run_id) if args.profile else None
+    if profiler:
+        with profiler:
+            out, timings = checkpoints.run_stages(run_id, stages, resume=bool(args.resume),
+                                                  log=log.info, after_stage=profiler.snapshot)
+        log.info(profiler.report)
+    else:
+        out, timings = checkpoints.run_stages(run_id, stages, resume=bool(args.resume), log=log.info)
+
+    from scorer.engine import prefilter_report
+    if shard:
+        from shards import write_shard
+        path = write_shard(run_id.removesuffix(suffix), *shard, as_jobs(out["score"]),
+                           len(out["scrape"]), share, prefilter_report(), timings, metrics.samples())
+        checkpoints.discard(run_id)
+        log.info(f"\n📦 Shard {shard[0]}/{shard[1]}: {len(out['score'])} scored jobs → {path}")
+        log.info(f"✅ Done in {round(time.time()-start, 1)}s — run `python main.py merge` once every shard is in")
+        return
+
+    email_sent = bool(out.get("notify"))
+    log_run(len(out["scrape"]), len(out["dedup"]), out["persist"]["kept"],
+            1 if email_sent else 0, run_id=run_id, stage_timings=timings,
+            prefilter_rejects=prefilter_report())
+    checkpoints.discard(run_id)
 
-    raw_jobs        = run_scrapers(test_mode=args.test)
-    ids, kept       = run_scoring(raw_jobs, test_mode=args.test)
-    email_sent      = False if args.test else run_notification()
+    if not args.test:
+        ret = apply_retention()
+        log.info(f"\n🗄  jobs.db: {ret['size_before']//1024} KB → {ret['size_after']//1024} KB")
 
-    log_run(len(raw_jobs), len(raw_jobs), kept, 1 if email_sent else 0)
+    save_run_metrics(run_id, metrics.summary())
+    artifact = metrics.write_artifact(run_id, {"stage_timings": timings})
+    log.info(f"\n⏱  Where the time went ({artifact}):")
+    for line in metrics.format_summary():
+        log.info(f"   {line}")
+    if not args.test:
+        save_segments()
 
     log.info(f"\n✅ Done in {round(time.time()-start, 1)}s")
     log.info(f"   DB total: {get_stats()['total']} jobs tracked")
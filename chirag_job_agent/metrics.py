@@ -0,0 +1,170 @@
+"""
+metrics.py — Lightweight timing spans for the pipeline
+
+    with span("linkedin.request"):
+        resp = requests.get(...)
+
+    @timed("score.job")
+    def score_job(job): ...
+
+Every span adds one duration sample under its name. At the end of a run
+summary() folds the samples into count / total / p50 / p95 / max per name;
+main.py stores that in the run_metrics table and in logs/metrics/<run_id>.json,
+so a slow run shows whether LinkedIn, parsing, scoring or SQLite ate the time.
+
+Profiler (main.py --profile) adds cProfile and tracemalloc snapshots on top.
+"""
+import json
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from functools import wraps
+
+from config import METRICS_DIR
+
+_samples: dict[str, list[float]] = defaultdict(list)
+_lock = threading.Lock()
+
+
+# ── SPANS ───────────────────────────────────────────────────────
+
+def record(name: str, seconds: float):
+    with _lock:
+        _samples[name].append(seconds)
+
+
+class span:
+    """Time a block. Use as a context manager, or start()/stop() by hand."""
+    __slots__ = ("name", "_t0")
+
+    def __init__(self, name: str):
+        self.name = name
+        self._t0 = None
+
+    def start(self):
+        self._t0 = time.perf_counter()
+        return self
+
+    def stop(self) -> float:
+        elapsed = time.perf_counter() - self._t0
+        record(self.name, elapsed)
+        return elapsed
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def timed(name: str):
+    """Decorator form of span()."""
+    def wrap(fn):
+        @wraps(fn)
+        def inner(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def reset():
+    with _lock:
+        _samples.clear()
+
+
+# ── AGGREGATES ──────────────────────────────────────────────────
+
+def _percentile(ordered: list[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def samples() -> dict[str, list[float]]:
+    """Copy of the raw span timings (shard files carry them for an exact merged summary)."""
+    with _lock:
+        return {name: list(v) for name, v in _samples.items() if v}
+
+
+def summary(raw: dict[str, list[float]] | None = None) -> dict:
+    """{name: {"count", "total_s", "p50_s", "p95_s", "max_s"}}, sorted by name."""
+    if raw is None:
+        raw = samples()
+    snapshot = {name: sorted(v) for name, v in raw.items() if v}
+    return {name: {"count":   len(v),
+                   "total_s": round(sum(v), 4),
+                   "p50_s":   round(_percentile(v, 0.50), 4),
+                   "p95_s":   round(_percentile(v, 0.95), 4),
+                   "max_s":   round(v[-1], 4)}
+            for name, v in sorted(snapshot.items())}
+
+
+def write_artifact(run_id: str, extra: dict | None = None, out_dir: str = METRICS_DIR) -> str:
+    """Write this run's summary to <out_dir>/<run_id>.json; returns the path."""
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"{run_id}.json")
+    with open(path, "w") as f:
+        json.dump({"run_id": run_id, "created_at": datetime.now().isoformat(),
+                   **(extra or {}), "spans": summary()}, f, indent=2)
+    return path
+
+
+def format_summary(top: int = 15) -> list[str]:
+    """The slowest spans by total time, one line each, for the run log."""
+    rows = sorted(summary().items(), key=lambda kv: -kv[1]["total_s"])[:top]
+    return [f"{name:<24} ×{m['count']:<5} total {m['total_s']:>8.3f}s  "
+            f"p50 {m['p50_s'] * 1000:>8.1f}ms  p95 {m['p95_s'] * 1000:>8.1f}ms"
+            for name, m in rows]
+
+
+# ── PROFILER ────────────────────────────────────────────────────
+
+class Profiler:
+    """
+    cProfile over the whole run plus a tracemalloc snapshot after each stage.
+    Writes <run_id>.prof (open with pstats / snakeviz) and <run_id>-memory.txt.
+    """
+
+    def __init__(self, run_id: str, out_dir: str = METRICS_DIR, top: int = 10):
+        import cProfile
+        self.run_id, self.out_dir, self.top = run_id, out_dir, top
+        self._profile = cProfile.Profile()
+        self._snapshots = []
+
+    def __enter__(self):
+        import tracemalloc
+        tracemalloc.start(10)
+        self._profile.enable()
+        return self
+
+    def snapshot(self, label: str):
+        import tracemalloc
+        current, peak = tracemalloc.get_traced_memory()
+        self._snapshots.append((label, current, peak, tracemalloc.take_snapshot()))
+
+    def __exit__(self, *exc):
+        import io
+        import pstats
+        import tracemalloc
+        self._profile.disable()
+        tracemalloc.stop()
+
+        os.makedirs(self.out_dir, exist_ok=True)
+        self._profile.dump_stats(os.path.join(self.out_dir, f"{self.run_id}.prof"))
+        out = io.StringIO()
+        prev = None
+        for label, current, peak, snap in self._snapshots:
+            out.write(f"== after {label}: current {current / 1e6:.1f} MB, peak {peak / 1e6:.1f} MB\n")
+            stats = snap.compare_to(prev, "lineno") if prev else snap.statistics("lineno")
+            for stat in stats[:self.top]:
+                out.write(f"   {stat}\n")
+            prev = snap
+        with open(os.path.join(self.out_dir, f"{self.run_id}-memory.txt"), "w") as f:
+            f.write(out.getvalue())
+
+        text = io.StringIO()
+        pstats.Stats(self._profile, stream=text).sort_stats("cumulative").print_stats(self.top)
+        self.report = text.getvalue()
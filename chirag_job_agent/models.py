@@ -0,0 +1,238 @@
+"""
+models.py — Typed records shared by scrapers, scorer, DB and notifier
+
+Job        one posting as scraped, plus its score(s) once scored
+ScoreResult  what scorer.engine.score_job returns
+
+Both are slotted dataclasses, so the set of fields is fixed and each
+instance carries no per-object __dict__. Platform, company, location,
+employment type, date found and skill names repeat across thousands of jobs
+and are interned, so every job from "LinkedIn" / "Noida, India" points at
+one shared string.
+
+Converters:
+  Job.from_row(row)   sqlite3.Row / dict from the jobs table → Job
+  job.to_row()        → column dict for INSERT INTO jobs (incl. canonical city/region)
+  job.to_dict()       → plain JSON-able dict (checkpoints); Job.from_dict() back
+"""
+import sys
+from dataclasses import dataclass, field, fields, replace
+
+from locations import Place, resolve_location
+from roles import classify_title
+
+_intern = sys.intern
+
+
+def split_skills(value) -> list[str]:
+    """Skills arrive as a list (fresh from the scorer) or ", "-joined (from the DB)."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    return [s.strip() for s in value if s and s.strip()]
+
+
+@dataclass(slots=True)
+class ScoreResult:
+    fit_score:       int = 0
+    role_match:      str = ""
+    role_category:   str = ""
+    matching_skills: tuple[str, ...] = ()
+    missing_skills:  tuple[str, ...] = ()
+    key_requirement: str = ""
+    summary:         str = ""
+    breakdown:       dict | None = None     # debug only — never stored
+
+    def __post_init__(self):
+        self.role_match = _intern(self.role_match or "")
+        self.role_category = _intern(self.role_category or "")
+        # A few dozen distinct skill names across all jobs — share them.
+        self.matching_skills = tuple(_intern(x) for x in split_skills(self.matching_skills))
+        self.missing_skills = tuple(_intern(x) for x in split_skills(self.missing_skills))
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "ScoreResult":
+        return cls(
+            fit_score=int(d.get("fit_score") or 0),
+            role_match=d.get("role_match") or "",
+            role_category=d.get("role_category") or "",
+            matching_skills=d.get("matching_skills"),
+            missing_skills=d.get("missing_skills"),
+            key_requirement=d.get("key_requirement") or "",
+            summary=d.get("summary") or d.get("ai_summary") or "",
+        )
+
+    def to_dict(self) -> dict:
+        return {"fit_score": self.fit_score, "role_match": self.role_match,
+                "role_category": self.role_category,
+                "matching_skills": list(self.matching_skills),
+                "missing_skills": list(self.missing_skills),
+                "key_requirement": self.key_requirement, "summary": self.summary}
+
+
+@dataclass(slots=True)
+class Job:
+    title:           str
+    company:         str = "Unknown"
+    location:        str = ""
+    url:             str = ""
+    platform:        str = ""
+    employment_type: str = "Full-time"
+    description:     str = ""
+    posted_date:     str = ""
+    experience:      str = ""               # the site's own experience chip, e.g. Naukri "2-5 Yrs"
+    # Years parsed by scorer.engine.extract_experience (None = not stated / open-ended)
+    exp_min:         int | None = None
+    exp_max:         int | None = None
+    # Set once stored
+    id:              int | None = None
+    date_found:      str = ""
+    status:          str = "new"
+    notified:        bool = False
+    # Set once scored: `score` is the default profile's, `scores` every profile's
+    score:           ScoreResult | None = None
+    scores:          dict[str, ScoreResult] = field(default_factory=dict)
+
+    def __post_init__(self):
+        self.platform = _intern(self.platform or "")
+        self.company = _intern(self.company or "")
+        self.location = _intern(self.location or "")
+        self.date_found = _intern(self.date_found or "")
+        self.employment_type = _intern(self.employment_type or "Full-time")
+        self.status = _intern(self.status or "new")
+
+    # ── convenience ──
+    @property
+    def fit_score(self) -> int:
+        return self.score.fit_score if self.score else 0
+
+    @property
+    def key(self) -> str:
+        """Identity used for de-duplication and the rejected-jobs ledger."""
+        return (self.url or self.title + self.company).lower()[:100]
+
+    @property
+    def place(self) -> Place:
+        """Canonical city / region / work mode of `location` (cached per string)."""
+        return resolve_location(self.location)
+
+    @property
+    def canonical_role(self) -> str:
+        """Role from roles.TAXONOMY for this title (cached per title)."""
+        return classify_title(self.title)
+
+    def for_profile(self, profile_id: str) -> "Job":
+        """Shallow copy whose `score` is the given profile's."""
+        return replace(self, score=self.scores.get(profile_id, self.score))
+
+    # ── DB rows ──
+    @classmethod
+    def from_row(cls, row) -> "Job":
+        d = dict(row)
+        # Rows scored before role_category was stored show their taxonomy role.
+        score = (ScoreResult.from_dict({**d, "role_category": d.get("role_category")
+                                        or d.get("canonical_role")})
+                 if d.get("fit_score") is not None else None)
+        return cls(
+            title=d.get("title") or "", company=d.get("company") or "",
+            location=d.get("location") or "", url=d.get("url") or "",
+            platform=d.get("platform") or "",
+            employment_type=d.get("employment_type") or "Full-time",
+            description=d.get("description") or "", posted_date=d.get("posted_date") or "",
+            exp_min=d.get("exp_min"), exp_max=d.get("exp_max"),
+            id=d.get("id"), date_found=d.get("date_found") or "",
+            status=d.get("status") or "new", notified=bool(d.get("notified")),
+            score=score,
+        )
+
+    def to_row(self) -> dict:
+        """Column values for the jobs table (description is stored separately)."""
+        s, place = self.score or ScoreResult(), self.place
+        return {
+            "title": self.title, "company": self.company, "location": self.location,
+            "url": self.url, "platform": self.platform,
+            "employment_type": self.employment_type, "posted_date": self.posted_date,
+            "exp_min": self.exp_min, "exp_max": self.exp_max,
+            "city": place.city, "region": place.region, "work_mode": place.work_mode,
+            "canonical_role": self.canonical_role,
+            "fit_score": s.fit_score, "role_match": s.role_match,
+            "role_category": s.role_category,
+            "matching_skills": ", ".join(s.matching_skills),
+            "missing_skills": ", ".join(s.missing_skills),
+            "key_requirement": s.key_requirement, "ai_summary": s.summary,
+        }
+
+    # ── checkpoints / JSON ──
+    def to_dict(self) -> dict:
+        d = {f.name: getattr(self, f.name) for f in fields(self)
+             if f.name not in ("score", "scores")}
+        d["score"] = self.score.to_dict() if self.score else None
+        d["scores"] = {p: s.to_dict() for p, s in self.scores.items()}
+        return d
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "Job":
+        d = dict(d)
+        score, scores = d.pop("score", None), d.pop("scores", None) or {}
+        names = {f.name for f in fields(cls)}
+        job = cls(**{k: v for k, v in d.items() if k in names})
+        job.score = ScoreResult.from_dict(score) if score else None
+        job.scores = {p: ScoreResult.from_dict(s) for p, s in scores.items()}
+        return job
+
+
+def as_jobs(items) -> list[Job]:
+    """Accept Jobs or their dict form (e.g. a checkpoint loaded from JSON)."""
+    return [j if isinstance(j, Job) else Job.from_dict(j) for j in items]
+
+
+# ── MEMORY CHECK ────────────────────────────────────────────────
+
+def measure_history(n: int = 100_000) -> dict:
+    """
+    Bytes per job when loading `n` stored jobs as dicts (the old way) vs Job
+    records, measured with tracemalloc on a throwaway jobs.db.
+    """
+    import os
+    import tempfile
+    import tracemalloc
+    import database
+
+    saved = database.DB_PATH
+    database.DB_PATH = os.path.join(tempfile.mkdtemp(), "mem.db")
+    try:
+        database.init_db()
+        with database.get_conn() as conn:
+            conn.executemany("""
+                INSERT INTO jobs (title, company, location, url, platform, employment_type,
+                                  posted_date, date_found, fit_score, role_match,
+                                  matching_skills, missing_skills, key_requirement, ai_summary)
+                VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+            """, [(f"Business Analyst {i}", f"Company {i % 900}",
+                   ("Noida, India", "Gurugram, India", "Delhi NCR")[i % 3],
+                   f"https://example.com/jobs/{i}", ("LinkedIn", "Indeed", "Naukri")[i % 3],
+                   "Full-time", "", "2026-01-01", 6 + i % 5, "Medium",
+                   "BRD Writing, Agile", "MBA", "Looking for a business analyst",
+                   "Decent match.") for i in range(n)])
+
+        def _load(convert):
+            with database.get_conn() as conn:
+                tracemalloc.start()
+                rows = [convert(r) for r in conn.execute("SELECT * FROM jobs")]
+                size = tracemalloc.get_traced_memory()[0]
+                tracemalloc.stop()
+            return rows, size
+
+        dicts, dict_bytes = _load(dict)
+        del dicts
+        jobs, job_bytes = _load(Job.from_row)
+        return {"jobs": n, "dict_bytes_per_job": dict_bytes // n,
+                "job_bytes_per_job": job_bytes // n,
+                "saving": f"{1 - job_bytes / dict_bytes:.0%}"}
+    finally:
+        database.DB_PATH = saved
+
+
+if __name__ == "__main__":
+    print(measure_history(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000))
@@ -0,0 +1,329 @@
+"""
+notifier/delivery.py — Fan the digest out to every configured recipient
+
+Each recipient in config.RECIPIENTS gets a digest built from their own filters.
+Digests are rendered in parallel, then all of them go out over one
+authenticated SMTP session (reconnecting once if the server drops it), so
+login happens once per run instead of once per person. When the server
+advertises PIPELINING (RFC 2920) each message's envelope and the previous
+message's body share one round trip; otherwise plain sendmail() is used.
+
+In the normal run digests are queued in the outbox table first and then
+drained, so a failed send can be retried later (`main.py deliver`) without
+scraping and scoring again.
+"""
+import smtplib
+import ssl
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import (EMAIL_SENDER, EMAIL_PASSWORD, RECIPIENTS,
+                    SMTP_HOST, SMTP_PORT, SMTP_USE_SSL,
+                    OUTBOX_MAX_ATTEMPTS, OUTBOX_MAX_BACKOFF, ALERT_MIN_SCORE, MIN_FIT_SCORE)
+from database import (enqueue_messages, get_due_messages, mark_message_sent,
+                      mark_message_failed, purge_sent_messages)
+from notifier.email_digest import build_messages
+from metrics import record
+from models import Job, ScoreResult
+
+
+def filter_jobs(jobs: list[Job], recipient: dict) -> list[Job]:
+    """Apply a recipient's min_score / platforms / keywords filters."""
+    min_score = recipient.get("min_score", 0)
+    platforms = {p.lower() for p in recipient.get("platforms") or []}
+    keywords  = [k.lower() for k in recipient.get("keywords") or []]
+    picked = []
+    for job in jobs:
+        if job.fit_score < min_score:
+            continue
+        if platforms and job.platform.lower() not in platforms:
+            continue
+        if keywords:
+            title = job.title.lower()
+            if not any(k in title for k in keywords):
+                continue
+        picked.append(job)
+    return picked
+
+
+def _min_score(recipient: dict) -> int:
+    """The cut-off a recipient's digest header names: theirs, or the run's if lower."""
+    return max(recipient.get("min_score", 0), MIN_FIT_SCORE)
+
+
+def _render(jobs: list[Job], recipients: list[dict], workers: int = 4) -> list[tuple]:
+    """[(email, picked jobs, [messages])] for every recipient, rendered in parallel."""
+    def _one(r):
+        picked = filter_jobs(jobs, r)
+        return r["email"], picked, build_messages(picked, r["email"], min_score=_min_score(r))
+    if not recipients:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(recipients)))) as pool:
+        return list(pool.map(_one, recipients))
+
+
+def render_all(jobs: list[Job], recipients: list[dict], workers: int = 4) -> dict:
+    """Build {email: [messages]} for every recipient, in parallel."""
+    return {email: msgs for email, _, msgs in _render(jobs, recipients, workers)}
+
+
+def _connect(host, port, use_ssl, timeout):
+    if use_ssl:
+        return smtplib.SMTP_SSL(host, port, context=ssl.create_default_context(), timeout=timeout)
+    return smtplib.SMTP(host, port, timeout=timeout)
+
+
+def _send_pipelined(server, sender: str, recipient: str, parts: list[str], progress: dict):
+    """
+    sendmail() for each of `parts` with RFC 2920 PIPELINING: a part's MAIL,
+    RCPT and DATA go out in one write together with the previous part's
+    body, so every part costs one round trip instead of four.
+    progress["parts"] counts the parts the server has accepted.
+    """
+    envelope = (f"MAIL FROM:{smtplib.quoteaddr(sender)}\r\n"
+                f"RCPT TO:{smtplib.quoteaddr(recipient)}\r\nDATA\r\n")
+    body = None                     # sent, reply not read yet
+    for part in [*parts, None]:
+        server.send((body or "") + (envelope if part is not None else ""))
+        error = None
+        if body is not None:
+            code, resp = server.getreply()
+            if code == 250:
+                progress["parts"] += 1
+            else:
+                error = smtplib.SMTPDataError(code, resp)
+        if part is None:
+            if error:
+                raise error
+            return
+        (mail_code, mail_resp), (rcpt_code, rcpt_resp), (data_code, data_resp) = \
+            server.getreply(), server.getreply(), server.getreply()
+        if not error and mail_code != 250:
+            error = smtplib.SMTPSenderRefused(mail_code, mail_resp, sender)
+        if not error and rcpt_code not in (250, 251):
+            error = smtplib.SMTPRecipientsRefused({recipient: (rcpt_code, rcpt_resp)})
+        if not error and data_code != 354:
+            error = smtplib.SMTPDataError(data_code, data_resp)
+        if error:
+            if data_code == 354:    # end the transaction the server opened anyway
+                server.send(".\r\n")
+                server.getreply()
+            raise error
+        body = smtplib.quotedata(part)
+        body += (".\r\n" if body.endswith("\r\n") else "\r\n.\r\n")
+
+
+def _send_parts(server, sender: str, recipient: str, messages: list[str], progress: dict):
+    """Send the parts from progress["parts"] on, pipelined when the server offers it."""
+    todo = messages[progress["parts"]:]
+    server.ehlo_or_helo_if_needed()
+    if server.has_extn("pipelining"):
+        _send_pipelined(server, sender, recipient, todo, progress)
+        return
+    for msg in todo:
+        server.sendmail(sender, [recipient], msg)
+        progress["parts"] += 1
+
+
+def send_batch(batch: list[tuple], host: str = SMTP_HOST, port: int = SMTP_PORT,
+               use_ssl: bool = SMTP_USE_SSL, user: str = EMAIL_SENDER,
+               password: str = EMAIL_PASSWORD, timeout: int = 30) -> dict:
+    """
+    Send `batch` = [(key, recipient, [message_str, ...])] over one SMTP session,
+    pipelined when the server advertises PIPELINING. If the server drops the
+    connection mid-digest, the reconnect resumes from the first part it had
+    not accepted, so a multi-part digest is not sent twice.
+
+    Returns {"results": {key: {"ok", "parts", "error"}},
+             "timings": {"connect_s", "login_s", "send_s"}}.
+    """
+    timings = {"connect_s": 0.0, "login_s": 0.0, "send_s": 0.0}
+    results = {key: {"ok": False, "parts": 0, "error": None} for key, _, _ in batch}
+    server = None
+
+    def _open():
+        t = time.perf_counter()
+        srv = _connect(host, port, use_ssl, timeout)
+        elapsed = time.perf_counter() - t
+        timings["connect_s"] += elapsed
+        record("smtp.connect", elapsed)
+        t = time.perf_counter()
+        if password:
+            srv.login(user, password)
+            record("smtp.login", time.perf_counter() - t)
+        timings["login_s"] += time.perf_counter() - t
+        return srv
+
+    try:
+        server = _open()
+        for key, recipient, messages in batch:
+            t = time.perf_counter()
+            try:
+                for attempt in (1, 2):
+                    try:
+                        _send_parts(server, user, recipient, messages, results[key])
+                        break
+                    except smtplib.SMTPServerDisconnected:
+                        if attempt == 2:
+                            raise
+                        server = _open()
+                results[key]["ok"] = True
+            except smtplib.SMTPException as e:
+                results[key]["error"] = str(e)
+                try:
+                    server.rset()
+                except (OSError, smtplib.SMTPException):
+                    server = _open()
+            finally:
+                elapsed = time.perf_counter() - t
+                timings["send_s"] += elapsed
+                record("smtp.send", elapsed)
+    except smtplib.SMTPAuthenticationError as e:
+        for r in results.values():
+            r["error"] = r["error"] or f"auth failed: {e.smtp_code}"
+    except (OSError, smtplib.SMTPException) as e:
+        for r in results.values():
+            if not r["ok"]:
+                r["error"] = r["error"] or str(e) or type(e).__name__
+    finally:
+        if server is not None:
+            try:
+                server.quit()
+            except (OSError, smtplib.SMTPException):
+                pass
+    return {"results": results, "timings": timings}
+
+
+def _report(results: dict, timings: dict, what: str = "digests"):
+    sent = sum(r["ok"] for r in results.values())
+    print(f"[Email] Delivered {sent}/{len(results)} {what} "
+          f"(connect {timings['connect_s']:.2f}s · login {timings['login_s']:.2f}s · "
+          f"send {timings['send_s']:.2f}s · render {timings.get('render_s', 0):.2f}s)")
+    for key, r in results.items():
+        if not r["ok"]:
+            print(f"[Email] ❌ {key}: {r['error']}")
+
+
+def deliver_digests(jobs: list[Job], recipients: list[dict] = RECIPIENTS, **smtp) -> dict:
+    """
+    Render and send one digest per recipient over a single SMTP session,
+    without going through the outbox.
+
+    Returns {"results": {email: {"ok", "parts", "error"}},
+             "timings": {"render_s", "connect_s", "login_s", "send_s"}}.
+    """
+    t0 = time.perf_counter()
+    rendered = render_all(jobs, recipients)
+    render_s = time.perf_counter() - t0
+
+    report = send_batch([(email, email, [m.as_string() for m in msgs])
+                         for email, msgs in rendered.items()], **smtp)
+    report["timings"]["render_s"] = render_s
+    report["timings"] = {k: round(v, 4) for k, v in report["timings"].items()}
+    _report(report["results"], report["timings"])
+    return report
+
+
+# ── OUTBOX ──────────────────────────────────────────────────────
+
+def queue_digests(jobs: list[Job], recipients: list[dict] = RECIPIENTS,
+                  profile: str = "default") -> list[int]:
+    """
+    Render every recipient's digest (in parallel, as render_all) into the
+    outbox, one row per part so a failed part is retried on its own.
+    Returns outbox ids.
+    """
+    items = []
+    for email, picked, msgs in _render(jobs, recipients):
+        for msg in msgs:
+            items.append({"recipient": email, "subject": msg["Subject"],
+                          "message": msg.as_string(), "profile": profile,
+                          "job_ids": [j.id for j in picked if j.id]})
+    return enqueue_messages(items)
+
+
+def queue_alerts(jobs: list[Job], recipients: list[dict] = RECIPIENTS,
+                 profile: str = "default") -> list[int]:
+    """
+    Queue an instant alert for jobs at or above each recipient's
+    alert_min_score (default ALERT_MIN_SCORE). Recipients with nothing
+    that high get no message. Alerts do not mark jobs notified, so every
+    recipient still gets them in the daily digest. Returns outbox ids.
+    """
+    items = []
+    for r in recipients:
+        floor = max(r.get("min_score", 0), r.get("alert_min_score", ALERT_MIN_SCORE))
+        picked = filter_jobs(jobs, {**r, "min_score": floor})
+        if not picked:
+            continue
+        top = picked[0]
+        subject = (f"🚨 {top.fit_score}/10 — {top.title[:60]} @ {top.company}"
+                   if len(picked) == 1 else f"🚨 {len(picked)} high-scoring jobs just posted")
+        for msg in build_messages(picked, r["email"], subject=subject, min_score=floor):
+            items.append({"recipient": r["email"], "subject": msg["Subject"],
+                          "message": msg.as_string(), "profile": profile, "kind": "alert",
+                          "job_ids": [j.id for j in picked if j.id]})
+    return enqueue_messages(items)
+
+
+def _backoff(attempts: int) -> timedelta:
+    """1 min, 2 min, 4 min ... capped at OUTBOX_MAX_BACKOFF seconds."""
+    return timedelta(seconds=min(60 * 2 ** attempts, OUTBOX_MAX_BACKOFF))
+
+
+def drain_outbox(max_attempts: int = OUTBOX_MAX_ATTEMPTS, **smtp) -> dict:
+    """
+    Send every due outbox message over one SMTP session. Sent messages flag
+    their jobs notified; failures are rescheduled with exponential backoff
+    until `max_attempts`, then marked failed.
+    Returns {"sent", "retrying", "failed"}.
+    """
+    due = get_due_messages()
+    if not due:
+        return {"sent": 0, "retrying": 0, "failed": 0}
+
+    report = send_batch([(m["id"], m["recipient"], [m["message"]]) for m in due], **smtp)
+    counts = {"sent": 0, "retrying": 0, "failed": 0}
+    now = datetime.now()
+    for m in due:
+        r = report["results"][m["id"]]
+        if r["ok"]:
+            mark_message_sent(m["id"])
+            counts["sent"] += 1
+        elif m["attempts"] + 1 >= max_attempts:
+            mark_message_failed(m["id"], r["error"] or "unknown error", None)
+            counts["failed"] += 1
+        else:
+            mark_message_failed(m["id"], r["error"] or "unknown error",
+                                now + _backoff(m["attempts"]))
+            counts["retrying"] += 1
+    _report({f"#{m['id']} {m['recipient']}": report["results"][m["id"]] for m in due},
+            report["timings"], "outbox messages")
+    purge_sent_messages()
+    return counts
+
+
+if __name__ == "__main__":
+    # Fan out to three fake recipients through the local stand-in server.
+    from notifier.smtp_standin import LocalSMTPServer
+
+    jobs = [Job(
+        title=f"Business Analyst {i}", company="Deloitte India", location="Gurugram",
+        platform=("LinkedIn", "Naukri")[i % 2], url=f"https://example.com/{i}",
+        score=ScoreResult(fit_score=6 + i % 5, matching_skills=("BRD Writing", "Agile"),
+                          summary="Decent match."),
+    ) for i in range(40)]
+    team = [
+        {"email": "a@example.com", "min_score": 6},
+        {"email": "b@example.com", "min_score": 8, "platforms": ["LinkedIn"]},
+        {"email": "c@example.com", "min_score": 9, "keywords": ["analyst"]},
+        {"email": "blocked@example.com"},
+    ]
+    with LocalSMTPServer(password="secret", reject={"blocked@example.com"}) as smtp:
+        report = deliver_digests(jobs, team, host=smtp.host, port=smtp.port,
+                                 use_ssl=False, user="agent@example.com", password="secret")
+        print(report)
+        print(f"Stand-in saw {smtp.connections} connection(s), {smtp.logins} login(s), "
+              f"{len(smtp.messages)} message(s)")
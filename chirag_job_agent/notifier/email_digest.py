@@ -4,57 +4,36 @@ Uses Python's built-in smtplib — no email API needed.
 """
 import smtplib
 import ssl
+from html import escape
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from datetime import datetime
 import sys, os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config import EMAIL_SENDER, EMAIL_PASSWORD, EMAIL_TO, CANDIDATE
+from config import (EMAIL_SENDER, EMAIL_PASSWORD, EMAIL_TO, CANDIDATE, DIGEST_MAX_BYTES,
+                    SMTP_HOST, SMTP_PORT, MIN_FIT_SCORE)
+from metrics import span
+from models import Job, ScoreResult
 
 
-def _score_badge_html(score: int) -> str:
-    score = int(score or 0)
-    if score >= 9:
-        return f'<span style="background:#D1FAE5;color:#065F46;padding:4px 12px;border-radius:20px;font-weight:700;font-size:13px;">🔥 {score}/10 Excellent</span>'
-    elif score >= 7:
-        return f'<span style="background:#DBEAFE;color:#1E40AF;padding:4px 12px;border-radius:20px;font-weight:700;font-size:13px;">⭐ {score}/10 Strong</span>'
-    else:
-        return f'<span style="background:#FEF3C7;color:#92400E;padding:4px 12px;border-radius:20px;font-weight:700;font-size:13px;">✅ {score}/10 Good</span>'
-
-
-def _platform_color(platform: str) -> str:
-    colors = {"LinkedIn": "#0A66C2", "Indeed": "#2164F4", "Naukri": "#FF6F61"}
-    return colors.get(platform, "#6B7280")
+# ── TEMPLATES ───────────────────────────────────────────────────
+# {field}-style templates with the shared inline CSS baked in once, at import.
+# Rendering fills them with str.format_map() per job and joins a message's
+# cards once. Only the {field} slots may use braces — the markup has none.
 
+_BADGE_STYLE = "padding:4px 12px;border-radius:20px;font-weight:700;font-size:13px;"
+_BADGES = {
+    "excellent": f'<span style="background:#D1FAE5;color:#065F46;{_BADGE_STYLE}">🔥 {{score}}/10 Excellent</span>',
+    "strong":    f'<span style="background:#DBEAFE;color:#1E40AF;{_BADGE_STYLE}">⭐ {{score}}/10 Strong</span>',
+    "good":      f'<span style="background:#FEF3C7;color:#92400E;{_BADGE_STYLE}">✅ {{score}}/10 Good</span>',
+}
 
-def _build_job_card(job: dict) -> str:
-    title    = job.get("title", "")
-    company  = job.get("company", "")
-    location = job.get("location", "")
-    platform = job.get("platform", "")
-    url      = job.get("url", "#")
-    score    = int(job.get("fit_score", 0))
-    summary  = job.get("ai_summary", "")
-    matching = job.get("matching_skills", "")
-    missing  = job.get("missing_skills", "")
-    category = job.get("role_category", "")
-    key_req  = job.get("key_requirement", "")
+_PILL_STYLE = "padding:3px 10px;border-radius:20px;font-size:12px;margin:2px;display:inline-block;"
+_MATCH_PILL   = f'<span style="background:#EFF6FF;color:#1D4ED8;{_PILL_STYLE}">✅ {{skill}}</span>'
+_MISSING_PILL = f'<span style="background:#FFFBEB;color:#B45309;{_PILL_STYLE}">⚠️ {{skill}}</span>'
+_KEY_REQ      = '<p style="margin:6px 0;font-size:12px;color:#9CA3AF;font-style:italic;">📌 {key_req}</p>'
 
-    match_pills = ""
-    if matching:
-        for skill in matching.split(", ")[:4]:
-            match_pills += f'<span style="background:#EFF6FF;color:#1D4ED8;padding:3px 10px;border-radius:20px;font-size:12px;margin:2px;display:inline-block;">✅ {skill}</span>'
-
-    missing_pills = ""
-    if missing:
-        for skill in missing.split(", ")[:3]:
-            missing_pills += f'<span style="background:#FFFBEB;color:#B45309;padding:3px 10px;border-radius:20px;font-size:12px;margin:2px;display:inline-block;">⚠️ {skill}</span>'
-
-    key_req_html = f'<p style="margin:6px 0;font-size:12px;color:#9CA3AF;font-style:italic;">📌 {key_req}</p>' if key_req else ""
-
-    plat_color = _platform_color(platform)
-
-    return f"""
+_CARD = """
     <div style="border:1px solid #E5E7EB;border-radius:12px;padding:18px 20px;margin:14px 0;background:#FFFFFF;">
       <table width="100%" cellpadding="0" cellspacing="0"><tr>
         <td style="vertical-align:top;">
@@ -67,31 +46,19 @@ def _build_job_card(job: dict) -> str:
           </p>
         </td>
         <td style="vertical-align:top;text-align:right;white-space:nowrap;">
-          {_score_badge_html(score)}
+          {badge}
         </td>
       </tr></table>
       <p style="margin:10px 0 6px;font-size:14px;color:#374151;line-height:1.6;">{summary}</p>
-      {key_req_html}
-      <div style="margin:8px 0;">{match_pills}{missing_pills}</div>
+      {key_req}
+      <div style="margin:8px 0;">{pills}</div>
       <a href="{url}" style="display:inline-block;margin-top:10px;background:#1E40AF;color:#ffffff;
          padding:8px 20px;border-radius:6px;text-decoration:none;font-size:14px;font-weight:600;">
         View &amp; Apply →
       </a>
     </div>"""
 
-
-def build_html_digest(jobs: list[dict]) -> str:
-    today = datetime.now().strftime("%A, %d %B %Y")
-    count = len(jobs)
-
-    job_cards_html = ""
-    for job in jobs:
-        job_cards_html += _build_job_card(job)
-
-    if not job_cards_html:
-        job_cards_html = '<p style="color:#6B7280;text-align:center;padding:20px;">No new jobs found today.</p>'
-
-    return f"""<!DOCTYPE html>
+_PAGE = """<!DOCTYPE html>
 <html>
 <head><meta charset="UTF-8"><meta name="viewport" content="width=device-width,initial-scale=1.0"></head>
 <body style="font-family:-apple-system,BlinkMacSystemFont,'Segoe UI',Arial,sans-serif;
@@ -103,29 +70,140 @@ def build_html_digest(jobs: list[dict]) -> str:
               color:#fff;padding:28px 32px;border-radius:16px 16px 0 0;">
     <h1 style="margin:0 0 6px;font-size:22px;font-weight:700;">🤖 Your Daily Job Digest</h1>
     <p style="margin:0;font-size:14px;opacity:0.85;">
-      {today} &nbsp;·&nbsp; <strong>{count} new match{"es" if count!=1 else ""}</strong> found today
+      {today} &nbsp;·&nbsp; <strong>{count_label}</strong> found today{part_label}
     </p>
     <p style="margin:8px 0 0;font-size:13px;opacity:0.7;">
-      Only roles scored 6+/10 shown · Sorted by fit score
+      Only roles scored {min_score}+/10 shown · Sorted by fit score
     </p>
   </div>
 
   <!-- Body -->
   <div style="background:#fff;padding:24px 28px;
               border-radius:0 0 16px 16px;border:1px solid #E5E7EB;border-top:none;">
-    {job_cards_html}
+    {cards}
     <hr style="margin:24px 0;border:none;border-top:1px solid #E5E7EB;">
     <p style="text-align:center;color:#9CA3AF;font-size:12px;margin:0;">
       Generated by your AI Job Agent · Running daily at 8:30 AM<br>
-      Built for {CANDIDATE["name"]} · Zero cost · Open source
+      Built for {name} · Zero cost · Open source
     </p>
   </div>
 </div>
 </body>
 </html>"""
 
+_NO_CARDS = '<p style="color:#6B7280;text-align:center;padding:20px;">No new jobs found today.</p>'
+
+
+def _score_badge_html(score: int) -> str:
+    score = int(score or 0)
+    tier = "excellent" if score >= 9 else "strong" if score >= 7 else "good"
+    return _BADGES[tier].format(score=score)
+
+
+def _platform_color(platform: str) -> str:
+    colors = {"LinkedIn": "#0A66C2", "Indeed": "#2164F4", "Naukri": "#FF6F61"}
+    return colors.get(platform, "#6B7280")
+
+
+def _build_job_card(job: Job) -> str:
+    score = job.score or ScoreResult()
+    pills = ([_MATCH_PILL.format(skill=escape(s)) for s in score.matching_skills[:4]] +
+             [_MISSING_PILL.format(skill=escape(s)) for s in score.missing_skills[:3]])
+    key_req = (_KEY_REQ.format(key_req=escape(score.key_requirement))
+               if score.key_requirement else "")
+
+    return _CARD.format_map({
+        "title":      escape(job.title),
+        "company":    escape(job.company),
+        "location":   escape(job.location),
+        "platform":   escape(job.platform),
+        "plat_color": _platform_color(job.platform),
+        "category":   escape(score.role_category),
+        "badge":      _score_badge_html(score.fit_score),
+        "summary":    escape(score.summary),
+        "key_req":    key_req,
+        "pills":      "".join(pills),
+        "url":        escape(job.url or "#"),
+    })
+
+
+def _render_card_text(out: list, job: Job):
+    score = job.score or ScoreResult()
+    emoji = "🔥" if score.fit_score >= 9 else "⭐" if score.fit_score >= 7 else "✅"
+    out.append(f"{emoji} {score.fit_score}/10  {job.title} @ {job.company}\n")
+    out.append(f"   {job.location} · {job.platform}\n")
+    if score.summary:
+        out.append(f"   {score.summary}\n")
+    if score.matching_skills:
+        out.append(f"   Matches: {', '.join(score.matching_skills[:4])}\n")
+    if score.missing_skills:
+        out.append(f"   Gaps: {', '.join(score.missing_skills[:3])}\n")
+    out.append(f"   {job.url}\n\n")
+
+
+def _count_label(count: int) -> str:
+    return f"{count} new match{'es' if count != 1 else ''}"
+
 
-def build_no_jobs_html() -> str:
+def _render_page(today: str, count: int, cards_html: str, part: int = 1, parts: int = 1,
+                 min_score: int = MIN_FIT_SCORE) -> str:
+    return _PAGE.format_map({
+        "today": today, "count_label": _count_label(count), "min_score": min_score,
+        "part_label": f" &nbsp;·&nbsp; Part {part}/{parts}" if parts > 1 else "",
+        "cards": cards_html or _NO_CARDS, "name": escape(CANDIDATE["name"]),
+    })
+
+
+def render_digest(jobs: list[Job], max_bytes: int = DIGEST_MAX_BYTES,
+                  min_score: int = MIN_FIT_SCORE) -> list[dict]:
+    """
+    Render the digest as one or more parts, each with an HTML body of at most
+    `max_bytes` (a single oversized card still gets a part of its own).
+    `min_score` is the cut-off named in the header.
+    Returns [{"subject", "html", "text", "jobs"}].
+    """
+    today = datetime.now().strftime("%A, %d %B %Y")
+    count = len(jobs)
+    overhead = len(_render_page(today, count, "-", 99, 99, 10).encode("utf-8"))
+
+    # Greedily pack pre-rendered cards into parts under the byte budget.
+    groups, current, used = [], [], overhead
+    for job in jobs:
+        html = _build_job_card(job)
+        size = len(html.encode("utf-8"))
+        if current and used + size > max_bytes:
+            groups.append(current)
+            current, used = [], overhead
+        current.append((html, job))
+        used += size
+    groups.append(current)
+
+    parts, n = [], len(groups)
+    base_subject = (f"🤖 {count} Job Match{'es' if count != 1 else ''} For You — {today}"
+                    if jobs else f"🤖 No New Jobs Today — {today}")
+    for i, group in enumerate(groups, 1):
+        text = [f"Your Daily Job Digest — {today}\n{_count_label(count)} found today"
+                + (f" · Part {i}/{n}" if n > 1 else "") + "\n\n"]
+        for _, job in group:
+            _render_card_text(text, job)
+        if not group:
+            text.append("No new jobs found today.\n")
+        parts.append({
+            "subject": base_subject + (f" (Part {i}/{n})" if n > 1 else ""),
+            "html":    _render_page(today, count, "".join(h for h, _ in group), i, n, min_score),
+            "text":    "".join(text),
+            "jobs":    [job for _, job in group],
+        })
+    return parts
+
+
+def build_html_digest(jobs: list[Job]) -> str:
+    """Single-page HTML for all jobs (no size limit) — used for previews."""
+    today = datetime.now().strftime("%A, %d %B %Y")
+    return _render_page(today, len(jobs), "".join(_build_job_card(job) for job in jobs))
+
+
+def build_no_jobs_html(min_score: int = MIN_FIT_SCORE) -> str:
     today = datetime.now().strftime("%A, %d %B %Y")
     return f"""<!DOCTYPE html>
 <html><body style="font-family:Arial;padding:24px;max-width:500px;margin:auto;">
@@ -135,13 +213,43 @@ def build_no_jobs_html() -> str:
   </div>
   <div style="padding:20px;border:1px solid #E5E7EB;border-top:none;border-radius:0 0 10px 10px;">
     <h3>No new matching jobs today</h3>
-    <p style="color:#6B7280;">The agent ran successfully but didn't find any roles scoring 6+/10.
+    <p style="color:#6B7280;">The agent ran successfully but didn't find any roles scoring {min_score}+/10.
     It will run again tomorrow at 8:30 AM.</p>
   </div>
 </body></html>"""
 
 
-def send_digest(jobs: list[dict]) -> bool:
+def build_messages(jobs: list[Job], to_addr: str, subject: str | None = None,
+                   min_score: int = MIN_FIT_SCORE) -> list[MIMEMultipart]:
+    """
+    One multipart/alternative message per digest part, addressed to `to_addr`.
+    `subject` replaces the usual digest subject (used for instant alerts);
+    `min_score` is the lowest score the recipient is sent.
+    """
+    if jobs:
+        parts = render_digest(jobs, min_score=min_score)
+        if subject:
+            for i, part in enumerate(parts, 1):
+                part["subject"] = subject + (f" (Part {i}/{len(parts)})" if len(parts) > 1 else "")
+    else:
+        today = datetime.now().strftime("%A, %d %B %Y")
+        parts = [{"subject": f"🤖 No New Jobs Today — {today}", "html": build_no_jobs_html(min_score),
+                  "text": f"No new matching jobs today ({today}).\n", "jobs": []}]
+
+    messages = []
+    for part in parts:
+        msg = MIMEMultipart("alternative")
+        msg["Subject"] = part["subject"]
+        msg["From"]    = EMAIL_SENDER
+        msg["To"]      = to_addr
+        # Clients show the last alternative they support, so HTML goes last.
+        msg.attach(MIMEText(part["text"], "plain", "utf-8"))
+        msg.attach(MIMEText(part["html"], "html", "utf-8"))
+        messages.append(msg)
+    return messages
+
+
+def send_digest(jobs: list[Job]) -> bool:
     """
     Send the daily digest email via Gmail SMTP.
     Returns True on success.
@@ -157,23 +265,16 @@ def send_digest(jobs: list[dict]) -> bool:
         _print_console_digest(jobs)
         return False
 
-    today     = datetime.now().strftime("%A, %d %B %Y")
-    count     = len(jobs)
-    subject   = f"🤖 {count} Job Match{'es' if count!=1 else ''} For You — {today}" if jobs else f"🤖 No New Jobs Today — {today}"
-    html_body = build_html_digest(jobs) if jobs else build_no_jobs_html()
-
-    msg = MIMEMultipart("alternative")
-    msg["Subject"] = subject
-    msg["From"]    = EMAIL_SENDER
-    msg["To"]      = EMAIL_TO
-    msg.attach(MIMEText(html_body, "html"))
+    messages = build_messages(jobs, EMAIL_TO)
 
     try:
         context = ssl.create_default_context()
-        with smtplib.SMTP_SSL("smtp.gmail.com", 465, context=context) as server:
+        with smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT, context=context) as server:
             server.login(EMAIL_SENDER, EMAIL_PASSWORD)
-            server.sendmail(EMAIL_SENDER, EMAIL_TO, msg.as_string())
-        print(f"[Email] ✅ Digest sent to {EMAIL_TO} — {count} jobs")
+            with span("smtp.send"):
+                for msg in messages:
+                    server.sendmail(EMAIL_SENDER, EMAIL_TO, msg.as_string())
+        print(f"[Email] ✅ Digest sent to {EMAIL_TO} — {len(jobs)} jobs in {len(messages)} part(s)")
         return True
     except smtplib.SMTPAuthenticationError:
         print("[Email] ❌ Gmail auth failed. Check your App Password in config.py")
@@ -184,37 +285,39 @@ def send_digest(jobs: list[dict]) -> bool:
         return False
 
 
-def _print_console_digest(jobs: list[dict]):
+def _print_console_digest(jobs: list[Job]):
     """Fallback: pretty print to terminal when email is not configured."""
     print("\n" + "═"*60)
     print(f"  📋 DAILY JOB DIGEST — {datetime.now().strftime('%d %b %Y')}")
     print(f"  {len(jobs)} job{'s' if len(jobs)!=1 else ''} found")
     print("═"*60)
     for j in jobs:
-        score = j.get("fit_score", 0)
-        emoji = "🔥" if score >= 9 else "⭐" if score >= 7 else "✅"
-        print(f"\n{emoji} {j['title']} @ {j['company']}")
-        print(f"   📍 {j['location']} · {j['platform']} · Score: {score}/10")
-        print(f"   💬 {j.get('ai_summary','')}")
-        print(f"   ✅ Matches: {j.get('matching_skills','N/A')}")
-        if j.get("missing_skills"):
-            print(f"   ⚠️  Missing: {j.get('missing_skills','')}")
-        print(f"   🔗 {j.get('url','')}")
+        s = j.score or ScoreResult()
+        emoji = "🔥" if s.fit_score >= 9 else "⭐" if s.fit_score >= 7 else "✅"
+        print(f"\n{emoji} {j.title} @ {j.company}")
+        print(f"   📍 {j.location} · {j.platform} · Score: {s.fit_score}/10")
+        print(f"   💬 {s.summary}")
+        print(f"   ✅ Matches: {', '.join(s.matching_skills) or 'N/A'}")
+        if s.missing_skills:
+            print(f"   ⚠️  Missing: {', '.join(s.missing_skills)}")
+        print(f"   🔗 {j.url}")
     print("\n" + "═"*60)
 
 
 if __name__ == "__main__":
     # Test with mock data
     test_jobs = [
-        {
-            "title": "Business Analyst", "company": "Deloitte India",
-            "location": "Gurugram", "platform": "LinkedIn", "url": "https://linkedin.com/jobs/test",
-            "fit_score": 9, "role_category": "Business Analyst", "role_match": "High",
-            "matching_skills": "BRD Writing, Agile, Stakeholder Management",
-            "missing_skills": "MBA",
-            "ai_summary": "Strong match — BRD and stakeholder management align perfectly.",
-            "key_requirement": "2+ years in business consulting"
-        }
+        Job(
+            title="Business Analyst", company="Deloitte India",
+            location="Gurugram", platform="LinkedIn", url="https://linkedin.com/jobs/test",
+            score=ScoreResult(
+                fit_score=9, role_category="Business Analyst", role_match="High",
+                matching_skills="BRD Writing, Agile, Stakeholder Management",
+                missing_skills="MBA",
+                summary="Strong match — BRD and stakeholder management align perfectly.",
+                key_requirement="2+ years in business consulting",
+            ),
+        )
     ]
     _print_console_digest(test_jobs)
     html = build_html_digest(test_jobs)
@@ -0,0 +1,128 @@
+"""
+notifier/smtp_standin.py — Minimal local SMTP server for exercising delivery
+
+Speaks just enough SMTP for smtplib (EHLO/HELO, AUTH PLAIN/LOGIN, MAIL, RCPT,
+DATA, RSET, NOOP, QUIT) and keeps every accepted message in memory. Commands
+are read line by line, so it also serves pipelined clients (PIPELINING is
+advertised unless pipelining=False). Plain TCP only — point delivery at it
+with use_ssl=False.
+
+    with LocalSMTPServer() as smtp:
+        deliver_digests(jobs, recipients, host=smtp.host, port=smtp.port, use_ssl=False)
+        print(smtp.messages)
+"""
+import base64
+import socket
+import socketserver
+import threading
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def setup(self):
+        super().setup()
+        # Replies go out one write each; without this, Nagle holds a pipelined
+        # group's later replies back until the client ACKs the first.
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def _reply(self, line: str):
+        self.wfile.write((line + "\r\n").encode("ascii"))
+
+    def _read_line(self) -> str:
+        return self.rfile.readline().decode("utf-8", "replace").rstrip("\r\n")
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        mail_from, rcpts = None, []
+        self._reply("220 localhost stand-in ESMTP")
+        while True:
+            line = self._read_line()
+            cmd = line[:4].upper()
+            if cmd == "EHLO":
+                self._reply("250-localhost")
+                self._reply("250-AUTH PLAIN LOGIN")
+                if server.pipelining:
+                    self._reply("250-PIPELINING")
+                self._reply("250 8BITMIME")
+            elif cmd == "HELO":
+                self._reply("250 localhost")
+            elif cmd == "AUTH":
+                args = line.split()
+                if args[1].upper() == "PLAIN":
+                    token = args[2] if len(args) > 2 else (self._reply("334 ") or self._read_line())
+                    _, user, password = base64.b64decode(token).decode().split("\0")
+                else:
+                    self._reply("334 VXNlcm5hbWU6")
+                    user = base64.b64decode(self._read_line()).decode()
+                    self._reply("334 UGFzc3dvcmQ6")
+                    password = base64.b64decode(self._read_line()).decode()
+                if server.password is not None and password != server.password:
+                    self._reply("535 5.7.8 Authentication failed")
+                else:
+                    server.logins += 1
+                    self._reply("235 2.7.0 Authentication successful")
+            elif cmd == "MAIL":
+                mail_from, rcpts = line.split(":", 1)[1].split()[0].strip("<>"), []
+                self._reply("250 OK")
+            elif cmd == "RCPT":
+                addr = line.split(":", 1)[1].strip().strip("<>")
+                if addr in server.reject:
+                    self._reply("550 5.1.1 Mailbox unavailable")
+                else:
+                    rcpts.append(addr)
+                    self._reply("250 OK")
+            elif cmd == "DATA":
+                if not rcpts:
+                    self._reply("554 5.5.1 No valid recipients")
+                    continue
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                body = []
+                while True:
+                    data = self.rfile.readline()
+                    if data in (b".\r\n", b".\n", b""):
+                        break
+                    body.append(data[1:] if data.startswith(b"..") else data)
+                with server.lock:
+                    server.messages.append({"from": mail_from, "to": list(rcpts),
+                                            "data": b"".join(body).decode("utf-8", "replace")})
+                    drop = len(server.messages) == server.drop_after
+                if drop:                # accepted but never acknowledged
+                    return
+                self._reply("250 OK queued")
+            elif cmd == "RSET":
+                mail_from, rcpts = None, []
+                self._reply("250 OK")
+            elif cmd == "NOOP":
+                self._reply("250 OK")
+            elif cmd == "QUIT":
+                self._reply("221 Bye")
+                return
+            elif not line:
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+
+class LocalSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 password: str | None = None, reject=(), pipelining: bool = True,
+                 drop_after: int | None = None):
+        super().__init__((host, port), _Handler)
+        self.host, self.port = self.server_address
+        self.password = password
+        self.reject = set(reject)        # recipients to refuse with 550
+        self.pipelining = pipelining
+        self.drop_after = drop_after     # hang up instead of acknowledging the Nth message
+        self.messages, self.connections, self.logins = [], 0, 0
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,111 @@
+"""
+profiles.py — Candidate profiles: scrape once, score and notify many people
+
+The candidate in config.py is always the "default" profile. Every
+profiles/<id>.json adds another one:
+
+    {
+      "name":             "Priya Verma",
+      "target_roles":     ["Product Manager", "Business Analyst"],
+      "target_locations": ["Bangalore", "Remote"],
+      "min_score":        6,
+      "experience_range": [2, 6],
+      "skills":           {"SQL": ["sql", "postgres"], "Figma": ["figma", "wireframe"]},
+      "role_keywords":    {"Product Manager": ["product manager", "product owner"]},
+      "recipients":       [{"email": "priya@example.com", "min_score": 7}]
+    }
+
+Only "recipients" is required; anything left out falls back to config.py.
+"skills" replaces the scorer's SKILL_VARIANTS when given; without
+"role_keywords" each target role is matched by its own name.
+
+Each scraped job is scored once per profile (job × profile). Every profile's
+score lands in the job_scores table, and each profile gets its own digest, so
+adding a profile adds scoring work but no extra scraping.
+"""
+import json
+import os
+
+from config import (PROFILES_DIR, CANDIDATE, TARGET_ROLES, TARGET_LOCATIONS,
+                    EXPERIENCE_RANGE, MIN_FIT_SCORE, RECIPIENTS)
+from models import Job
+
+DEFAULT = "default"
+
+
+def default_profile() -> dict:
+    return {"id": DEFAULT, "name": CANDIDATE["name"], "target_roles": TARGET_ROLES,
+            "target_locations": TARGET_LOCATIONS, "experience_range": EXPERIENCE_RANGE,
+            "min_score": MIN_FIT_SCORE,
+            "skills": None, "role_keywords": None, "recipients": RECIPIENTS}
+
+
+def load_profiles(profiles_dir: str = PROFILES_DIR) -> list[dict]:
+    """The default profile first, then profiles/*.json in file-name order."""
+    profiles = [default_profile()]
+    if not os.path.isdir(profiles_dir):
+        return profiles
+    for name in sorted(os.listdir(profiles_dir)):
+        if not name.endswith(".json"):
+            continue
+        pid = name[:-5]
+        if pid == DEFAULT:
+            print(f"[Profiles] Skipping {name} — 'default' is the config.py candidate")
+            continue
+        with open(os.path.join(profiles_dir, name), encoding="utf-8") as f:
+            data = json.load(f)
+        if not data.get("recipients"):
+            print(f"[Profiles] Skipping {name} — no recipients")
+            continue
+        base = default_profile()
+        profiles.append({
+            "id":               pid,
+            "name":             data.get("name", pid),
+            "target_roles":     data.get("target_roles", base["target_roles"]),
+            "target_locations": data.get("target_locations", base["target_locations"]),
+            "experience_range": tuple(data.get("experience_range", base["experience_range"])),
+            "min_score":        data.get("min_score", base["min_score"]),
+            "skills":           data.get("skills"),
+            "role_keywords":    data.get("role_keywords"),
+            "recipients":       data["recipients"],
+        })
+    return profiles
+
+
+def min_recipient_score(profile: dict) -> int:
+    """Lowest score any of the profile's recipients wants to see."""
+    return min(r.get("min_score", profile["min_score"]) for r in profile["recipients"])
+
+
+def score_threshold(profile: dict) -> int:
+    """Lowest fit_score that matters for `profile` — below it score_job may prune."""
+    return min(profile["min_score"], min_recipient_score(profile))
+
+
+def score_matrix(job: Job, profiles: list[dict], score_job) -> bool:
+    """
+    Score `job` for every profile into job.scores[profile_id]; job.score is
+    the default profile's. Returns True if any profile keeps the job.
+    Scores below a profile's score_threshold() are pruned (see score_job);
+    a kept job is stored with every profile's score, so its pruned ones are
+    then scored in full.
+    """
+    job.scores = {p["id"]: score_job(job, None if p["id"] == DEFAULT else p,
+                                     threshold=score_threshold(p))
+                  for p in profiles}
+    kept = is_kept(job, profiles)
+    if kept:
+        for p in profiles:
+            if "pruned_after" in (job.scores[p["id"]].breakdown or {}):
+                job.scores[p["id"]] = score_job(job, None if p["id"] == DEFAULT else p)
+    job.score = job.scores.get(DEFAULT)
+    return kept
+
+
+def is_kept(job: Job, profiles: list[dict]) -> bool:
+    """
+    True if some profile scored the job at or above its score_threshold() —
+    a recipient whose min_score is below the profile's still gets those jobs.
+    """
+    return any(job.scores[p["id"]].fit_score >= score_threshold(p)
+               for p in profiles if p["id"] in job.scores)
@@ -0,0 +1,172 @@
+"""
+roles.py — Title normalizer and canonical role taxonomy
+
+The same handful of roles arrive under hundreds of titles a week:
+"Sr. Business Development Executive (B2B SaaS) - Noida", "BDE - IT Sales |
+Urgent Hiring", "Business Development Executive II". classify_title() maps
+each to one canonical role from TAXONOMY:
+
+    classify_title("Sr. Business Development Executive (B2B SaaS) - Noida")
+    → "Business Development"
+
+Lookups go raw title → LRU cache → normalized title → title_roles table
+(loaded once per run) → taxonomy match, so a title seen before resolves
+without touching the taxonomy. Newly classified titles are handed back via
+drain_new() for database.save_title_roles(). Bump TAXONOMY_VERSION when the
+taxonomy changes; stored mappings from older versions are then ignored.
+
+classify_title() files every title somewhere, catch-alls included ("Tax
+Consultant" → Business Consultant). scoring_role() is the strict variant the
+scorer trusts for full role points: a title whose best phrase is one of
+BROAD_PHRASES gets "Other" there and falls back to the keyword scan.
+"""
+import re
+from functools import lru_cache
+
+from locations import resolve_location
+
+TAXONOMY_VERSION = 2   # 2: "lead" is no longer noise; "lead generation"
+OTHER = "Other"
+
+# canonical role → title phrases (matched as whole words on the normalized title;
+# the longest phrase wins, so "sales engineer" beats "engineer")
+TAXONOMY = {
+    "Business Consultant":  ["business consultant", "management consultant", "strategy consultant",
+                             "business advisory", "consultant"],
+    "Business Analyst":     ["business analyst", "ba", "systems analyst", "business systems analyst",
+                             "process analyst", "functional analyst", "functional consultant"],
+    "Product Manager":      ["product manager", "apm", "pm", "product owner", "product lead",
+                             "product management", "product specialist"],
+    "Business Development": ["business development", "bd", "bde", "bdm", "bd executive", "bd manager",
+                             "business development executive", "business development manager",
+                             "business development associate", "growth manager", "lead generation"],
+    "IT Sales":             ["it sales", "inside sales", "sales executive", "sales manager",
+                             "account executive", "account manager", "key account manager", "sales"],
+    "Pre-Sales Consultant": ["pre sales", "presales", "pre sales consultant", "presales consultant",
+                             "solution consultant", "solutions consultant",
+                             "sales engineer", "solution engineer", "bid manager"],
+    "Project Manager":      ["project manager", "program manager", "programme manager",
+                             "delivery manager", "scrum master", "project coordinator", "pmo"],
+    "Data Analyst":         ["data analyst", "mis analyst", "reporting analyst", "bi analyst"],
+    "Software Engineer":    ["software engineer", "software developer", "developer", "engineer",
+                             "programmer", "sde", "devops", "full stack", "backend", "frontend"],
+    "Data Scientist":       ["data scientist", "machine learning", "ml engineer", "ai engineer"],
+    "Marketing":            ["marketing", "digital marketing", "seo", "content writer", "brand manager"],
+    "HR / Recruiting":      ["hr", "human resources", "recruiter", "talent acquisition", "hr executive"],
+    "Finance":              ["accountant", "finance", "financial analyst", "chartered accountant", "audit"],
+    "Operations":           ["operations", "operations executive", "operations manager", "back office"],
+    "Customer Support":     ["customer support", "customer service", "customer success", "telecaller",
+                             "bpo", "voice process"],
+    "Design":               ["designer", "ui ux", "ux", "ui", "graphic designer"],
+}
+
+# Phrases that also head titles far outside their role ("SAP FICO Consultant",
+# "Head of Sales", "Real Estate Sales Executive", "PM - Civil Construction").
+BROAD_PHRASES = frozenset({
+    "consultant", "sales", "sales executive", "sales manager", "account executive",
+    "account manager", "key account manager", "pm", "ba", "bd", "engineer", "developer", "operations", "finance",
+})
+
+# Dropped before matching: seniority, levels and posting noise.
+_NOISE = [
+    "senior", "sr", "junior", "jr", "principal", "staff", "associate", "assistant",
+    "trainee", "intern", "fresher", "executive level", "entry level", "mid level",
+    "i", "ii", "iii", "iv", "1", "2", "3",
+    "urgent", "urgently", "hiring", "opening", "openings", "immediate", "joiner", "joiners",
+    "wfh", "remote", "hybrid", "onsite", "job", "jobs", "vacancy", "required", "needed",
+]
+_NOISE_RE = re.compile(r"\b(?:" + "|".join(map(re.escape, _NOISE)) + r")\b")
+# "(B2B SaaS)", "[Urgent]"; the company after " @ " / " at "; " - " / " | " parts
+_BRACKETS_RE = re.compile(r"\([^)]*\)|\[[^\]]*\]|\{[^}]*\}")
+_COMPANY_RE = re.compile(r"\s(?:@|at)\s.*$")
+_PARTS_RE = re.compile(r"\s(?:-|–|—|\|)\s")
+
+_PHRASES = sorted(((p, role) for role, ps in TAXONOMY.items() for p in ps),
+                  key=lambda pr: -len(pr[0]))
+_ROLE_OF = dict(_PHRASES)
+_TAXONOMY_RE = re.compile(r"\b(?:" + "|".join(re.escape(p) for p, _ in _PHRASES) + r")\b")
+
+# normalized title → role: rows loaded from title_roles, plus this run's new ones
+_known: dict[str, str] = {}
+_new: dict[str, str] = {}
+
+
+def normalize_title(title: str) -> str:
+    """
+    'Sr. Business Development Executive (B2B SaaS) - Noida'
+    → 'business development executive'
+    """
+    t = _COMPANY_RE.sub("", _BRACKETS_RE.sub(" ", (title or "").lower()))
+    # "Executive - Business Development" keeps both parts; "... - Noida" drops the place.
+    parts = [p for p in _PARTS_RE.split(t)
+             if not (len(p.split()) <= 3 and resolve_location(p).region)]
+    t = re.sub(r"[^a-z0-9+#]+", " ", " ".join(parts))
+    return " ".join(_NOISE_RE.sub(" ", t).split())
+
+
+def _best_phrase(normalized: str) -> str | None:
+    matches = [m.group() for m in _TAXONOMY_RE.finditer(normalized)]
+    return max(matches, key=len) if matches else None
+
+
+def _match(normalized: str) -> str:
+    phrase = _best_phrase(normalized)
+    return _ROLE_OF[phrase] if phrase else OTHER
+
+
+def _normalized(title: str) -> str:
+    norm = normalize_title(title)
+    if not norm:
+        # Everything was noise ("Senior Associate") — classify the raw words.
+        norm = " ".join(re.sub(r"[^a-z0-9+#]+", " ", (title or "").lower()).split())
+    return norm
+
+
+@lru_cache(maxsize=8192)
+def classify_title(title: str) -> str:
+    """Canonical role for a raw job title ("Other" when the taxonomy has none)."""
+    norm = _normalized(title)
+    role = _known.get(norm)
+    if role is None:
+        role = _known[norm] = _new[norm] = _match(norm)
+    return role
+
+
+@lru_cache(maxsize=8192)
+def scoring_role(title: str) -> str:
+    """classify_title(), but "Other" when only a BROAD_PHRASES catch-all matched."""
+    phrase = _best_phrase(_normalized(title))
+    return OTHER if phrase is None or phrase in BROAD_PHRASES else _ROLE_OF[phrase]
+
+
+@lru_cache(maxsize=64)
+def canonical_targets(target_roles: tuple[str, ...]) -> frozenset:
+    """Canonical roles of a profile's target_roles (e.g. TARGET_ROLES)."""
+    return frozenset(classify_title(r) for r in target_roles) - {OTHER}
+
+
+# ── PERSISTENCE HOOKS ───────────────────────────────────────────
+
+def preload(mapping: dict[str, str]):
+    """Seed the lookup with {normalized title: role} from the title_roles table."""
+    _known.update(mapping)
+
+
+def drain_new() -> dict[str, str]:
+    """Titles classified since the last call, for database.save_title_roles()."""
+    new = dict(_new)
+    _new.clear()
+    return new
+
+
+if __name__ == "__main__":
+    import sys
+    for raw in sys.argv[1:] or ["Sr. Business Development Executive (B2B SaaS) - Noida",
+                                "BDE - IT Sales | Urgent Hiring", "Associate Product Manager",
+                                "Business Analyst II", "Senior Java Developer",
+                                "Pre-Sales Consultant @ Acme", "Key Account Manager",
+                                "Senior Associate", "Executive - Business Development",
+                                "Manager - Sales | Delhi NCR", "Tax Consultant",
+                                "Lead Generation Executive", "PM - Civil Construction"]:
+        print(f"  {raw!r:<58} → {normalize_title(raw)!r:<36} {classify_title(raw):<22} "
+              f"scoring: {scoring_role(raw)}")
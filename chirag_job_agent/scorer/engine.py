@@ -9,10 +9,20 @@ Scores 0–10 based on:
   - Experience level fit (2 pts)
   - Location match (1 pt)
 """
+import hashlib
+import json
+import math
 import re
 import sys, os
+from collections import Counter, defaultdict
+from functools import lru_cache
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config import CANDIDATE, TARGET_ROLES, TARGET_LOCATIONS, EXPERIENCE_RANGE
+from config import (CANDIDATE, TARGET_ROLES, TARGET_LOCATIONS, EXPERIENCE_RANGE,
+                    EXCLUDED_COMPANIES)
+from locations import place_matches
+from roles import scoring_role, canonical_targets
+from metrics import span, timed
+from models import Job, ScoreResult
 
 
 # ── ROLE KEYWORD MAPPING ─────────────────────────────────────────
@@ -44,9 +54,10 @@ SKILL_VARIANTS = {
     "Project Coordination":     ["project coordination", "delivery", "milestone", "timeline management"],
 }
 
-# Negative signals (roles or requirements that don't match Chirag's level)
+# Negative signals (roles or requirements that don't match Chirag's level).
+# Year counts are handled by extract_experience below.
 NEGATIVE_SIGNALS = [
-    "10+ years", "15 years", "senior director", "vp of", "vice president",
+    "senior director", "vp of", "vice president",
     "cto", "ceo", "chief ", "head of product", "phd required",
     "data science", "machine learning", "deep learning", "python developer",
     "java developer", "software engineer", "backend developer", "frontend developer",
@@ -55,56 +66,308 @@ NEGATIVE_SIGNALS = [
 ]
 
 POSITIVE_SIGNALS = [
-    "0-2 years", "1-3 years", "0-3 years", "fresher", "entry level",
+    "fresher", "entry level",
     "junior", "associate", "assistant manager", "trainee",
-    "1+ year", "1-2 years", "recent graduate",
+    "recent graduate",
 ]
 
 
-def score_job(job: dict) -> dict:
+# ── EXPERIENCE EXTRACTION ───────────────────────────────────────
+# One compiled pattern covers "2 to 4 yrs", "3-5 Years", "5+ years",
+# "1.5 years", "minimum 3 years", "2 years" and "fresher". Alternatives are
+# tried left to right, so a range wins over the bare number inside it. A
+# number never starts right after a word character or a dot, so "1.5 years"
+# is not read as "5 years".
+_YEARS = r"(?:years?|yrs?)\b"
+_NUM   = r"(?<![\w.])\d{1,2}(?:\.\d+)?"
+_EXPERIENCE_RE = re.compile(rf"""
+      (?P<lo>{_NUM})\s*(?:-|–|—|to)\s*(?P<hi>{_NUM})\s*\+?\s*{_YEARS}
+    | (?P<plus>{_NUM})\s*\+\s*{_YEARS}
+    | \b(?:minimum|min\.?|at\s+least|over)\s+(?:of\s+)?(?P<least>{_NUM})\s*\+?\s*{_YEARS}
+    | (?P<single>{_NUM})\s*{_YEARS}
+    | \b(?P<fresher>freshers?|entry[\s-]level)\b
+""", re.IGNORECASE | re.VERBOSE)
+
+MAX_PLAUSIBLE_YEARS = 30   # "a 50 years old company" is not a requirement
+
+
+def extract_experience(*texts: str) -> tuple[int | None, int | None]:
+    """
+    (min_years, max_years) from the first experience mention in `texts`,
+    searched in the order given (site chip, then title, then description).
+    max_years is None for open-ended asks ("5+ years", "3 years"); (None, None)
+    when nothing is stated. Fractions widen the range: "1.5 - 3.5" → (1, 4).
+    """
+    for m in _EXPERIENCE_RE.finditer("\n".join(t for t in texts if t)):
+        if m["fresher"]:
+            return 0, 1
+        if m["lo"]:
+            lo, hi = sorted((float(m["lo"]), float(m["hi"])))
+            if hi <= MAX_PLAUSIBLE_YEARS:
+                return math.floor(lo), math.ceil(hi)
+            continue
+        years = float(m["plus"] or m["least"] or m["single"])
+        if years <= MAX_PLAUSIBLE_YEARS:
+            return math.floor(years), None
+    return None, None
+
+
+def experience_fit(exp_min: int | None, exp_max: int | None,
+                   wanted: tuple[int, int]) -> float | None:
+    """
+    0–2 points for how much of the job's range falls inside `wanted`
+    (e.g. EXPERIENCE_RANGE). Open-ended asks count as just their minimum.
+    None when the job states no experience.
+    """
+    if exp_min is None:
+        return None
+    hi = exp_max if exp_max is not None else exp_min
+    overlap = min(hi, wanted[1]) - max(exp_min, wanted[0])
+    if overlap < 0:
+        return 0
+    return round(2 * (overlap + 1) / (hi - exp_min + 1), 1)
+
+
+# ── TITLE PRE-FILTER ────────────────────────────────────────────
+# Runs inside the scrapers on title + company only, before the description
+# is parsed or anything is stored. A title is rejected only when it is
+# clearly off-profile AND names none of any profile's target roles or role
+# keywords. This is a heuristic, not a proof: score_job also scans the
+# description for role keywords, so a rejected "Software Developer" card
+# whose description mentions "product manager" would have earned role
+# points. Skipping those is the trade-off for never parsing the description.
+REJECT_TITLES = {
+    "tech_role":  ["data scientist", "data science", "machine learning", "deep learning",
+                   "python developer", "java developer", "software engineer", "software developer",
+                   "backend developer", "frontend developer", "full stack", "fullstack", "devops",
+                   "cloud engineer", "security engineer", "sre", "qa engineer", "test engineer"],
+    "too_senior": ["vp", "vice president", "cto", "ceo", "cfo", "coo", "chief",
+                   "senior director", "director", "head of"],
+}
+
+_REJECT_RE = re.compile("|".join(
+    rf"(?P<{reason}>\b(?:{'|'.join(re.escape(p) for p in phrases)})\b)"
+    for reason, phrases in REJECT_TITLES.items()
+), re.IGNORECASE)
+
+# {source: Counter(reason → n)} since the last prefilter_report()
+_rejects: dict[str, Counter] = defaultdict(Counter)
+
+# Job keys the rejected-jobs ledger already holds under the current ruleset
+_known_rejects: set[str] = set()
+
+# Bump whenever scoring rules change, so verdicts in the ledger made under the
+# old rules stop being trusted and those jobs get scored again.
+RULESET_VERSION = 4   # 2: canonical-role title match (roles.py) · 3: decimal experience years
+                      # 4: no full role points from catch-all title phrases
+
+
+def ruleset_id(profiles: list[dict]) -> str:
     """
-    Score a job against Chirag's profile.
-    Returns a score dict with fit_score 0–10 and explanation.
+    RULESET_VERSION plus a hash of every profile's scoring inputs, and the
+    learned model's generation when one is applied. Thresholds are left out
+    on purpose: lowering one promotes ledger rows instead.
     """
-    title       = (job.get("title", "") or "").lower()
-    description = (job.get("description", "") or "").lower()
-    location    = (job.get("location", "") or "").lower()
-    company     = (job.get("company", "") or "").lower()
+    from scorer.learn import model_tag
+    inputs = [{k: p.get(k) for k in ("id", "target_roles", "target_locations",
+                                      "experience_range", "skills", "role_keywords")}
+              for p in profiles]
+    digest = hashlib.sha1(json.dumps(inputs, sort_keys=True, default=list).encode()).hexdigest()
+    return f"{RULESET_VERSION}-{digest[:10]}{model_tag()}"
+
+
+def set_known_rejects(keys):
+    """Load the ledger's job keys; prefilter() then skips those jobs as "ledger"."""
+    _known_rejects.clear()
+    _known_rejects.update(keys)
+
+
+def remember_rejects(keys):
+    _known_rejects.update(keys)
+
+
+@lru_cache(maxsize=1)
+def _target_title_re() -> re.Pattern:
+    """Whole-word match for any profile's target roles, role keywords and their words."""
+    from profiles import load_profiles
+    words = set()
+    for profile in load_profiles():
+        keywords = profile.get("role_keywords") or (ROLE_KEYWORDS if profile["id"] == "default" else {})
+        for role in profile["target_roles"]:
+            words.update(w for w in role.lower().split() if len(w) > 2)
+            words.add(role.lower())
+        for kws in keywords.values():
+            words.update(k.strip().lower() for k in kws)
+    alternation = "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+    return re.compile(rf"\b(?:{alternation})\b", re.IGNORECASE)
+
+
+def prefilter(title: str, company: str = "", source: str = "", url: str = "") -> str | None:
+    """
+    Cheap first-stage check on a freshly parsed card. Returns the reject
+    reason ("ledger", "tech_role", "too_senior", "excluded_company") or None
+    to keep the job. Rejections are counted per `source` for prefilter_report().
+    """
+    reason = None
+    if _known_rejects and (url or title + company).lower()[:100] in _known_rejects:
+        reason = "ledger"
+    elif company and company.strip().lower() in _excluded_companies():
+        reason = "excluded_company"
+    else:
+        m = _REJECT_RE.search(title or "")
+        if m and not _target_title_re().search(title):
+            reason = m.lastgroup
+    if reason:
+        _rejects[source][reason] += 1
+    return reason
+
+
+@lru_cache(maxsize=1)
+def _excluded_companies() -> frozenset:
+    return frozenset(c.strip().lower() for c in EXCLUDED_COMPANIES)
+
+
+def prefilter_report(reset: bool = True) -> dict:
+    """{source: {reason: n}} of titles rejected since the last report."""
+    report = {src: dict(c) for src, c in _rejects.items() if c}
+    if reset:
+        _rejects.clear()
+    return report
+
+
+def _bound(*points) -> int:
+    """The fit_score a raw total would round to (same rounding as the final score)."""
+    return round(min(10, sum(points)))
+
+
+def _keyword_role(text: str, role_keywords: dict) -> str | None:
+    """First role in `role_keywords` with a keyword in `text` (lower-cased)."""
+    for role_name, keywords in role_keywords.items():
+        if any(kw.lower() in text for kw in keywords):
+            return role_name
+    return None
+
+
+def _pruned(matched_role: str, role_score, bound: int, threshold: int, stage: str) -> ScoreResult:
+    """Minimal result for a job that can no longer reach `threshold`."""
+    return ScoreResult(
+        fit_score=min(bound, threshold - 1),
+        role_category=matched_role,
+        role_match="Low",
+        breakdown={"pruned_after": stage, "upper_bound": bound, "role_score": role_score},
+    )
+
+
+@timed("score.job")
+def score_job(job: Job, profile: dict | None = None, threshold: int | None = None) -> ScoreResult:
+    """
+    Score a job against Chirag's profile, or against `profile` (see
+    profiles.py) for its target roles, locations and skill variants.
+    Returns a ScoreResult with fit_score 0–10 and explanation.
+
+    With `threshold`, components are scored cheapest first — role from the
+    title, location, experience, then role keywords in the description, then
+    skills — while tracking the best score still reachable. Once that falls
+    below the threshold a bare result is returned (fit_score < threshold, no
+    skills or summary, breakdown["pruned_after"] set), so only jobs that can
+    still be kept pay for the description scans and the full explanation.
+    """
+    target_roles     = profile["target_roles"]     if profile else TARGET_ROLES
+    target_locations = profile["target_locations"] if profile else TARGET_LOCATIONS
+    wanted_years     = (profile or {}).get("experience_range") or EXPERIENCE_RANGE
+    skill_variants   = (profile or {}).get("skills") or SKILL_VARIANTS
+    role_keywords    = ROLE_KEYWORDS
+    if profile:
+        role_keywords = profile.get("role_keywords") or {r: [r] for r in target_roles}
+
+    title       = (job.title or "").lower()
+    description = (job.description or "").lower()
+    location    = (job.location or "").lower()
+    company     = (job.company or "").lower()
 
     combined = f"{title} {description}"
 
     # ── 1. ROLE TITLE MATCH (0–3 pts) ───────────────────────────
+    # Title only here: the description is scanned for role keywords further
+    # down, once location and experience show the job can still be kept.
     role_score = 0
     matched_role = "General"
-    for role_name, keywords in ROLE_KEYWORDS.items():
-        for kw in keywords:
-            if kw.lower() in combined:
-                role_score = 3
-                matched_role = role_name
+    canonical = scoring_role(job.title)
+    if canonical in canonical_targets(tuple(target_roles)):
+        role_score, matched_role = 3, canonical
+    elif role := _keyword_role(title, role_keywords):
+        role_score, matched_role = 3, role
+
+    # ── 4. LOCATION FIT (0–1 pt) ────────────────────────────────
+    place = job.place
+    if place:
+        loc_score = 1 if place.work_mode == "remote" or place_matches(place, tuple(target_locations)) else 0
+    else:
+        # Not in the gazetteer — fall back to a plain substring test.
+        loc_score = 1 if any(loc.lower() in location for loc in target_locations) else 0
+
+    # ── 3. EXPERIENCE LEVEL FIT (0–2 pts) ───────────────────────
+    # Parsed once per job (not per profile); the range is stored with the job.
+    if job.exp_min is None and job.exp_max is None:
+        job.exp_min, job.exp_max = extract_experience(job.experience, job.title, job.description)
+
+    exp_score = experience_fit(job.exp_min, job.exp_max, wanted_years)
+    stated = exp_score is not None
+    if not stated:
+        exp_score = 1.5  # default: assume OK
+
+    # Negative: seniority or off-profile requirements
+    for neg in NEGATIVE_SIGNALS:
+        if neg.lower() in combined:
+            exp_score = max(0, exp_score - 0.5)
+
+    # Positive: matches fresh/junior profile (only when no years are stated)
+    if not stated:
+        for pos in POSITIVE_SIGNALS:
+            if pos.lower() in combined:
+                exp_score = 2
                 break
-        if role_score > 0:
-            break
+
+    # A title without a role keyword can still earn the full 3 from the description.
+    best = _bound(role_score or 3, 4, exp_score, loc_score)
+    if threshold is not None and best < threshold:
+        return _pruned(matched_role, role_score, best, threshold, "experience")
+
+    if role_score == 0 and (role := _keyword_role(combined, role_keywords)):
+        role_score, matched_role = 3, role
 
     # Partial match — any target role keyword in title
     if role_score == 0:
-        for target in TARGET_ROLES:
+        for target in target_roles:
             if any(word.lower() in title for word in target.split()):
                 role_score = 1.5
                 matched_role = target
                 break
 
+    # Complete role mismatch caps the score at 4, whatever else matches.
+    cap = 4 if role_score == 0 else 10
+    best = min(cap, _bound(role_score, 4, exp_score, loc_score))
+    if threshold is not None and best < threshold:
+        return _pruned(matched_role, role_score, best, threshold, "role")
+
     # ── 2. SKILL OVERLAP (0–4 pts) ──────────────────────────────
     matched_skills = []
-    missing_skills = []
     skill_score    = 0
 
-    for skill_name, variants in SKILL_VARIANTS.items():
+    for skill_name, variants in skill_variants.items():
         found = any(v.lower() in combined for v in variants)
         if found:
             matched_skills.append(skill_name)
 
     skill_score = min(4, len(matched_skills) * 0.6)
 
+    # ── FINAL SCORE ─────────────────────────────────────────────
+    raw_score    = role_score + skill_score + exp_score + loc_score
+    fit_score    = min(cap, round(min(10, raw_score)))
+
+    if threshold is not None and fit_score < threshold:
+        return _pruned(matched_role, role_score, fit_score, threshold, "skills")
+
     # Check for skills in JD that Chirag might be missing
     required_maybe_missing = []
     missing_indicators = [
@@ -118,73 +381,43 @@ def score_job(job: dict) -> dict:
         if any(ind in combined for ind in indicators):
             required_maybe_missing.append(skill_label)
 
-    # ── 3. EXPERIENCE LEVEL FIT (0–2 pts) ───────────────────────
-    exp_score = 1.5  # default: assume OK
-
-    # Negative: requires too much experience
-    for neg in NEGATIVE_SIGNALS:
-        if neg.lower() in combined:
-            if "years" in neg or "year" in neg:
-                exp_score = 0
-            else:
-                exp_score = max(0, exp_score - 0.5)
-
-    # Positive: matches fresh/junior profile
-    for pos in POSITIVE_SIGNALS:
-        if pos.lower() in combined:
-            exp_score = 2
-            break
-
-    # ── 4. LOCATION FIT (0–1 pt) ────────────────────────────────
-    loc_score = 0
-    for loc in TARGET_LOCATIONS:
-        if loc.lower() in location:
-            loc_score = 1
-            break
-    if "remote" in location or "work from home" in location or "wfh" in location:
-        loc_score = 1
-
-    # ── FINAL SCORE ─────────────────────────────────────────────
-    raw_score    = role_score + skill_score + exp_score + loc_score
-    fit_score    = round(min(10, raw_score))
-
-    # Penalty for complete role mismatch
-    if role_score == 0:
-        fit_score = min(fit_score, 4)
-
     # ── ROLE MATCH LABEL ────────────────────────────────────────
-    if fit_score >= 8:
-        role_match = "High"
-    elif fit_score >= 6:
-        role_match = "Medium"
-    else:
-        role_match = "Low"
+    role_match = _role_match(fit_score)
 
     # ── GENERATE HUMAN SUMMARY ──────────────────────────────────
     summary = _generate_summary(
-        job["title"], fit_score, matched_role,
+        job.title, fit_score, matched_role,
         matched_skills, required_maybe_missing, role_score, exp_score
     )
 
     # ── KEY REQUIREMENT ─────────────────────────────────────────
     key_req = _extract_key_requirement(description)
 
-    return {
-        "fit_score":       fit_score,
-        "role_category":   matched_role,
-        "role_match":      role_match,
-        "matching_skills": matched_skills[:6],
-        "missing_skills":  required_maybe_missing[:4],
-        "key_requirement": key_req,
-        "summary":         summary,
+    return ScoreResult(
+        fit_score=fit_score,
+        role_category=matched_role,
+        role_match=role_match,
+        matching_skills=matched_skills[:6],
+        missing_skills=required_maybe_missing[:4],
+        key_requirement=key_req,
+        summary=summary,
         # Debug breakdown
-        "_breakdown": {
+        breakdown={
             "role_score": role_score,
             "skill_score": round(skill_score, 1),
             "exp_score": exp_score,
             "loc_score": loc_score,
-        }
-    }
+            "skills": matched_skills,
+        },
+    )
+
+
+def _role_match(fit_score: int) -> str:
+    if fit_score >= 8:
+        return "High"
+    if fit_score >= 6:
+        return "Medium"
+    return "Low"
 
 
 def _generate_summary(title, score, matched_role, skills, missing, role_score, exp_score) -> str:
@@ -224,38 +457,39 @@ def _extract_key_requirement(description: str) -> str:
     return ""
 
 
-def batch_score(jobs: list[dict]) -> list[dict]:
-    """Score a list of jobs. Returns jobs with score data attached."""
+def batch_score(jobs: list[Job], threshold: int | None = None) -> list[Job]:
+    """Score a list of jobs. Returns the jobs with .score set (pruned below `threshold`)."""
     scored = []
-    for job in jobs:
-        try:
-            score_data = score_job(job)
-            job.update(score_data)
-            scored.append(job)
-        except Exception as e:
-            print(f"  [Scorer] Error scoring '{job.get('title')}': {e}")
+    with span("score.batch"):
+        for job in jobs:
+            try:
+                job.score = score_job(job, threshold=threshold)
+                scored.append(job)
+            except Exception as e:
+                print(f"  [Scorer] Error scoring '{job.title}': {e}")
     return scored
 
 
 if __name__ == "__main__":
     # Test with sample job
-    test_job = {
-        "title": "Business Analyst - Digital Transformation",
-        "company": "Deloitte India",
-        "location": "Gurugram, Delhi NCR",
-        "description": (
+    test_job = Job(
+        title="Business Analyst - Digital Transformation",
+        company="Deloitte India",
+        location="Gurugram, Delhi NCR",
+        description=(
             "Looking for a Business Analyst with 1-3 years of experience. "
             "You will be responsible for BRD writing, stakeholder management, and "
             "collaborating with cross-functional teams. Experience with Agile/Scrum "
             "methodology required. HubSpot CRM knowledge is a plus. "
             "Strong communication and presentation skills needed."
         )
-    }
+    )
     result = score_job(test_job)
     print(f"\n--- Score Result ---")
-    print(f"Score:     {result['fit_score']}/10 ({result['role_match']})")
-    print(f"Category:  {result['role_category']}")
-    print(f"Matches:   {result['matching_skills']}")
-    print(f"Missing:   {result['missing_skills']}")
-    print(f"Summary:   {result['summary']}")
-    print(f"Breakdown: {result['_breakdown']}")
+    print(f"Score:     {result.fit_score}/10 ({result.role_match})")
+    print(f"Category:  {result.role_category}")
+    print(f"Matches:   {result.matching_skills}")
+    print(f"Missing:   {result.missing_skills}")
+    print(f"Summary:   {result.summary}")
+    print(f"Breakdown: {result.breakdown}")
+    print(f"Years:     {test_job.exp_min}–{test_job.exp_max} (wanted {EXPERIENCE_RANGE})")
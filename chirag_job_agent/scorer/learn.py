@@ -0,0 +1,194 @@
+"""
+scorer/learn.py — Scoring weights learned from your own outcomes
+
+score_job's points (3 role / 4 skills / 2 experience / 1 location, 0.6 per
+skill) are hand-set guesses. Once stored jobs are labelled from the CLI
+
+    python main.py label 412 applied
+    python main.py label 415 ignored --note "agency, no salary"
+
+`python main.py train` fits a logistic regression (NumPy) on the scorer's own
+feature vector for each labelled job — the role / experience / location
+component scores plus one 0/1 hit per skill in SKILL_VARIANTS — predicting
+"applied or interview" against "rejected or ignored":
+
+  - the first fit is a batch fit; 20% of the labels are held out to report
+    accuracy (next to the majority-class baseline), then it refits on all
+  - after that each new label nudges the weights with one online SGD step:
+    `label` does it straight away, `train` catches up on any it missed, and
+    `train --full` starts a fresh batch fit (a new "generation")
+
+With a model saved, apply_model() re-scores a batch of default-profile
+results in one matrix product. Labelled jobs were all shortlisted first, so
+P(apply) is P(apply | shortlisted) and small on its own; it is read against
+the labels' base rate ("prior") and moves the rule score by at most
+LEARNED_POINTS either way:
+
+    lift      = (p - prior) / (1 - prior)   if p >= prior
+                (p - prior) / prior         otherwise          (-1 … +1)
+    fit_score = rule_score + round(LEARNED_POINTS × lift)
+
+so a model that has learned nothing leaves the shortlist as it was. The
+rule score still gates — jobs it pruned below threshold stay pruned — and is
+kept in breakdown["rule_score"]. Labels are the default candidate's, so
+other profiles keep their rule scores.
+
+NumPy is optional: without it scoring stays rule-based and `train` says so.
+"""
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import numpy as np
+except ImportError:          # optional dependency
+    np = None
+
+from scorer.engine import score_job, SKILL_VARIANTS, _role_match
+
+# outcome (main.py label) → training label
+OUTCOMES = {"applied": 1, "interview": 1, "rejected": 0, "ignored": 0}
+
+COMPONENTS = ("role_score", "exp_score", "loc_score")
+FEATURES = [*COMPONENTS, *(f"skill:{s}" for s in SKILL_VARIANTS)]
+
+MIN_LABELS     = 20      # below this (or with one class only) there is nothing to learn
+HOLDOUT        = 0.2
+EPOCHS         = 500
+LEARNING_RATE  = 0.5     # batch gradient descent
+ONLINE_RATE    = 0.05    # one SGD step per new label
+L2             = 0.01
+LEARNED_POINTS = 2       # most a learned probability moves a rule score, either way
+
+_model: dict | None = None
+
+
+# ── FEATURES ────────────────────────────────────────────────────
+
+def feature_vector(breakdown: dict) -> list[float]:
+    """FEATURES for one unpruned score_job() breakdown."""
+    skills = set(breakdown.get("skills") or ())
+    return ([float(breakdown[c]) for c in COMPONENTS] +
+            [1.0 if s in skills else 0.0 for s in SKILL_VARIANTS])
+
+
+def _dataset(labelled) -> tuple:
+    """(X, y) for [(job, labelled_at), ...] — jobs are re-scored without pruning."""
+    X = [feature_vector(score_job(job).breakdown) for job, _ in labelled]
+    y = [OUTCOMES[job.status.lower()] for job, _ in labelled]
+    return np.array(X, dtype=float), np.array(y, dtype=float)
+
+
+def _sigmoid(z):
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -30, 30)))
+
+
+def _fit(X, y) -> tuple:
+    w, b = np.zeros(X.shape[1]), 0.0
+    for _ in range(EPOCHS):
+        err = _sigmoid(X @ w + b) - y
+        w -= LEARNING_RATE * (X.T @ err / len(y) + L2 * w)
+        b -= LEARNING_RATE * err.mean()
+    return w, b
+
+
+# ── TRAINING ────────────────────────────────────────────────────
+
+def train(labelled: list) -> dict:
+    """
+    Batch fit on [(job, labelled_at), ...]. Returns the model dict for
+    database.save_score_model(), with held-out "accuracy" and "baseline".
+    Raises ValueError when there are too few labels to learn from.
+    """
+    X, y = _dataset(labelled)
+    if len(y) < MIN_LABELS or len(set(y.tolist())) < 2:
+        raise ValueError(f"need {MIN_LABELS}+ labels covering both kept and passed-on jobs "
+                         f"(have {len(y)}, {int(y.sum())} applied/interview)")
+
+    order = np.random.default_rng(0).permutation(len(y))
+    cut = max(1, int(len(y) * HOLDOUT))
+    test, fit_on = order[:cut], order[cut:]
+    w, b = _fit(X[fit_on], y[fit_on])
+    accuracy = float(((_sigmoid(X[test] @ w + b) >= 0.5) == y[test]).mean())
+    baseline = float(max(y[test].mean(), 1 - y[test].mean()))
+
+    w, b = _fit(X, y)
+    return {"features": FEATURES, "weights": w.tolist(), "bias": float(b),
+            "prior": float(y.mean()),
+            "generation": None, "n_labels": len(y), "accuracy": accuracy,
+            "baseline": baseline, "labelled_through": labelled[-1][1]}
+
+
+def update(model: dict, labelled: list) -> dict:
+    """
+    One SGD step per new label, in label order. "accuracy" is measured
+    predict-then-update, i.e. on labels the model had not seen yet.
+    """
+    X, y = _dataset(labelled)
+    w, b = np.array(model["weights"], dtype=float), float(model["bias"])
+    correct = 0
+    for x, t in zip(X, y):
+        p = _sigmoid(x @ w + b)
+        correct += int((p >= 0.5) == t)
+        w -= ONLINE_RATE * ((p - t) * x + L2 * w)
+        b -= ONLINE_RATE * (p - t)
+    n = model["n_labels"] + len(y)
+    return {**model, "weights": w.tolist(), "bias": b,
+            "prior": (model["prior"] * model["n_labels"] + float(y.sum())) / n,
+            "n_labels": n, "accuracy": correct / len(y),
+            "labelled_through": labelled[-1][1]}
+
+
+# ── INFERENCE ───────────────────────────────────────────────────
+
+def set_model(model: dict | None):
+    """Apply `model` (database.get_score_model()) from now on; None → rule scores only."""
+    global _model
+    if model and model["features"] != FEATURES:
+        print("[Learn] Saved model was trained on a different skill list — "
+              "ignoring it until `main.py train --full`.")
+        model = None
+    if model and np is None:
+        print("[Learn] NumPy not installed — using rule-based scores.")
+        model = None
+    if model:
+        model = {**model, "w": np.array(model["weights"], dtype=float)}
+    _model = model
+
+
+def model_tag() -> str:
+    """Suffix for ruleset_id(): a new batch fit invalidates ledger verdicts, online steps don't."""
+    return f"-m{_model['generation']}" if _model else ""
+
+
+def learned_score(rule_score: int, p: float, prior: float) -> int:
+    """The rule score moved by up to LEARNED_POINTS, by how far `p` sits from `prior`."""
+    lift = (p - prior) / (1 - prior) if p >= prior else (p - prior) / prior
+    return max(0, min(10, rule_score + round(LEARNED_POINTS * lift)))
+
+
+def apply_model(jobs: list) -> int:
+    """
+    Adjust the default-profile fit_score of every unpruned job by the learned
+    probability, vectorized over the batch. Returns how many were re-scored.
+    """
+    if _model is None:
+        return 0
+    scored = [j for j in jobs
+              if j.score and j.score.breakdown and "pruned_after" not in j.score.breakdown]
+    if not scored:
+        return 0
+    X = np.array([feature_vector(j.score.breakdown) for j in scored])
+    p = _sigmoid(X @ _model["w"] + _model["bias"])
+    for job, prob in zip(scored, p.tolist()):
+        s = job.score
+        s.breakdown["rule_score"] = s.fit_score
+        s.breakdown["learned_p"] = round(prob, 3)
+        s.fit_score = learned_score(s.fit_score, prob, _model["prior"])
+        s.role_match = _role_match(s.fit_score)
+    return len(scored)
+
+
+def top_weights(model: dict, n: int = 6) -> list[tuple[str, float]]:
+    """The `n` features with the largest absolute weight."""
+    pairs = zip(model["features"], model["weights"])
+    return sorted(pairs, key=lambda fw: -abs(fw[1]))[:n]
@@ -10,6 +10,11 @@ from bs4 import BeautifulSoup
 from urllib.parse import urlencode
 import sys, os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from htmltext import html_to_text
+from locations import resolve_location
+from metrics import span
+from models import Job
+from scorer.engine import prefilter
 
 USER_AGENTS = [
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/120.0.0.0 Safari/537.36",
@@ -27,15 +32,19 @@ INDEED_SEARCHES = [
 ]
 
 
-def scrape_indeed_rss(max_jobs: int = 40) -> list[dict]:
+def scrape_indeed_rss(max_jobs: int = 40, session=None, searches=None) -> list[Job]:
     """
     Use Indeed's free RSS feed endpoint.
     https://in.indeed.com/rss?q=keyword&l=location&sort=date&fromage=1
+    Pass a requests.Session to reuse its connection pool (main.py serve),
+    and `searches` to run only those INDEED_SEARCHES entries (main.py --shard).
     """
+    http = session or requests
+    searches = INDEED_SEARCHES if searches is None else searches
     all_jobs = []
     seen_urls = set()
 
-    for search in INDEED_SEARCHES:
+    for search in searches:
         if len(all_jobs) >= max_jobs:
             break
         try:
@@ -49,11 +58,12 @@ def scrape_indeed_rss(max_jobs: int = 40) -> list[dict]:
             rss_url = "https://in.indeed.com/rss?" + urlencode(params)
             print(f"  [Indeed] Querying RSS: {search['q']} in {search['l']}")
 
-            resp = requests.get(
-                rss_url,
-                headers={"User-Agent": random.choice(USER_AGENTS)},
-                timeout=15
-            )
+            with span("indeed.request"):
+                resp = http.get(
+                    rss_url,
+                    headers={"User-Agent": random.choice(USER_AGENTS)},
+                    timeout=15
+                )
 
             if resp.status_code != 200:
                 print(f"  [Indeed] Status {resp.status_code}")
@@ -61,6 +71,7 @@ def scrape_indeed_rss(max_jobs: int = 40) -> list[dict]:
                 continue
 
             # Parse XML RSS
+            parsing = span("indeed.parse").start()
             root = ET.fromstring(resp.content)
             ns   = {"content": "http://purl.org/rss/1.0/modules/content/"}
             items = root.findall(".//item")
@@ -73,36 +84,40 @@ def scrape_indeed_rss(max_jobs: int = 40) -> list[dict]:
                     desc    = item.findtext("description", "").strip()
                     pub     = item.findtext("pubDate", "").strip()
 
-                    # Clean HTML from description
-                    if desc:
-                        desc = BeautifulSoup(desc, "html.parser").get_text(" ", strip=True)
                     # Remove tracking junk from URL
                     clean_url = link.split("?")[0] if link else ""
 
                     if not title or not clean_url or clean_url in seen_urls:
                         continue
                     seen_urls.add(clean_url)
-
-                    all_jobs.append({
-                        "title":           title,
-                        "company":         company or "Unknown",
-                        "location":        search["l"],
-                        "url":             clean_url,
-                        "platform":        "Indeed",
-                        "employment_type": "Full-time",
-                        "description":     desc[:2000],
-                        "posted_date":     pub,
-                    })
+                    title, location = _split_rss_title(title)
+                    if prefilter(title, company, "Indeed", clean_url):
+                        continue
+                    # Clean HTML from description
+                    desc = html_to_text(desc)
+
+                    all_jobs.append(Job(
+                        title=title,
+                        company=company or "Unknown",
+                        # The search location is only Indeed's radius filter — last resort.
+                        location=location or search["l"],
+                        url=clean_url,
+                        platform="Indeed",
+                        employment_type="Full-time",
+                        description=desc,
+                        posted_date=pub,
+                    ))
 
                 except Exception:
                     continue
+            parsing.stop()
 
             print(f"  [Indeed] Collected {len(items)} items — total so far: {len(all_jobs)}")
             time.sleep(random.uniform(2, 4))
 
         except ET.ParseError as e:
             print(f"  [Indeed] XML parse error: {e} — trying HTML fallback")
-            html_jobs = _scrape_indeed_html(search["q"], search["l"], seen_urls)
+            html_jobs = _scrape_indeed_html(search["q"], search["l"], seen_urls, http)
             all_jobs.extend(html_jobs)
         except Exception as e:
             print(f"  [Indeed] Error: {e}")
@@ -111,17 +126,30 @@ def scrape_indeed_rss(max_jobs: int = 40) -> list[dict]:
     return all_jobs[:max_jobs]
 
 
-def _scrape_indeed_html(query: str, location: str, seen_urls: set) -> list[dict]:
+def _split_rss_title(title: str) -> tuple[str, str]:
+    """
+    RSS titles look like "Business Analyst - Acme Corp - Noida, Uttar Pradesh".
+    Returns (title, location) when the last part is a known place, else (title, "").
+    """
+    head, sep, tail = title.rpartition(" - ")
+    if sep and resolve_location(tail):
+        return head.strip(), tail.strip()
+    return title, ""
+
+
+def _scrape_indeed_html(query: str, location: str, seen_urls: set, http=requests) -> list[Job]:
     """Fallback: scrape Indeed HTML search results."""
     jobs = []
     try:
         params = {"q": query, "l": location, "sort": "date", "fromage": "1"}
         url = "https://in.indeed.com/jobs?" + urlencode(params)
-        resp = requests.get(
-            url,
-            headers={"User-Agent": random.choice(USER_AGENTS)},
-            timeout=15
-        )
+        with span("indeed.request"):
+            resp = http.get(
+                url,
+                headers={"User-Agent": random.choice(USER_AGENTS)},
+                timeout=15
+            )
+        parsing = span("indeed.parse").start()
         soup = BeautifulSoup(resp.text, "html.parser")
         cards = soup.select("div.job_seen_beacon, div.resultContent, td.resultContent")
 
@@ -141,15 +169,14 @@ def _scrape_indeed_html(query: str, location: str, seen_urls: set) -> list[dict]
                 if not title or not job_url or job_url in seen_urls:
                     continue
                 seen_urls.add(job_url)
+                if prefilter(title, company, "Indeed", job_url):
+                    continue
 
-                jobs.append({
-                    "title": title, "company": company, "location": loc,
-                    "url": job_url, "platform": "Indeed",
-                    "employment_type": "Full-time", "description": "",
-                    "posted_date": "",
-                })
+                jobs.append(Job(title=title, company=company, location=loc,
+                                url=job_url, platform="Indeed"))
             except Exception:
                 continue
+        parsing.stop()
     except Exception as e:
         print(f"  [Indeed HTML] Error: {e}")
     return jobs
@@ -158,5 +185,5 @@ def _scrape_indeed_html(query: str, location: str, seen_urls: set) -> list[dict]
 if __name__ == "__main__":
     jobs = scrape_indeed_rss(max_jobs=10)
     for j in jobs:
-        print(f"  ✓ {j['title']} @ {j['company']} [{j['platform']}]")
+        print(f"  ✓ {j.title} @ {j.company} [{j.platform}]")
     print(f"Total: {len(jobs)}")
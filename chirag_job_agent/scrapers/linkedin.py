@@ -9,7 +9,10 @@ from bs4 import BeautifulSoup
 from urllib.parse import urlencode, quote_plus
 import sys, os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config import SEARCH_QUERIES, TARGET_LOCATIONS
+from htmltext import element_text
+from metrics import span
+from models import Job
+from scorer.engine import prefilter
 
 # Rotate user agents to avoid blocks
 USER_AGENTS = [
@@ -20,6 +23,16 @@ USER_AGENTS = [
 ]
 
 
+# (query, location) pairs searched each run
+LINKEDIN_SEARCHES = [
+    ("business consultant", "Delhi NCR, India"),
+    ("business analyst", "Noida, India"),
+    ("product manager", "Gurugram, India"),
+    ("IT sales business development", "Delhi, India"),
+    ("pre-sales consultant", "Delhi NCR, India"),
+]
+
+
 def get_headers():
     return {
         "User-Agent": random.choice(USER_AGENTS),
@@ -32,23 +45,18 @@ def get_headers():
     }
 
 
-def scrape_linkedin(max_jobs: int = 40) -> list[dict]:
+def scrape_linkedin(max_jobs: int = 40, session=None, searches=None) -> list[Job]:
     """
     Scrape LinkedIn public job listings.
     Uses the public /jobs/search/ endpoint — no login needed.
+    Pass a requests.Session to reuse its connection pool (main.py serve),
+    and `searches` to run only those (query, location) pairs (main.py --shard).
     """
+    http = session or requests
+    searches = LINKEDIN_SEARCHES if searches is None else searches
     all_jobs = []
     seen_urls = set()
 
-    # Search for multiple query+location combinations
-    searches = [
-        ("business consultant", "Delhi NCR, India"),
-        ("business analyst", "Noida, India"),
-        ("product manager", "Gurugram, India"),
-        ("IT sales business development", "Delhi, India"),
-        ("pre-sales consultant", "Delhi NCR, India"),
-    ]
-
     for keyword, location in searches:
         if len(all_jobs) >= max_jobs:
             break
@@ -63,12 +71,14 @@ def scrape_linkedin(max_jobs: int = 40) -> list[dict]:
             url = "https://www.linkedin.com/jobs/search/?" + urlencode(params)
             print(f"  [LinkedIn] Searching: {keyword} in {location}")
 
-            resp = requests.get(url, headers=get_headers(), timeout=15)
+            with span("linkedin.request"):
+                resp = http.get(url, headers=get_headers(), timeout=15)
             if resp.status_code != 200:
                 print(f"  [LinkedIn] Status {resp.status_code} — skipping")
                 time.sleep(random.uniform(3, 6))
                 continue
 
+            parsing = span("linkedin.parse").start()
             soup = BeautifulSoup(resp.text, "html.parser")
             job_cards = soup.select("div.job-search-card, li.jobs-search-results__list-item, div.base-card")
 
@@ -99,6 +109,8 @@ def scrape_linkedin(max_jobs: int = 40) -> list[dict]:
                     if not job_url or job_url in seen_urls:
                         continue
                     seen_urls.add(job_url)
+                    if prefilter(title, company, "LinkedIn", job_url):
+                        continue
 
                     # Posted time
                     time_el = card.select_one("time, span.job-search-card__listdate")
@@ -106,21 +118,22 @@ def scrape_linkedin(max_jobs: int = 40) -> list[dict]:
 
                     # Try to get description snippet
                     desc_el = card.select_one("p.job-search-card__snippet, div.job-card-list__footer-wrapper")
-                    description = desc_el.get_text(strip=True) if desc_el else ""
-
-                    all_jobs.append({
-                        "title":          title,
-                        "company":        company,
-                        "location":       location_text,
-                        "url":            job_url,
-                        "platform":       "LinkedIn",
-                        "employment_type": "Full-time",
-                        "description":    description,
-                        "posted_date":    posted,
-                    })
+                    description = element_text(desc_el)
+
+                    all_jobs.append(Job(
+                        title=title,
+                        company=company,
+                        location=location_text,
+                        url=job_url,
+                        platform="LinkedIn",
+                        employment_type="Full-time",
+                        description=description,
+                        posted_date=posted,
+                    ))
 
                 except Exception as e:
                     continue
+            parsing.stop()
 
             print(f"  [LinkedIn] Found {len(job_cards)} cards, collected {len(all_jobs)} total")
             time.sleep(random.uniform(4, 8))   # polite delay
@@ -135,5 +148,5 @@ def scrape_linkedin(max_jobs: int = 40) -> list[dict]:
 if __name__ == "__main__":
     jobs = scrape_linkedin(max_jobs=10)
     for j in jobs:
-        print(f"  ✓ {j['title']} @ {j['company']} — {j['platform']}")
+        print(f"  ✓ {j.title} @ {j.company} — {j.platform}")
     print(f"Total: {len(jobs)}")
@@ -8,6 +8,10 @@ from bs4 import BeautifulSoup
 from urllib.parse import urlencode, quote
 import sys, os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from htmltext import element_text, DESCRIPTION_CHARS
+from metrics import span
+from models import Job
+from scorer.engine import prefilter
 
 USER_AGENTS = [
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
@@ -24,39 +28,45 @@ NAUKRI_SEARCHES = [
 ]
 
 
-def scrape_naukri(max_jobs: int = 40) -> list[dict]:
+def scrape_naukri(max_jobs: int = 40, session=None, searches=None) -> list[Job]:
     """
     Scrape Naukri.com search results pages.
     Uses clean URL structure: naukri.com/{keyword}-jobs-in-{location}
+    Pass a requests.Session to reuse its connection pool (main.py serve),
+    and `searches` to run only those NAUKRI_SEARCHES entries (main.py --shard).
     """
+    http = session or requests
+    searches = NAUKRI_SEARCHES if searches is None else searches
     all_jobs = []
     seen_urls = set()
 
-    for keyword, location in NAUKRI_SEARCHES:
+    for keyword, location in searches:
         if len(all_jobs) >= max_jobs:
             break
         try:
             url = f"https://www.naukri.com/{keyword}-in-{location}"
             print(f"  [Naukri] Scraping: {url}")
 
-            resp = requests.get(
-                url,
-                headers={
-                    "User-Agent":      random.choice(USER_AGENTS),
-                    "Accept":          "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-                    "Accept-Language": "en-US,en;q=0.5",
-                    "Accept-Encoding": "gzip, deflate, br",
-                    "Referer":         "https://www.naukri.com/",
-                    "Connection":      "keep-alive",
-                },
-                timeout=20
-            )
+            with span("naukri.request"):
+                resp = http.get(
+                    url,
+                    headers={
+                        "User-Agent":      random.choice(USER_AGENTS),
+                        "Accept":          "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+                        "Accept-Language": "en-US,en;q=0.5",
+                        "Accept-Encoding": "gzip, deflate, br",
+                        "Referer":         "https://www.naukri.com/",
+                        "Connection":      "keep-alive",
+                    },
+                    timeout=20
+                )
 
             if resp.status_code != 200:
                 print(f"  [Naukri] Status {resp.status_code}")
                 time.sleep(5)
                 continue
 
+            parsing = span("naukri.parse").start()
             soup = BeautifulSoup(resp.text, "html.parser")
 
             # Naukri uses article tags for job cards
@@ -89,12 +99,14 @@ def scrape_naukri(max_jobs: int = 40) -> list[dict]:
                         "a.subTitle, a[class*='companyName'], span[class*='comp-name'], .company-name"
                     )
                     company = company_el.get_text(strip=True) if company_el else "Unknown"
+                    if prefilter(title, company, "Naukri", job_url):
+                        continue
 
                     # Location
                     loc_el = card.select_one(
                         "li[class*='location'], span[class*='loc'], ul.top-jd-dtl li:nth-child(2)"
                     )
-                    location_text = loc_el.get_text(strip=True) if loc_el else "Delhi NCR"
+                    location_text = loc_el.get_text(strip=True) if loc_el else ""
 
                     # Experience
                     exp_el = card.select_one(
@@ -106,7 +118,7 @@ def scrape_naukri(max_jobs: int = 40) -> list[dict]:
                     desc_el = card.select_one(
                         "div[class*='job-description'], span[class*='job-desc'], ul[class*='tags-gt']"
                     )
-                    description = desc_el.get_text(" ", strip=True) if desc_el else ""
+                    description = element_text(desc_el)
 
                     # Skills tags
                     skill_tags = card.select("ul[class*='tags-gt'] li, span[class*='skill-tag']")
@@ -114,19 +126,20 @@ def scrape_naukri(max_jobs: int = 40) -> list[dict]:
                         skills_str = ", ".join(s.get_text(strip=True) for s in skill_tags)
                         description = (description + " Skills: " + skills_str).strip()
 
-                    all_jobs.append({
-                        "title":           title,
-                        "company":         company,
-                        "location":        location_text,
-                        "url":             job_url,
-                        "platform":        "Naukri",
-                        "employment_type": "Full-time",
-                        "description":     description[:2000],
-                        "posted_date":     "",
-                    })
+                    all_jobs.append(Job(
+                        title=title,
+                        company=company,
+                        location=location_text,
+                        url=job_url,
+                        platform="Naukri",
+                        employment_type="Full-time",
+                        description=description[:DESCRIPTION_CHARS],
+                        experience=experience,
+                    ))
 
                 except Exception:
                     continue
+            parsing.stop()
 
             print(f"  [Naukri] Parsed {len(cards)} cards — total: {len(all_jobs)}")
             time.sleep(random.uniform(4, 7))   # Be polite
@@ -141,5 +154,5 @@ def scrape_naukri(max_jobs: int = 40) -> list[dict]:
 if __name__ == "__main__":
     jobs = scrape_naukri(max_jobs=10)
     for j in jobs:
-        print(f"  ✓ {j['title']} @ {j['company']} [{j['platform']}]")
+        print(f"  ✓ {j.title} @ {j.company} [{j.platform}]")
     print(f"Total: {len(jobs)}")
@@ -0,0 +1,344 @@
+"""
+segments.py — Append-only segment storage for git-friendly persistence
+
+In STORAGE_MODE "segments" the committed state is data/segments/, not jobs.db:
+  - every run writes one gzip'd JSON-lines segment holding only the jobs that
+    were inserted / updated / deleted during the run, plus new run_log rows,
+    rejected-jobs ledger entries written or removed (promoted, expired),
+    learned scoring models and outbox messages that were queued, retried,
+    sent or purged
+  - segment files are named by the hash of their content and never change,
+    so a run's commit costs O(new rows) bytes
+  - MANIFEST lists the segments in apply order; on start-up any segment not
+    yet in the local jobs.db is replayed (a fresh checkout replays all of them)
+  - once SEGMENT_COMPACT_AT segments pile up they are folded into a single
+    snapshot segment so cold-start rebuilds stay fast
+"""
+import gzip
+import hashlib
+import json
+import os
+import time
+import zlib
+from datetime import datetime
+
+import database
+from config import SEGMENT_DIR, SEGMENT_COMPACT_AT
+from database import get_conn, _write_description, _write_skills, _write_scores
+from models import Job, ScoreResult
+
+FORMAT_VERSION = 1
+MANIFEST = "MANIFEST"
+
+
+# ── FILES ───────────────────────────────────────────────────────
+
+def _read_manifest(seg_dir: str) -> list[str]:
+    path = os.path.join(seg_dir, MANIFEST)
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def _write_manifest(seg_dir: str, names: list[str]):
+    tmp = os.path.join(seg_dir, MANIFEST + ".tmp")
+    with open(tmp, "w") as f:
+        f.write("".join(n + "\n" for n in names))
+    os.replace(tmp, os.path.join(seg_dir, MANIFEST))
+
+
+def _write_segment_file(seg_dir: str, records: list[dict]) -> str:
+    """Write records as a content-addressed segment; returns its file name."""
+    payload = "".join(json.dumps(r, ensure_ascii=False, separators=(",", ":")) + "\n"
+                      for r in records).encode("utf-8")
+    name = hashlib.sha256(payload).hexdigest()[:20] + ".jsonl.gz"
+    path = os.path.join(seg_dir, name)
+    if not os.path.exists(path):
+        tmp = path + ".tmp"
+        # mtime=0 keeps the gzip bytes deterministic for identical content
+        with open(tmp, "wb") as f, gzip.GzipFile(fileobj=f, mode="wb", mtime=0) as gz:
+            gz.write(payload)
+        os.replace(tmp, path)
+    return name
+
+
+def _read_segment_file(seg_dir: str, name: str):
+    with gzip.open(os.path.join(seg_dir, name), "rt", encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+# ── DB ⇄ RECORDS ────────────────────────────────────────────────
+
+def _job_columns(conn) -> list[str]:
+    return [r[1] for r in conn.execute("PRAGMA table_info(jobs)")]
+
+
+def _job_records(conn, where: str = "", params=()) -> list[dict]:
+    rows = conn.execute(f"""
+        SELECT j.*, inflate(d.body) AS _description
+        FROM jobs j LEFT JOIN job_descriptions d ON d.job_id = j.id {where}
+        ORDER BY j.id
+    """, params).fetchall()
+    scores = {}
+    for s in conn.execute(f"""
+        SELECT s.* FROM job_scores s
+        WHERE s.job_id IN (SELECT j.id FROM jobs j {where})
+    """, params):
+        scores.setdefault(s["job_id"], {})[s["profile"]] = {
+            k: s[k] for k in ("fit_score", "role_match", "matching_skills",
+                              "missing_skills", "ai_summary", "notified")}
+    records = []
+    for r in rows:
+        row = dict(r)
+        row["description"] = row.pop("_description") or ""
+        records.append({"t": "job", "row": row, "scores": scores.get(row["id"], {})})
+    return records
+
+
+def _run_records(conn, after_id: int = 0) -> list[dict]:
+    rows = conn.execute("SELECT * FROM run_log WHERE id > ? ORDER BY id", (after_id,))
+    return [{"t": "run", "row": dict(r)} for r in rows]
+
+
+def _ledger_records(conn, after: str = "") -> list[dict]:
+    rows = conn.execute("SELECT * FROM rejected_jobs WHERE scored_at > ? ORDER BY scored_at",
+                        (after,))
+    return [{"t": "rej", "row": {**dict(r), "job": json.loads(zlib.decompress(r["job"]))}}
+            for r in rows]
+
+
+def _model_records(conn, after_id: int = 0) -> list[dict]:
+    rows = conn.execute("SELECT * FROM score_model WHERE id > ? ORDER BY id", (after_id,))
+    return [{"t": "model", "row": dict(r)} for r in rows]
+
+
+def _outbox_records(conn, where: str = "", params=()) -> list[dict]:
+    # Jobs are referenced by url: that is what _apply_job keys on.
+    records = []
+    for r in conn.execute(f"SELECT * FROM outbox {where} ORDER BY id", params).fetchall():
+        urls = [u[0] for u in conn.execute("""
+            SELECT j.url FROM outbox_jobs oj JOIN jobs j ON j.id = oj.job_id
+            WHERE oj.outbox_id = ?
+        """, (r["id"],))]
+        row = {**dict(r), "message": zlib.decompress(r["message"]).decode("utf-8")}
+        records.append({"t": "outbox", "row": row, "jobs": urls})
+    return records
+
+
+def _apply_outbox(conn, row: dict, urls: list[str]):
+    row = {**row, "message": zlib.compress(row["message"].encode("utf-8"))}
+    conn.execute(f"INSERT OR REPLACE INTO outbox ({', '.join(row)}) "
+                 f"VALUES ({', '.join('?' * len(row))})", list(row.values()))
+    conn.execute("DELETE FROM outbox_jobs WHERE outbox_id = ?", (row["id"],))
+    conn.executemany("INSERT OR IGNORE INTO outbox_jobs (outbox_id, job_id) "
+                     "SELECT ?, id FROM jobs WHERE url = ?", [(row["id"], u) for u in urls])
+
+
+def _apply_job(conn, columns: list[str], row: dict, scores: dict | None = None):
+    description = row.get("description", "")
+    cols = [c for c in columns if c in row and c != "description"]
+    updates = ", ".join(f"{c} = excluded.{c}" for c in cols if c not in ("id", "url"))
+    conn.execute(f"""
+        INSERT INTO jobs ({", ".join(cols)}) VALUES ({", ".join("?" * len(cols))})
+        ON CONFLICT (url) DO UPDATE SET {updates}
+    """, [row[c] for c in cols])
+    job_id = conn.execute("SELECT id FROM jobs WHERE url = ?", (row["url"],)).fetchone()[0]
+    _write_description(conn, job_id, description)
+    _write_skills(conn, job_id, row.get("date_found"),
+                  row.get("matching_skills"), row.get("missing_skills"))
+    # Segments written before job_scores existed only carry the default score.
+    _write_scores(conn, job_id, row.get("date_found"),
+                  {p: ScoreResult.from_dict(s) for p, s in (scores or {"default": row}).items()})
+    conn.executemany("UPDATE job_scores SET notified = ? WHERE job_id = ? AND profile = ?",
+                     [(s.get("notified") or 0, job_id, p)
+                      for p, s in (scores or {"default": row}).items()])
+
+
+def _apply_segment(conn, seg_dir: str, name: str) -> int:
+    columns = _job_columns(conn)
+    n = 0
+    for rec in _read_segment_file(seg_dir, name):
+        kind = rec.get("t")
+        if kind == "header":
+            if rec.get("snapshot"):
+                conn.execute("DELETE FROM jobs")
+                conn.execute("DELETE FROM run_log")
+                conn.execute("DELETE FROM rejected_jobs")
+                conn.execute("DELETE FROM score_model")
+                conn.execute("DELETE FROM outbox_jobs")
+                conn.execute("DELETE FROM outbox")
+            continue
+        if kind == "job":
+            _apply_job(conn, columns, rec["row"], rec.get("scores"))
+        elif kind == "del":
+            conn.execute("DELETE FROM jobs WHERE url = ?", (rec["url"],))
+        elif kind == "run":
+            row = rec["row"]
+            conn.execute(f"INSERT OR REPLACE INTO run_log ({', '.join(row)}) "
+                         f"VALUES ({', '.join('?' * len(row))})", list(row.values()))
+        elif kind == "model":
+            row = rec["row"]
+            conn.execute(f"INSERT OR REPLACE INTO score_model ({', '.join(row)}) "
+                         f"VALUES ({', '.join('?' * len(row))})", list(row.values()))
+        elif kind == "outbox":
+            _apply_outbox(conn, rec["row"], rec.get("jobs", []))
+        elif kind == "outbox_del":
+            conn.execute("DELETE FROM outbox_jobs WHERE outbox_id = ?", (rec["id"],))
+            conn.execute("DELETE FROM outbox WHERE id = ?", (rec["id"],))
+        elif kind == "rej_del":
+            conn.execute("DELETE FROM rejected_jobs WHERE job_key = ?", (rec["key"],))
+        elif kind == "rej":
+            row = {**rec["row"], "job": zlib.compress(json.dumps(rec["row"]["job"]).encode("utf-8"), 9)}
+            conn.execute(f"INSERT OR REPLACE INTO rejected_jobs ({', '.join(row)}) "
+                         f"VALUES ({', '.join('?' * len(row))})", list(row.values()))
+        n += 1
+    conn.execute("INSERT OR REPLACE INTO applied_segments (name, applied_at) VALUES (?, ?)",
+                 (name, datetime.now().isoformat()))
+    return n
+
+
+def _header(snapshot: bool) -> dict:
+    return {"t": "header", "v": FORMAT_VERSION, "snapshot": snapshot,
+            "created_at": datetime.now().isoformat()}
+
+
+# ── PUBLIC API ──────────────────────────────────────────────────
+
+def sync(seg_dir: str = SEGMENT_DIR) -> int:
+    """
+    Replay segments the local jobs.db hasn't seen yet, then switch on change
+    tracking. Returns the number of segments applied.
+    """
+    names = _read_manifest(seg_dir)
+    with get_conn() as conn:
+        applied = {r[0] for r in conn.execute("SELECT name FROM applied_segments")}
+        pending = [n for n in names if n not in applied]
+        # Replayed rows must not be recorded as new changes.
+        conn.execute("UPDATE segment_state SET tracking = 0")
+        for name in pending:
+            _apply_segment(conn, seg_dir, name)
+        conn.execute("""
+            UPDATE segment_state SET tracking = 1,
+                run_log_id  = (SELECT COALESCE(MAX(id), 0) FROM run_log),
+                rejected_at = (SELECT COALESCE(MAX(scored_at), '') FROM rejected_jobs),
+                model_id    = (SELECT COALESCE(MAX(id), 0) FROM score_model)
+        """)
+    if pending:
+        print(f"[Segments] Applied {len(pending)} segment(s) from {seg_dir}")
+    return len(pending)
+
+
+def write_segment(seg_dir: str = SEGMENT_DIR) -> str | None:
+    """Write everything changed since the last segment. Returns the file name."""
+    with get_conn() as conn:
+        state   = conn.execute("SELECT run_log_id, rejected_at, model_id FROM segment_state").fetchone()
+        changes = conn.execute("SELECT job_id, url, deleted FROM segment_changes").fetchall()
+        records = _job_records(conn, "WHERE j.id IN (SELECT job_id FROM segment_changes WHERE deleted = 0)")
+        records += [{"t": "del", "url": c["url"]} for c in changes if c["deleted"]]
+        records += _run_records(conn, state["run_log_id"])
+        # Ledger deletes first: a key promoted and rejected again ends up present.
+        records += [{"t": "rej_del", "key": r[0]}
+                    for r in conn.execute("SELECT job_key FROM segment_rejected_deletes")]
+        records += _ledger_records(conn, state["rejected_at"])
+        records += _model_records(conn, state["model_id"])
+        outbox  = conn.execute("SELECT outbox_id, deleted FROM segment_outbox_changes").fetchall()
+        records += _outbox_records(conn, "WHERE id IN (SELECT outbox_id FROM segment_outbox_changes "
+                                         "WHERE deleted = 0)")
+        records += [{"t": "outbox_del", "id": c["outbox_id"]} for c in outbox if c["deleted"]]
+        if not records:
+            return None
+
+        os.makedirs(seg_dir, exist_ok=True)
+        name = _write_segment_file(seg_dir, [_header(False)] + records)
+        _write_manifest(seg_dir, _read_manifest(seg_dir) + [name])
+
+        conn.execute("DELETE FROM segment_changes")
+        conn.execute("DELETE FROM segment_outbox_changes")
+        conn.execute("DELETE FROM segment_rejected_deletes")
+        conn.execute("""
+            UPDATE segment_state SET
+                run_log_id  = (SELECT COALESCE(MAX(id), 0) FROM run_log),
+                rejected_at = (SELECT COALESCE(MAX(scored_at), '') FROM rejected_jobs),
+                model_id    = (SELECT COALESCE(MAX(id), 0) FROM score_model)
+        """)
+        conn.execute("INSERT OR REPLACE INTO applied_segments (name, applied_at) VALUES (?, ?)",
+                     (name, datetime.now().isoformat()))
+    size = os.path.getsize(os.path.join(seg_dir, name))
+    print(f"[Segments] Wrote {name}: {len(records)} records, {size} bytes")
+    return name
+
+
+def compact(seg_dir: str = SEGMENT_DIR, force: bool = False) -> str | None:
+    """Fold all segments into one snapshot once there are SEGMENT_COMPACT_AT of them."""
+    names = _read_manifest(seg_dir)
+    if not force and len(names) < SEGMENT_COMPACT_AT:
+        return None
+    with get_conn() as conn:
+        # Only the newest model matters after a snapshot.
+        latest = conn.execute("SELECT COALESCE(MAX(id), 1) - 1 FROM score_model").fetchone()[0]
+        records = ([_header(True)] + _job_records(conn) + _run_records(conn) +
+                   _ledger_records(conn) + _model_records(conn, latest) + _outbox_records(conn))
+        name = _write_segment_file(seg_dir, records)
+        _write_manifest(seg_dir, [name])
+        conn.execute("DELETE FROM applied_segments")
+        conn.execute("INSERT INTO applied_segments (name, applied_at) VALUES (?, ?)",
+                     (name, datetime.now().isoformat()))
+    for old in names:
+        if old != name:
+            os.remove(os.path.join(seg_dir, old))
+    print(f"[Segments] Compacted {len(names)} segments into {name}")
+    return name
+
+
+# ── BENCHMARK ───────────────────────────────────────────────────
+
+def benchmark_rebuild(n_jobs: int = 20000, per_run: int = 20, compact_first: bool = False) -> dict:
+    """
+    Cold-start cost: build `n_jobs` jobs as one segment per `per_run` jobs in a
+    temp dir, then time replaying them into an empty jobs.db.
+    """
+    import tempfile
+    tmp = tempfile.mkdtemp()
+    seg_dir = os.path.join(tmp, "segments")
+    saved_path = database.DB_PATH
+    try:
+        database.DB_PATH = os.path.join(tmp, "build.db")
+        database.init_db()
+        sync(seg_dir)
+        for start in range(0, n_jobs, per_run):
+            database.save_scored_jobs([Job(
+                title=f"Business Analyst {i}", company=f"Company {i % 500}",
+                location="Noida", url=f"https://example.com/jobs/{i}",
+                platform=("LinkedIn", "Indeed", "Naukri")[i % 3],
+                description="Looking for a business analyst with BRD writing, "
+                            "stakeholder management and Agile experience. " * 8,
+                score=ScoreResult(fit_score=6 + i % 5, matching_skills=("BRD Writing", "Agile"),
+                                  missing_skills=("MBA",), summary="Decent match."),
+            ) for i in range(start, min(start + per_run, n_jobs))])
+            database.log_run(per_run, per_run, per_run)
+            write_segment(seg_dir)
+        if compact_first:
+            compact(seg_dir, force=True)
+        names = _read_manifest(seg_dir)
+        seg_bytes = sum(os.path.getsize(os.path.join(seg_dir, n)) for n in names)
+
+        database.DB_PATH = os.path.join(tmp, "rebuilt.db")
+        t0 = time.perf_counter()
+        database.init_db()
+        sync(seg_dir)
+        elapsed = time.perf_counter() - t0
+        return {"jobs": n_jobs, "segments": len(names), "segment_bytes": seg_bytes,
+                "avg_segment_bytes": seg_bytes // max(1, len(names)),
+                "rebuild_seconds": round(elapsed, 2),
+                "db_bytes": os.path.getsize(database.DB_PATH)}
+    finally:
+        database.DB_PATH = saved_path
+
+
+if __name__ == "__main__":
+    import sys
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    print("Incremental:", benchmark_rebuild(n))
+    print("Compacted:  ", benchmark_rebuild(n, compact_first=True))
@@ -0,0 +1,174 @@
+"""
+shards.py — Split one run across N workers, then merge their results
+
+Every planned search (LinkedIn, Indeed and Naukri query × location) is one
+unit of work. `python main.py --shard i/N` scrapes and scores only worker
+i's share of the units and writes a self-contained shard file instead of
+touching jobs.db:
+
+    data/shards/<run_id>/shard-2-of-4.json.gz
+        {"run_id", "shard": 2, "of": 4, "searches": {...}, "found": 57,
+         "prefilter_rejects": {...}, "stage_timings": {...},
+         "samples": {span: [seconds, ...]}, "jobs": [Job.to_dict(), ...]}
+
+`python main.py merge` reads a run's shard files in shard order, drops
+duplicate jobs (same Job.key — the best-scored copy wins), writes kept jobs and
+ledger rejects in one transaction, then logs the run and sends the digest.
+Re-merging the same files inserts nothing new.
+
+The partition is balanced and stable: the units are sorted by source, then
+by CRC32(unit), and dealt out to the workers in turn. Shares differ by at
+most one unit overall and per source, so every worker gets an even share of
+every scraper, and the same plan always gives the same partition whatever
+order the searches are listed in. Adding or removing a search shifts the
+units dealt after it, and changing N reshuffles everything. --shard
+requires --run-id, so every worker of a run writes under the same
+directory. The same commands work as local processes
+
+    for i in 1 2 3 4; do python main.py --shard $i/4 --run-id r1 & done; wait
+    python main.py merge --run r1
+
+or as a CI matrix (.github/workflows/job_agent_sharded.yml).
+"""
+import glob
+import gzip
+import json
+import os
+import re
+import zlib
+from datetime import datetime
+
+from config import SHARD_DIR
+from models import Job
+
+SOURCES = ("LinkedIn", "Indeed", "Naukri")
+
+
+def parse_shard(spec: str) -> tuple[int, int]:
+    """'2/4' → (2, 4); workers are numbered 1..N."""
+    m = re.fullmatch(r"\s*(\d+)\s*/\s*(\d+)\s*", spec or "")
+    if not m or not 1 <= int(m.group(1)) <= int(m.group(2)):
+        raise ValueError(f"--shard wants i/N with 1 <= i <= N, got {spec!r}")
+    return int(m.group(1)), int(m.group(2))
+
+
+# ── PARTITION ───────────────────────────────────────────────────
+
+def plan() -> list[tuple[str, object]]:
+    """Every (source, search) unit a full run performs."""
+    from scrapers.linkedin import LINKEDIN_SEARCHES
+    from scrapers.indeed import INDEED_SEARCHES
+    from scrapers.naukri import NAUKRI_SEARCHES
+    return ([("LinkedIn", s) for s in LINKEDIN_SEARCHES] +
+            [("Indeed", s) for s in INDEED_SEARCHES] +
+            [("Naukri", s) for s in NAUKRI_SEARCHES])
+
+
+def _unit_key(unit) -> int:
+    return zlib.crc32(json.dumps(unit, sort_keys=True).encode("utf-8"))
+
+
+def assign(units: list, shard: int, count: int) -> list:
+    """Worker `shard`'s (1-based) share of (source, search) `units`."""
+    dealt = sorted(units, key=lambda u: (u[0], _unit_key(u)))
+    return [u for i, u in enumerate(dealt) if i % count == shard - 1]
+
+
+def searches_for(shard: int, count: int) -> dict[str, list]:
+    """{source: [search, ...]} for one worker, in each scraper's own order."""
+    mine = assign(plan(), shard, count)
+    return {source: [s for src, s in plan() if src == source and (src, s) in mine]
+            for source in SOURCES}
+
+
+# ── FILES ───────────────────────────────────────────────────────
+
+def shard_path(run_id: str, shard: int, count: int, shard_dir: str = SHARD_DIR) -> str:
+    return os.path.join(shard_dir, run_id, f"shard-{shard}-of-{count}.json.gz")
+
+
+def write_shard(run_id: str, shard: int, count: int, jobs: list[Job], found: int,
+                searches: dict, prefilter_rejects: dict, stage_timings: dict,
+                samples: dict, shard_dir: str = SHARD_DIR) -> str:
+    path = shard_path(run_id, shard, count, shard_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with gzip.open(tmp, "wt", encoding="utf-8") as f:
+        json.dump({"run_id": run_id, "shard": shard, "of": count,
+                   "created_at": datetime.now().isoformat(), "searches": searches,
+                   "found": found, "prefilter_rejects": prefilter_rejects,
+                   "stage_timings": stage_timings, "samples": samples,
+                   "jobs": [j.to_dict() for j in jobs]},
+                  f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)   # a half-written shard is never merged
+    return path
+
+
+def _read(path: str) -> dict:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def find_shards(run_id: str | None = None, shard_dir: str = SHARD_DIR) -> list[str]:
+    """Shard files of `run_id`, or of the newest run when None."""
+    if run_id is None:
+        runs = sorted(d for d in os.listdir(shard_dir)
+                      if os.path.isdir(os.path.join(shard_dir, d))) if os.path.isdir(shard_dir) else []
+        if not runs:
+            return []
+        run_id = runs[-1]
+    return glob.glob(os.path.join(shard_dir, run_id, "shard-*.json.gz"))
+
+
+# ── MERGE ───────────────────────────────────────────────────────
+
+def _best(job: Job) -> int:
+    """Highest fit_score any profile gave `job`."""
+    return max((s.fit_score for s in (job.scores or {"default": job.score}).values() if s), default=0)
+
+
+def merge_shards(paths: list[str]) -> dict:
+    """
+    Combine shard files (any order) into one run: {"run_id", "jobs" (deduped),
+    "found", "prefilter_rejects", "stage_timings" (slowest worker per stage),
+    "samples", "shards", "of", "missing"}.
+    """
+    shards = sorted((_read(p) for p in paths), key=lambda s: (s["run_id"], s["shard"]))
+    if len({s["run_id"] for s in shards}) > 1:
+        raise ValueError("shard files belong to different runs: " +
+                         ", ".join(sorted({s["run_id"] for s in shards})))
+    if len({s["of"] for s in shards}) > 1:
+        raise ValueError("shard files disagree on the number of shards")
+
+    jobs, rejects, timings, samples = {}, {}, {}, {}
+    for s in shards:
+        for d in s["jobs"]:
+            job = Job.from_dict(d)
+            # Two searches can find the same posting; keep the copy that scored best.
+            if job.key not in jobs or _best(job) > _best(jobs[job.key]):
+                jobs[job.key] = job
+        for source, reasons in (s.get("prefilter_rejects") or {}).items():
+            mine = rejects.setdefault(source, {})
+            for reason, n in reasons.items():
+                mine[reason] = mine.get(reason, 0) + n
+        # Workers run in parallel: a stage took as long as its slowest worker.
+        for stage, secs in (s.get("stage_timings") or {}).items():
+            timings[stage] = max(timings.get(stage, 0), secs)
+        for name, values in (s.get("samples") or {}).items():
+            samples.setdefault(name, []).extend(values)
+
+    count = shards[0]["of"] if shards else 0
+    present = {s["shard"] for s in shards}
+    return {"run_id": shards[0]["run_id"] if shards else None, "jobs": list(jobs.values()),
+            "found": sum(s["found"] for s in shards), "prefilter_rejects": rejects,
+            "stage_timings": timings, "samples": samples,
+            "shards": sorted(present), "of": count,
+            "missing": [i for i in range(1, count + 1) if i not in present]}
+
+
+if __name__ == "__main__":
+    import sys
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    for i in range(1, n + 1):
+        share = searches_for(i, n)
+        print(f"  shard {i}/{n}: " + ", ".join(f"{src} {len(s)}" for src, s in share.items()))
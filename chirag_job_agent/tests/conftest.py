@@ -0,0 +1,25 @@
+"""
+tests/conftest.py — Shared fixtures
+
+The modules import each other by bare name (`from config import ...`), as
+main.py runs them, so the package directory goes on sys.path first.
+
+    python -m pytest -q chirag_job_agent/tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """A fresh, fully migrated jobs.db in a temp dir; yields the database module."""
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "jobs.db"))
+    monkeypatch.setattr(database, "ARCHIVE_DIR", str(tmp_path / "archive"))
+    database.init_db()
+    return database
@@ -0,0 +1,69 @@
+from email import message_from_string
+from email.message import EmailMessage
+
+import pytest
+
+from models import Job, ScoreResult
+from notifier.delivery import queue_digests, send_batch
+from notifier.smtp_standin import LocalSMTPServer
+
+
+def _parts(n: int) -> list[str]:
+    parts = []
+    for i in range(n):
+        msg = EmailMessage()
+        msg["Subject"] = f"Part {i + 1}/{n}"
+        msg.set_content(f"part {i + 1}\n.a line that starts with a dot\n")
+        parts.append(msg.as_string())
+    return parts
+
+
+def _send(smtp, batch):
+    return send_batch(batch, host=smtp.host, port=smtp.port, use_ssl=False,
+                      user="agent@example.com", password="secret")
+
+
+@pytest.mark.parametrize("pipelining", [True, False])
+def test_every_part_goes_out_over_one_session(pipelining):
+    batch = [(f"r{i}", f"r{i}@example.com", _parts(3)) for i in range(4)]
+    with LocalSMTPServer(password="secret", pipelining=pipelining) as smtp:
+        report = _send(smtp, batch)
+    assert all(r == {"ok": True, "parts": 3, "error": None} for r in report["results"].values())
+    assert (smtp.connections, smtp.logins, len(smtp.messages)) == (1, 1, 12)
+    assert [m["to"] for m in smtp.messages[:3]] == [["r0@example.com"]] * 3
+    assert "\n.a line that starts with a dot" in smtp.messages[0]["data"]
+
+
+@pytest.mark.parametrize("pipelining", [True, False])
+def test_a_refused_recipient_does_not_stop_the_rest(pipelining):
+    batch = [("a", "a@example.com", _parts(1)), ("x", "blocked@example.com", _parts(2)),
+             ("b", "b@example.com", _parts(2))]
+    with LocalSMTPServer(password="secret", reject={"blocked@example.com"},
+                         pipelining=pipelining) as smtp:
+        results = _send(smtp, batch)["results"]
+    assert results["x"]["ok"] is False and "550" in results["x"]["error"]
+    assert results["a"]["ok"] and results["b"]["parts"] == 2
+    assert [m["to"] for m in smtp.messages] == [["a@example.com"]] + [["b@example.com"]] * 2
+
+
+@pytest.mark.parametrize("pipelining", [True, False])
+def test_a_dropped_connection_resumes_at_the_unacknowledged_part(pipelining):
+    parts = _parts(3)
+    with LocalSMTPServer(password="secret", pipelining=pipelining, drop_after=2) as smtp:
+        results = _send(smtp, [("r", "r@example.com", parts)])["results"]
+    assert results["r"] == {"ok": True, "parts": 3, "error": None}
+    assert smtp.connections == 2
+    subjects = [message_from_string(m["data"])["Subject"] for m in smtp.messages]
+    # Part 2 reached the server but was never acknowledged, so it goes again; part 1 does not.
+    assert subjects == ["Part 1/3", "Part 2/3", "Part 2/3", "Part 3/3"]
+
+
+def test_queue_digests_renders_each_recipient_into_the_outbox(db):
+    jobs = [Job(title=f"Business Analyst {i}", company="Acme", location="Noida",
+                url=f"https://example.com/{i}", platform="LinkedIn",
+                score=ScoreResult(fit_score=5 + i % 5, summary="ok")) for i in range(10)]
+    ids = queue_digests(jobs, [{"email": "a@example.com", "min_score": 6},
+                               {"email": "b@example.com", "min_score": 9}])
+    due = db.get_due_messages()
+    assert [m["id"] for m in due] == ids
+    assert [m["recipient"] for m in due] == ["a@example.com", "b@example.com"]
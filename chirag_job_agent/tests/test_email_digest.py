@@ -0,0 +1,32 @@
+from models import Job, ScoreResult
+from notifier.email_digest import build_messages, render_digest
+
+
+def _job(i: int, category: str = "Business Analyst") -> Job:
+    return Job(title=f"Business Analyst {i}", company="Acme", location="Noida",
+               url=f"https://example.com/{i}", platform="LinkedIn",
+               score=ScoreResult(fit_score=8, role_category=category, summary="ok"))
+
+
+def _html(msg) -> str:
+    return msg.get_payload()[1].get_payload(decode=True).decode("utf-8")
+
+
+def test_header_names_the_recipients_cut_off():
+    assert "Only roles scored 8+/10 shown" in render_digest([_job(1)], min_score=8)[0]["html"]
+    assert "roles scoring 9+/10" in _html(build_messages([], "a@example.com", min_score=9)[0])
+
+
+def test_cards_from_stored_rows_keep_their_role_category(db):
+    db.save_scored_jobs([_job(1, "Product Manager")])
+    stored = db.get_todays_shortlist()
+    assert stored[0].score.role_category == "Product Manager"
+    assert "Product Manager" in render_digest(stored)[0]["html"]
+    assert db.get_profile_shortlist("default")[0].score.role_category == "Product Manager"
+
+
+def test_rows_scored_before_role_category_show_their_taxonomy_role(db):
+    ids = db.save_scored_jobs([_job(1)])
+    with db.get_conn() as conn:
+        conn.execute("UPDATE jobs SET role_category = NULL WHERE id = ?", (ids[0],))
+    assert db.get_todays_shortlist()[0].score.role_category == "Business Analyst"
@@ -0,0 +1,78 @@
+import itertools
+
+import pytest
+
+from models import Job
+from scorer.engine import experience_fit, extract_experience, score_job
+
+TITLES = ["Business Analyst", "Product Owner", "Software Engineer", "Operations Executive",
+          "Key Account Manager", "Senior Director, Strategy", "Analyst", "Graphic Designer"]
+DESCRIPTIONS = [
+    "",
+    "We need a product manager who writes BRDs and works with stakeholders. 1-2 years.",
+    "5+ years of Java development. Machine learning is a plus.",
+    "Fresher role: Excel, documentation, Agile ceremonies, HubSpot CRM, market research.",
+    "Business development across accounts; 10-12 years; MBA required.",
+]
+LOCATIONS = ["Noida", "Remote", "Chennai", ""]
+
+JOBS = [Job(title=t, company="Acme", location=loc, url=f"https://x/{i}", description=d)
+        for i, (t, d, loc) in enumerate(itertools.product(TITLES, DESCRIPTIONS, LOCATIONS))]
+
+
+@pytest.mark.parametrize("threshold", [4, 5, 6, 7, 8, 9])
+def test_pruning_never_drops_a_job_that_reaches_the_threshold(threshold):
+    for job in JOBS:
+        full = score_job(job)
+        fast = score_job(job, threshold=threshold)
+        if "pruned_after" in fast.breakdown:
+            assert fast.fit_score < threshold
+            assert full.fit_score < threshold
+            assert full.fit_score <= fast.breakdown["upper_bound"]
+        else:
+            assert fast.fit_score == full.fit_score
+            assert fast.breakdown == full.breakdown
+
+
+def test_pruning_skips_the_description_role_scan():
+    job = Job(title="Graphic Designer", company="Acme", location="Chennai",
+              description="Report to the product manager. 8-10 years of Illustrator.")
+    pruned = score_job(job, threshold=8)
+    assert pruned.breakdown["pruned_after"] == "experience"
+    assert pruned.breakdown["role_score"] == 0     # the description was never read for roles
+    assert score_job(job).breakdown["role_score"] == 3
+
+
+def test_title_role_counts_before_the_description():
+    job = Job(title="Business Analyst", company="Acme", location="Noida",
+              description="You will support the product manager. 1-2 years.")
+    assert score_job(job).role_category == "Business Analyst"
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("2 to 4 yrs", (2, 4)),
+    ("3-5 years of experience", (3, 5)),
+    ("Experience: 0-1 Yrs", (0, 1)),
+    ("5+ years", (5, None)),
+    ("minimum 3 years", (3, None)),
+    ("1.5 years", (1, None)),
+    ("1.5 - 3.5 years", (1, 4)),
+    ("fresher", (0, 1)),
+    ("v2.5 years", (None, None)),
+    ("50 years old company", (None, None)),
+    ("", (None, None)),
+])
+def test_extract_experience(text, expected):
+    assert extract_experience(None, "", text) == expected
+
+
+def test_extract_experience_reads_the_chip_before_the_title_and_description():
+    assert extract_experience("3-5 Yrs", "", "10+ years") == (3, 5)
+    assert extract_experience(None, "Analyst (2-3 yrs)", "5 years") == (2, 3)
+
+
+@pytest.mark.parametrize("exp_min, exp_max, points", [
+    (0, 2, 2.0), (1, None, 2.0), (3, 5, 0), (None, None, None),
+])
+def test_experience_fit(exp_min, exp_max, points):
+    assert experience_fit(exp_min, exp_max, (0, 2)) == points
@@ -0,0 +1,45 @@
+import csv
+
+import exporter
+from models import Job, ScoreResult
+
+
+def _job(i: int) -> Job:
+    return Job(title=f"Business Analyst {i}", company="Acme", location="Noida",
+               url=f"https://example.com/{i}", platform="Naukri",
+               score=ScoreResult(fit_score=7, summary="ok"))
+
+
+def _export(tmp_path):
+    result = exporter.export_table("jobs", "csv", str(tmp_path / "out"), incremental=True)
+    if result["path"] is None:
+        return []
+    with open(result["path"], newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def test_incremental_export_picks_up_updated_rows(db, tmp_path):
+    ids = db.save_scored_jobs([_job(i) for i in range(3)])
+    assert [int(r["id"]) for r in _export(tmp_path)] == ids
+    assert _export(tmp_path) == []
+
+    db.label_job(ids[0], "applied")
+    db.mark_notified([ids[2]])
+    new = db.save_scored_jobs([_job(3)])
+    rows = _export(tmp_path)
+    assert [int(r["id"]) for r in rows] == [ids[0], ids[2], *new]
+    assert rows[0]["status"] == "Applied"
+    assert "row_version" not in rows[0]
+
+
+def test_watermarks_from_before_row_versions_still_hold(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "v26.db"))
+    monkeypatch.setattr(db, "SCHEMA_VERSION", 26)
+    db.init_db()
+    with db.get_conn() as conn:       # v26 rows, and an export that stopped at the second
+        ids = [conn.execute("INSERT INTO jobs (title, url, date_found) VALUES (?, ?, '2026-01-01')",
+                            (f"Analyst {i}", f"https://example.com/{i}")).lastrowid for i in range(3)]
+        conn.execute("INSERT INTO export_state (target, last_id) VALUES ('jobs:csv', ?)", (ids[1],))
+    monkeypatch.setattr(db, "SCHEMA_VERSION", len(db.MIGRATIONS))
+    db.init_db()
+    assert [int(r["id"]) for r in _export(tmp_path)] == [ids[2]]
@@ -0,0 +1,49 @@
+import pytest
+
+from htmltext import element_text, html_to_text
+
+bs4 = pytest.importorskip("bs4")
+
+FRAGMENTS = [
+    "<p>B2B&nbsp;SaaS <b>sales</b></p><ul><li>CRM</li><li>HubSpot</li></ul>",
+    "Line one<br/>line&nbsp;two <style>p{}</style>&amp; three",
+    "<div><h2>About</h2><p>Noida &amp; Gurugram</p><script>track()</script><p>0&ndash;3 years&#39;</p></div>",
+    "<table><tr><td>CTC</td><td>6 LPA</td></tr></table>",
+    "  plain   text\n with  spaces ",
+    "<p>unclosed <i>tags",
+]
+
+
+def _soup_text(html: str) -> str:
+    """BeautifulSoup's text with whitespace (&nbsp; included) collapsed, as scrapers stored it."""
+    soup = bs4.BeautifulSoup(html, "html.parser")
+    for tag in soup(["script", "style"]):
+        tag.decompose()
+    return " ".join(soup.get_text(" ").split())
+
+
+@pytest.mark.parametrize("html", FRAGMENTS)
+def test_matches_beautifulsoup(html):
+    assert html_to_text(html) == _soup_text(html)
+
+
+@pytest.mark.parametrize("html", FRAGMENTS)
+def test_element_text_matches_html_to_text(html):
+    soup = bs4.BeautifulSoup(f"<div>{html}</div>", "html.parser")
+    assert element_text(soup.div) == html_to_text(html)
+
+
+def test_inline_tags_do_not_split_words():
+    assert html_to_text("<p>Sales<b>force</b> admin</p><p>next</p>") == "Salesforce admin next"
+
+
+def test_stops_at_limit():
+    html = "<ul>" + "<li>HubSpot CRM</li>" * 1000 + "</ul>"
+    text = html_to_text(html, limit=50)
+    assert len(text) == 50
+    assert text == _soup_text(html)[:50]
+
+
+def test_empty():
+    assert html_to_text(None) == html_to_text("") == ""
+    assert element_text(None) == ""
@@ -0,0 +1,66 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from models import Job
+from profiles import default_profile, is_kept, score_matrix
+from scorer import learn
+from scorer.engine import score_job
+
+SKILL_TEXT = ["BRD", "PRD", "proposal", "hubspot", "figma", "agile", "stakeholder",
+              "market research", "staffing", "documentation", "excel", "milestone"]
+
+
+def _job(i: int, skills: list[str], years: str = "1-2 years") -> Job:
+    return Job(title="Business Analyst", company=f"Company {i}", location="Noida",
+               url=f"https://example.com/{i}", platform="LinkedIn",
+               description=f"Business analyst, {years}. " + ", ".join(skills) + ".")
+
+
+@pytest.fixture
+def trained(db):
+    """30 stored jobs, 1 in 5 applied for (the rest ignored), then `main.py train`."""
+    jobs = [_job(i, SKILL_TEXT[i % 7: i % 7 + 4]) for i in range(30)]
+    for j in jobs:
+        j.score = score_job(j)
+    ids = db.save_scored_jobs(jobs)
+    for n, job_id in enumerate(ids):
+        db.label_job(job_id, "applied" if n % 5 == 0 else "ignored")
+    model = learn.train(db.get_labelled_jobs())
+    model["id"] = db.save_score_model(model)
+    learn.set_model(db.get_score_model())
+    yield model
+    learn.set_model(None)
+
+
+def test_prior_is_the_label_base_rate(trained):
+    assert trained["prior"] == pytest.approx(0.2)
+    assert learn.model_tag() == f"-m{trained['id']}"
+
+
+def test_trained_model_does_not_empty_the_shortlist(trained):
+    profiles = [default_profile()]
+    fresh = [_job(100 + i, SKILL_TEXT[i: i + 5], years="2 years") for i in range(6)]
+    for j in fresh:
+        score_matrix(j, profiles, score_job)
+    assert all(j.fit_score >= 8 for j in fresh)
+
+    assert learn.apply_model(fresh) == len(fresh)
+    for j in fresh:
+        assert abs(j.fit_score - j.score.breakdown["rule_score"]) <= learn.LEARNED_POINTS
+        assert is_kept(j, profiles)
+
+
+def test_online_update_keeps_the_prior_a_running_rate(trained):
+    labelled = [(_job(200, ["figma"]), "9999-01-01")]
+    labelled[0][0].status = "Applied"
+    updated = learn.update(trained, labelled)
+    assert updated["n_labels"] == 31
+    assert updated["prior"] == pytest.approx(7 / 31)
+
+
+def test_learned_score_moves_at_most_learned_points():
+    assert learn.learned_score(7, 0.2, 0.2) == 7
+    assert learn.learned_score(7, 1.0, 0.2) == 7 + learn.LEARNED_POINTS
+    assert learn.learned_score(7, 0.0, 0.2) == 7 - learn.LEARNED_POINTS
+    assert learn.learned_score(10, 0.9, 0.2) == 10
@@ -0,0 +1,44 @@
+import pytest
+
+from locations import Place, place_matches, resolve_location
+from roles import normalize_title
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("Gurugram, Haryana, India",        Place("Gurugram", "Delhi NCR")),
+    ("Gurgaon",                         Place("Gurugram", "Delhi NCR")),
+    ("Noida Sector 62, Uttar Pradesh",  Place("Noida", "Delhi NCR")),
+    ("Haryana, Gurgaon",                Place("Gurugram", "Delhi NCR")),
+    ("Delhi NCR",                       Place(None, "Delhi NCR")),
+    ("Bengaluru (Hybrid)",              Place("Bengaluru", "Karnataka", "hybrid")),
+    ("Pune / Remote",                   Place("Pune", "Maharashtra", "remote")),
+    ("Work from home",                  Place(None, "Remote", "remote")),
+    ("Punekar Street",                  Place()),
+    ("India",                           Place()),
+    ("",                                Place()),
+])
+def test_resolve_location(raw, expected):
+    assert resolve_location(raw) == expected
+
+
+@pytest.mark.parametrize("raw", ["Lucknow, UP", "Kanpur, U.P., India", "Agra, up (Hybrid)"])
+def test_up_after_a_comma_is_uttar_pradesh(raw):
+    assert resolve_location(raw).region == "Uttar Pradesh"
+
+
+@pytest.mark.parametrize("raw", ["Up", "Follow Up", "Sales Follow Up Executive", "Start-up"])
+def test_up_as_a_word_is_not_a_place(raw):
+    assert resolve_location(raw) == Place()
+
+
+def test_normalize_title_keeps_follow_up():
+    assert normalize_title("Sales Executive - Follow Up") == "sales executive follow up"
+    assert normalize_title("Business Analyst - Noida, UP") == "business analyst"
+
+
+def test_place_matches_targets():
+    targets = ("Delhi NCR", "Pune", "Remote")
+    assert place_matches(resolve_location("Faridabad"), targets)
+    assert place_matches(resolve_location("Pune, Maharashtra"), targets)
+    assert place_matches(resolve_location("Remote, India"), targets)
+    assert not place_matches(resolve_location("Nagpur"), targets)
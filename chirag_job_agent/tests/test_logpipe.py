@@ -0,0 +1,37 @@
+import logging
+import threading
+
+import logpipe
+
+
+def _stamp(msg: str) -> str:
+    record = logging.LogRecord("t", logging.INFO, __file__, 0, msg, None, None)
+    logpipe._pipeline.filter(record)
+    return record.stage
+
+
+def test_concurrent_stages_stamp_their_own_records():
+    inside = threading.Barrier(2)
+    stamped = {}
+
+    def run(name):
+        with logpipe.stage(name):
+            inside.wait()            # both stages are open at once
+            stamped[name] = _stamp(name)
+            inside.wait()
+
+    threads = [threading.Thread(target=run, args=(n,)) for n in ("scrape", "score")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert stamped == {"scrape": "scrape", "score": "score"}
+    assert _stamp("after") == "-"
+
+
+def test_nested_stage_restores_the_outer_one():
+    with logpipe.stage("outer"):
+        with logpipe.stage("inner"):
+            assert _stamp("x") == "inner"
+        assert _stamp("y") == "outer"
+    assert _stamp("z") == "-"
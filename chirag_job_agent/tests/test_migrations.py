@@ -0,0 +1,70 @@
+import sqlite3
+
+import database
+
+
+def _tables(path) -> set[str]:
+    with sqlite3.connect(path) as conn:
+        return {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")}
+
+
+def test_migrates_from_v0(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "jobs.db"))
+    database.init_db()
+    with database.get_conn() as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == database.SCHEMA_VERSION
+    assert {"jobs", "job_descriptions", "jobs_fts", "job_scores", "rejected_jobs",
+            "outbox", "score_model"} <= _tables(database.DB_PATH)
+    assert "jobs_search" not in _tables(database.DB_PATH)
+    # A second start applies nothing.
+    with database.get_conn() as conn:
+        assert database._migrate(conn) == 0
+
+
+def test_migrates_baseline_database(tmp_path, monkeypatch):
+    """A jobs.db written before migrations existed: base tables, user_version 0."""
+    path = tmp_path / "jobs.db"
+    monkeypatch.setattr(database, "DB_PATH", str(path))
+    with sqlite3.connect(path) as conn:
+        conn.executescript(database.MIGRATIONS[0])
+        conn.execute("""
+            INSERT INTO jobs (title, company, location, url, platform, description,
+                              fit_score, matching_skills, missing_skills, date_found)
+            VALUES ('Business Analyst', 'Acme', 'Noida, Uttar Pradesh', 'https://x/1', 'LinkedIn',
+                    'Needs 2.5 years with HubSpot CRM.', 7, 'HubSpot CRM, Excel', 'MBA', '2026-10-01')
+        """)
+
+    database.init_db()
+
+    assert database.get_description(1) == "Needs 2.5 years with HubSpot CRM."
+    assert [r["id"] for r in database.search_jobs("hubspot")] == [1]
+    with database.get_conn() as conn:
+        row = conn.execute("SELECT * FROM jobs WHERE id = 1").fetchone()
+        skills = {r[0] for r in conn.execute("SELECT s.name FROM job_skills js "
+                                             "JOIN skills s ON s.id = js.skill_id")}
+        scores = conn.execute("SELECT profile, fit_score FROM job_scores").fetchall()
+    assert row["description"] is None
+    assert (row["exp_min"], row["exp_max"]) == (2, None)
+    assert (row["city"], row["region"]) == ("Noida", "Delhi NCR")
+    assert row["canonical_role"] == "Business Analyst"
+    assert skills == {"HubSpot CRM", "Excel", "MBA"}
+    assert [tuple(r) for r in scores] == [("default", 7)]
+
+    stats = database.get_stats()
+    assert stats["total"] == 1 and stats["avg_score"] == 7.0
+    assert stats["by_region"] == {"Delhi NCR": 1}
+    assert stats["by_role"] == {"Business Analyst": 1}
+
+
+def test_fts_follows_title_changes_and_deletes(db):
+    from models import Job, ScoreResult
+    [job_id] = db.save_scored_jobs([Job(title="Product Owner", company="Zeta", location="Remote",
+                                        url="https://x/2", platform="Indeed",
+                                        description="Own the roadmap.", score=ScoreResult(fit_score=7))])
+    assert [r["id"] for r in db.search_jobs("roadmap")] == [job_id]
+    with db.get_conn() as conn:
+        conn.execute("UPDATE jobs SET title = 'Product Manager' WHERE id = ?", (job_id,))
+    assert [r["id"] for r in db.search_jobs("manager")] == [job_id]
+    with db.get_conn() as conn:
+        conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+    assert db.search_jobs("roadmap") == []
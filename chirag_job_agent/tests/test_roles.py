@@ -0,0 +1,56 @@
+import pytest
+
+import roles
+from roles import OTHER, canonical_targets, classify_title, normalize_title, scoring_role
+
+
+@pytest.mark.parametrize("title, normalized", [
+    ("Sr. Business Development Executive (B2B SaaS) - Noida", "business development executive"),
+    ("BDE - IT Sales | Urgent Hiring", "bde it sales"),
+    ("Executive - Business Development", "executive business development"),
+    ("Product Owner @ Acme", "product owner"),
+    ("Business Analyst - Noida, UP", "business analyst"),
+    ("Senior Associate", ""),
+])
+def test_normalize_title(title, normalized):
+    assert normalize_title(title) == normalized
+
+
+@pytest.mark.parametrize("title, role", [
+    ("Sr. Business Development Executive (B2B SaaS) - Noida", "Business Development"),
+    ("Business Development Executive II", "Business Development"),
+    ("BDE - IT Sales | Urgent Hiring", "IT Sales"),
+    ("Sales Engineer", "Pre-Sales Consultant"),        # longest phrase beats "engineer"
+    ("Lead Generation Executive", "Business Development"),
+    ("Product Owner @ Acme", "Product Manager"),
+    ("Senior Associate", OTHER),
+    ("Gardener", OTHER),
+])
+def test_classify_title(title, role):
+    assert classify_title(title) == role
+    assert scoring_role(title) == role
+
+
+@pytest.mark.parametrize("title, role", [
+    ("Tax Consultant", "Business Consultant"),
+    ("SAP FICO Consultant", "Business Consultant"),
+    ("Head of Sales", "IT Sales"),
+])
+def test_broad_phrases_file_the_title_but_do_not_score_it(title, role):
+    assert classify_title(title) == role
+    assert scoring_role(title) == OTHER
+
+
+def test_canonical_targets_drop_unknown_roles():
+    assert canonical_targets(("Business Analyst", "Product Owner", "Astronaut")) == \
+        {"Business Analyst", "Product Manager"}
+
+
+def test_new_titles_are_drained_once_and_preloaded_titles_win(monkeypatch):
+    monkeypatch.setattr(roles, "_known", {})
+    monkeypatch.setattr(roles, "_new", {})
+    roles.preload({"chief vibes officer": "Marketing"})
+    assert classify_title("Chief Vibes Officer") == "Marketing"
+    assert classify_title("Inside Sales Rep") == "IT Sales"
+    assert roles.drain_new() == {"inside sales rep": "IT Sales"}
+    assert roles.drain_new() == {}
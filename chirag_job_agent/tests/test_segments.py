@@ -0,0 +1,81 @@
+import os
+
+import pytest
+
+import database
+import segments
+from models import Job, ScoreResult
+
+
+def _job(i: int, score: int) -> Job:
+    s = ScoreResult(fit_score=score)
+    return Job(title=f"Business Analyst {i}", company="Acme", location="Noida",
+               url=f"https://x/{i}", platform="LinkedIn", description="BRD work.",
+               score=s, scores={"default": s})
+
+
+def _replay(tmp_path, monkeypatch, seg_dir, name="replayed.db"):
+    """Build a fresh jobs.db from the segments, as a new checkout would."""
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / name))
+    database.init_db()
+    segments.sync(seg_dir)
+    with database.get_conn() as conn:
+        return ({r[0] for r in conn.execute("SELECT url FROM jobs")},
+                {r[0] for r in conn.execute("SELECT job_key FROM rejected_jobs")})
+
+
+@pytest.fixture
+def seg_dir(db, tmp_path):
+    path = str(tmp_path / "segments")
+    segments.sync(path)          # switches change tracking on
+    return path
+
+
+def test_promoted_ledger_rows_stay_gone_after_replay(db, seg_dir, tmp_path, monkeypatch):
+    db.save_rejected([_job(1, 4), _job(2, 3)], "r1")
+    segments.write_segment(seg_dir)
+
+    promoted = _job(1, 7)       # a lowered threshold keeps job 1 now (main.load_ledger)
+    db.save_scored_jobs([promoted])
+    db.delete_rejected([promoted.key])
+    segments.write_segment(seg_dir)
+
+    jobs, ledger = _replay(tmp_path, monkeypatch, seg_dir)
+    assert jobs == {"https://x/1"}
+    assert ledger == {_job(2, 3).key}
+
+
+def test_promoted_rows_stay_gone_after_compaction(db, seg_dir, tmp_path, monkeypatch):
+    db.save_rejected([_job(1, 4), _job(2, 3)], "r1")
+    segments.write_segment(seg_dir)
+    db.delete_rejected([_job(1, 4).key])
+    segments.write_segment(seg_dir)
+    segments.compact(seg_dir, force=True)
+
+    _, ledger = _replay(tmp_path, monkeypatch, seg_dir)
+    assert ledger == {_job(2, 3).key}
+
+
+def test_expired_ledger_rows_stay_gone_after_replay(db, seg_dir, tmp_path, monkeypatch):
+    db.save_rejected([_job(1, 4), _job(2, 3)], "r1")
+    with db.get_conn() as conn:
+        conn.execute("UPDATE rejected_jobs SET scored_at = '2000-01-01' WHERE job_key = ?",
+                     (_job(1, 4).key,))
+    segments.write_segment(seg_dir)
+    db.apply_retention()
+    segments.write_segment(seg_dir)
+
+    _, ledger = _replay(tmp_path, monkeypatch, seg_dir)
+    assert ledger == {_job(2, 3).key}
+
+
+def test_rejected_again_after_promotion_is_kept(db, seg_dir, tmp_path, monkeypatch):
+    db.save_rejected([_job(1, 4)], "r1")
+    segments.write_segment(seg_dir)
+    db.delete_rejected([_job(1, 4).key])
+    db.save_rejected([_job(1, 5)], "r2")
+    segments.write_segment(seg_dir)
+
+    _, ledger = _replay(tmp_path, monkeypatch, seg_dir)
+    assert ledger == {_job(1, 5).key}
+    assert len(os.listdir(seg_dir)) == 3     # two segments + MANIFEST
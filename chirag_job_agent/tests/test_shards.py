@@ -0,0 +1,78 @@
+import pytest
+
+import shards
+from models import Job, ScoreResult
+
+UNITS = [(src, f"{src} query {i}") for src, n in (("LinkedIn", 5), ("Indeed", 6), ("Naukri", 5))
+         for i in range(n)]
+
+
+@pytest.mark.parametrize("count", [1, 2, 3, 4, 5, 6, 16, 20])
+def test_assign_is_a_balanced_partition(count):
+    parts = [shards.assign(UNITS, i, count) for i in range(1, count + 1)]
+    assert sorted(sum(parts, [])) == sorted(UNITS)
+    sizes = [len(p) for p in parts]
+    assert max(sizes) - min(sizes) <= 1
+
+
+@pytest.mark.parametrize("count", [2, 3, 4])
+def test_assign_spreads_every_source(count):
+    for src in ("LinkedIn", "Indeed", "Naukri"):
+        per_worker = [sum(1 for s, _ in shards.assign(UNITS, i, count) if s == src)
+                      for i in range(1, count + 1)]
+        assert max(per_worker) - min(per_worker) <= 1
+
+
+def test_assign_ignores_plan_order():
+    before = {u: i for i in range(1, 5) for u in shards.assign(UNITS, i, 4)}
+    assert before == {u: i for i in range(1, 5) for u in shards.assign(list(reversed(UNITS)), i, 4)}
+
+
+def test_configured_searches_are_balanced():
+    plan = shards.plan()
+    sizes = [len(shards.assign(plan, i, 4)) for i in range(1, 5)]
+    assert max(sizes) - min(sizes) <= 1
+
+
+def _job(url: str, score: int) -> Job:
+    return Job(title="Business Analyst", company="Acme", location="Noida", url=url,
+               platform="LinkedIn", description="BRD and stakeholder work.",
+               score=ScoreResult(fit_score=score), scores={"default": ScoreResult(fit_score=score)})
+
+
+def _write(tmp_path, shard: int, jobs: list[Job]) -> str:
+    return shards.write_shard("r1", shard, 2, jobs, found=len(jobs), searches={},
+                              prefilter_rejects={"LinkedIn": {"title": shard}},
+                              stage_timings={"scrape": shard * 1.5}, samples={},
+                              shard_dir=str(tmp_path))
+
+
+def test_merge_keeps_the_best_copy_of_a_duplicate(tmp_path):
+    paths = [_write(tmp_path, 1, [_job("https://x/1", 6), _job("https://x/2", 7)]),
+             _write(tmp_path, 2, [_job("https://x/1", 9)])]
+    merged = shards.merge_shards(paths)
+    assert {j.url: j.fit_score for j in merged["jobs"]} == {"https://x/1": 9, "https://x/2": 7}
+    assert merged["found"] == 3 and merged["missing"] == []
+    assert merged["prefilter_rejects"] == {"LinkedIn": {"title": 3}}
+    assert merged["stage_timings"] == {"scrape": 3.0}
+
+
+def test_merge_rejects_mixed_runs(tmp_path):
+    a = _write(tmp_path, 1, [])
+    b = shards.write_shard("r2", 2, 2, [], 0, {}, {}, {}, {}, shard_dir=str(tmp_path))
+    with pytest.raises(ValueError):
+        shards.merge_shards([a, b])
+
+
+def test_stored_job_takes_the_newest_score(db):
+    [job_id] = db.save_scored_jobs([_job("https://x/1", 6)])
+    with db.get_conn() as conn:
+        conn.execute("UPDATE job_scores SET notified = 1 WHERE job_id = ?", (job_id,))
+
+    assert db.save_scored_jobs([_job("https://x/1", 8)]) == []
+    with db.get_conn() as conn:
+        assert conn.execute("SELECT fit_score FROM jobs WHERE id = ?", (job_id,)).fetchone()[0] == 8
+        assert tuple(conn.execute("SELECT fit_score, notified FROM job_scores WHERE job_id = ?",
+                                  (job_id,)).fetchone()) == (8, 1)
+        assert conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0] == 1
+    assert db.get_stats()["avg_score"] == 8.0